@@ -12,144 +12,95 @@ import cv2
 import requests
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 import warnings
+from api.rules import get_rule_engine
+from api.inference_pool import get_inference_pool
+from api.historical_data import DEFAULT_END, DEFAULT_SEED, DEFAULT_START, generate_history
+from api.forecasting import FORECAST_TARGETS, ForecastModelsUnavailable, forecast_registry
+from api.seasonal_forecast import DEFAULT_INTERVAL_LEVEL
 warnings.filterwarnings('ignore')
 
 class PredictiveAnalytics:
     """Forecast pollution trends using time series analysis and ML models"""
     
-    def __init__(self):
-        self.models = {}
-        self.scalers = {}
+    def __init__(self, seed=DEFAULT_SEED, registry=forecast_registry):
+        self.seed = seed
+        # Pre-trained models shared by every instance in the process
+        self.registry = registry
         self.trend_data = self._generate_historical_data()
     
     def _generate_historical_data(self):
         """Generate realistic historical water quality data for demonstration"""
-        dates = pd.date_range(start='2023-01-01', end='2024-12-31', freq='D')
-        
-        # Simulate seasonal patterns and trends
-        data = []
-        for i, date in enumerate(dates):
-            # Seasonal patterns (worse in monsoon, better in winter)
-            seasonal_factor = 1 + 0.3 * np.sin(2 * np.pi * i / 365)
-            
-            # Weekly patterns (worse on weekends due to industrial activity)
-            weekly_factor = 1 + 0.1 * np.sin(2 * np.pi * i / 7)
-            
-            # Random noise
-            noise = np.random.normal(0, 0.1)
-            
-            # Base values with trends
-            ph = 7.2 + 0.5 * seasonal_factor + noise
-            tds = 250 + 100 * seasonal_factor * weekly_factor + noise * 50
-            bod = 15 + 10 * seasonal_factor * weekly_factor + noise * 5
-            cod = 30 + 20 * seasonal_factor * weekly_factor + noise * 10
-            
-            data.append({
-                'date': date,
-                'ph': max(6.0, min(9.0, ph)),
-                'tds': max(50, tds),
-                'bod': max(1, bod),
-                'cod': max(5, cod)
-            })
-        
-        return pd.DataFrame(data)
+        # Seasonal patterns (worse in monsoon, better in winter), weekly industrial
+        # cycles and noise, generated column-wise from the seeded generator
+        return generate_history(DEFAULT_START, DEFAULT_END, freq='D', seed=self.seed)
     
     def train_predictive_models(self):
-        """Train models for predicting future pollution levels"""
+        """Retrain on this instance's history and publish the models to every process"""
         print("🤖 Training predictive models...")
         
-        # Prepare features (day of year, day of week, trend)
-        self.trend_data['day_of_year'] = self.trend_data['date'].dt.dayofyear
-        self.trend_data['day_of_week'] = self.trend_data['date'].dt.dayofweek
-        self.trend_data['days_since_start'] = (self.trend_data['date'] - self.trend_data['date'].min()).dt.days
-        
-        features = ['day_of_year', 'day_of_week', 'days_since_start']
-        targets = ['ph', 'tds', 'bod', 'cod']
-        
-        for target in targets:
-            # Prepare data
-            X = self.trend_data[features].values
-            y = self.trend_data[target].values
-            
-            # Scale features
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            
-            # Train model
-            model = LinearRegression()
-            model.fit(X_scaled, y)
-            
-            # Store model and scaler
-            self.models[target] = model
-            self.scalers[target] = scaler
-            
-            # Calculate accuracy
-            y_pred = model.predict(X_scaled)
-            r2 = r2_score(y, y_pred)
-            print(f"✅ {target.upper()} model trained - R² Score: {r2:.3f}")
+        bundle = self.registry.retrain(self.trend_data)
+        for target, metrics in bundle.manifest['metrics']['network'].items():
+            print(f"✅ {target.upper()} model trained - R² Score: {metrics['r2']:.3f}")
     
-    def forecast_trends(self, days_ahead=30):
-        """Forecast pollution trends for the next N days"""
-        if not self.models:
-            self.train_predictive_models()
-        
-        # Generate future dates
-        last_date = self.trend_data['date'].max()
-        future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=days_ahead, freq='D')
-        
-        forecasts = []
-        for date in future_dates:
-            # Prepare features for prediction
-            day_of_year = date.dayofyear
-            day_of_week = date.dayofweek
-            days_since_start = (date - self.trend_data['date'].min()).days
-            
-            features = np.array([[day_of_year, day_of_week, days_since_start]])
-            
-            predictions = {}
-            for target in ['ph', 'tds', 'bod', 'cod']:
-                # Scale features and predict
-                X_scaled = self.scalers[target].transform(features)
-                pred = self.models[target].predict(X_scaled)[0]
-                predictions[target] = round(pred, 2)
-            
-            # Calculate WQI
-            wqi = self._calculate_wqi(predictions)
-            
-            forecasts.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'predictions': predictions,
-                'wqi': wqi,
-                'risk_level': self._get_risk_level(wqi),
-                'confidence': np.random.uniform(0.85, 0.98)  # Simulated confidence
-            })
-        
-        return forecasts
+    def forecast_trends(self, days_ahead=30, level=DEFAULT_INTERVAL_LEVEL):
+        """Forecast pollution trends for the next N days, with level prediction intervals"""
+        # Loaded at startup or from the published store; never trained per request
+        # (ForecastModelsUnavailable until `manage.py train_forecast_models` has run).
+        # The whole horizon is one design matrix and one matrix multiply.
+        bundle = self.registry.get()
+        dates, predictions = bundle.forecast(days_ahead, level=level)
+        return self._forecast_records(dates, predictions, level)
+    
+    def forecast_station_trends(self, days_ahead=30, stations=None, level=DEFAULT_INTERVAL_LEVEL):
+        """Forecast the next N days for each station (default: all with models)"""
+        bundle = self.registry.get()
+        dates, predictions = bundle.forecast(days_ahead, stations if stations is not None else bundle.stations, level)
+        return {station: self._forecast_records(dates, pair, level) for station, pair in predictions.items()}
+    
+    def _forecast_records(self, dates, predictions, level):
+        """One forecast dict per day from (mean, half_width) matrices (days x targets)"""
+        mean, half_width = predictions
+        columns = {target: np.round(mean[:, i], 2).tolist() for i, target in enumerate(FORECAST_TARGETS)}
+        lower = np.round(mean - half_width, 2).tolist()
+        upper = np.round(mean + half_width, 2).tolist()
+        wqi = self._calculate_wqi(columns)
+        risk_levels = self._get_risk_levels(wqi)
+        
+        return [
+            {
+                'date': date,
+                'predictions': dict(zip(FORECAST_TARGETS, values)),
+                # Each actual value should fall inside its interval with probability `confidence`
+                'intervals': {
+                    target: {'lower': low, 'upper': high}
+                    for target, low, high in zip(FORECAST_TARGETS, day_lower, day_upper)
+                },
+                'wqi': day_wqi,
+                'risk_level': risk_level,
+                'confidence': level
+            }
+            for date, values, day_lower, day_upper, day_wqi, risk_level in zip(
+                dates.strftime('%Y-%m-%d'), zip(*columns.values()), lower, upper, wqi, risk_levels
+            )
+        ]
     
     def _calculate_wqi(self, params):
-        """Calculate Water Quality Index"""
-        # Simplified WQI calculation
-        ph_score = max(0, 100 - abs(params['ph'] - 7.0) * 10)
-        tds_score = max(0, 100 - (params['tds'] - 100) / 10)
-        bod_score = max(0, 100 - params['bod'] * 2)
-        cod_score = max(0, 100 - params['cod'])
-        
-        wqi = (ph_score * 0.25 + tds_score * 0.25 + bod_score * 0.25 + cod_score * 0.25)
-        return round(max(0, min(100, wqi)), 1)
+        """Water Quality Index per day from forecast parameter columns (pH, TDS, BOD, COD)"""
+        wqi = get_rule_engine().wqi.calculate_available({
+            'pH': np.asarray(params['ph']),
+            'TDS': np.asarray(params['tds']),
+            'BOD': np.asarray(params['bod']),
+            'COD': np.asarray(params['cod'])
+        })
+        return [round(value, 1) for value in wqi.tolist()]
     
-    def _get_risk_level(self, wqi):
-        """Determine risk level based on WQI"""
-        if wqi >= 80:
-            return {'level': 'Low', 'color': 'green'}
-        elif wqi >= 60:
-            return {'level': 'Moderate', 'color': 'yellow'}
-        elif wqi >= 40:
-            return {'level': 'High', 'color': 'orange'}
-        else:
-            return {'level': 'Critical', 'color': 'red'}
+    def _get_risk_levels(self, wqi):
+        """Risk level per WQI value"""
+        engine = get_rule_engine()
+        levels = [{'level': risk['message'], 'color': risk['color']} for risk in engine.status_tables['WQI'].statuses]
+        return [levels[code] for code in engine.status_codes('WQI', wqi).tolist()]
 
 
 class AnomalyDetector:
@@ -159,6 +110,8 @@ class AnomalyDetector:
         self.detector = IsolationForest(contamination=0.1, random_state=42)
         self.scaler = StandardScaler()
         self.is_trained = False
+        # Copy of the trained model for inference worker processes
+        self.artifact_path = None
         self.normal_ranges = {
             'ph': (6.5, 8.5),
             'tds': (100, 500),
@@ -187,35 +140,29 @@ class AnomalyDetector:
         X_scaled = self.scaler.fit_transform(X_clean)
         self.detector.fit(X_scaled)
         self.is_trained = True
+        self.artifact_path = None
         
         print("✅ Anomaly detection model trained successfully!")
     
     def detect_anomalies(self, current_readings):
         """Detect anomalies in current water quality readings"""
         if not self.is_trained:
-            # Use historical data from predictive analytics for training
-            analytics = PredictiveAnalytics()
-            self.train_anomaly_detector(analytics.trend_data)
+            # Train on the same synthetic history predictive analytics uses
+            self.train_anomaly_detector(generate_history(DEFAULT_START, DEFAULT_END, freq='D', seed=DEFAULT_SEED))
         
         anomalies = []
-        
-        for reading in current_readings:
-            # Prepare features
-            features = np.array([[
-                reading['ph'],
-                reading['tds'],
-                reading['bod'],
-                reading['cod']
-            ]])
-            
-            # Scale features
-            features_scaled = self.scaler.transform(features)
-            
-            # Detect anomaly
-            is_anomaly = self.detector.predict(features_scaled)[0] == -1
-            anomaly_score = self.detector.decision_function(features_scaled)[0]
-            
-            if is_anomaly:
+        if not current_readings:
+            return anomalies
+        
+        # Score every reading in one pass
+        features = np.array([
+            [reading['ph'], reading['tds'], reading['bod'], reading['cod']]
+            for reading in current_readings
+        ], dtype=np.float64)
+        labels, scores = self._score(features)
+        
+        for reading, label, anomaly_score in zip(current_readings, labels, scores):
+            if label == -1:
                 # Identify which parameters are anomalous
                 anomalous_params = []
                 for param, value in [('ph', reading['ph']), ('tds', reading['tds']), 
@@ -240,6 +187,17 @@ class AnomalyDetector:
         
         return anomalies
     
+    def _score(self, features):
+        """IsolationForest labels and decision scores, on the inference pool when configured"""
+        pool = get_inference_pool()
+        if pool is not None:
+            if self.artifact_path is None:
+                self.artifact_path = pool.publish_artifact((self.scaler, self.detector), 'anomaly_detector')
+            return pool.score_anomalies(self.artifact_path, features)
+        
+        features_scaled = self.scaler.transform(features)
+        return self.detector.predict(features_scaled), self.detector.decision_function(features_scaled)
+    
     def _get_recommended_action(self, anomalous_params):
         """Generate recommended actions based on anomalous parameters"""
         actions = []
@@ -553,8 +511,12 @@ class AIEngine:
         """Get comprehensive AI dashboard data"""
         print("🚀 Generating AI dashboard data...")
         
-        # Get forecasts
-        forecasts = self.predictive_analytics.forecast_trends(days_ahead=7)
+        # Get forecasts (none until forecast models have been published)
+        try:
+            forecasts = self.predictive_analytics.forecast_trends(days_ahead=7)
+        except ForecastModelsUnavailable as e:
+            print(f"Skipping forecasts: {str(e)}")
+            forecasts = []
         
         # Simulate current readings for anomaly detection
         current_readings = [
@@ -0,0 +1,227 @@
+"""
+Batched data generation for the advanced features endpoint
+Draws every sample the sensor network and pollution-source sections need in one
+vectorized call, interpolates the heatmap from station means, and assembles the
+payloads from NumPy columns
+"""
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .interpolation import get_station_coordinates, spatial_interpolator
+
+DEFAULT_HEATMAP_GRID_SIZE = 20
+# Resolutions a client may ask for; a fixed set keeps the interpolation caches small.
+# 256 x 256 cells is the largest grid we serialize within the endpoint's latency budget
+HEATMAP_GRID_SIZES = (10, 20, 32, 50, 64, 100, 128, 256)
+MAX_HEATMAP_GRID_SIZE = max(HEATMAP_GRID_SIZES)
+
+# Parameters interpolated onto the heatmap grid
+HEATMAP_PARAMETERS = ['TDS', 'BOD', 'COD', 'DO', 'Temp']
+
+POLLUTION_SOURCE_TYPES = ['Industrial', 'Sewage', 'Agricultural', 'Residential', 'Commercial']
+
+
+def parse_grid_size(value, default=DEFAULT_HEATMAP_GRID_SIZE):
+    """Requested heatmap resolution (default when not given); ValueError if invalid"""
+    if value is None:
+        return default
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('grid_size must be an integer')
+    if size not in HEATMAP_GRID_SIZES:
+        raise ValueError(f"grid_size must be one of {', '.join(map(str, HEATMAP_GRID_SIZES))}")
+    return size
+
+
+def parse_year(value, dataset):
+    """Requested heatmap year (the latest by default); ValueError unless the dataset has it"""
+    if value is None:
+        return dataset.latest_year
+    try:
+        year = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('year must be an integer')
+    if dataset.cube.samples(year) == 0:
+        raise ValueError(f'No data for year {year}')
+    return year
+
+
+def _columns(frame, rows, columns):
+    """float64 arrays of the given columns at the given row positions"""
+    return {column: frame[column].to_numpy(dtype=np.float64)[rows] for column in columns}
+
+
+def _json_list(values, decimals=None, integer=False):
+    """Rounded (or truncated to int) values as a list, with missing readings as None"""
+    finite = np.isfinite(values)
+    if integer:
+        rounded = np.where(finite, values, 0).astype(np.int64)
+    else:
+        rounded = np.round(values, decimals) if decimals is not None else values
+    return [value if ok else None for value, ok in zip(rounded.tolist(), finite.tolist())]
+
+
+class LocationSampler:
+    """Draws random rows per location without filtering the frame once per location"""
+
+    def __init__(self, frame):
+        codes, uniques = pd.factorize(frame['Location'])
+        self.code_of = {str(location): code for code, location in enumerate(uniques)}
+
+        # Row positions grouped by location code
+        self.order = np.argsort(codes, kind='stable')
+        self.counts = np.bincount(codes, minlength=len(uniques))
+        self.starts = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+
+    def has(self, location):
+        return location in self.code_of
+
+    def sample(self, locations, rng):
+        """One random row position per entry in locations (repeats allowed)"""
+        codes = np.array([self.code_of[location] for location in locations], dtype=np.int64)
+        offsets = (rng.random(len(codes)) * self.counts[codes]).astype(np.int64)
+        return self.order[self.starts[codes] + offsets]
+
+
+def generate_sensor_network(latest_data, locations, rng):
+    """One sensor per location, each reporting a random reading from that location"""
+    sampler = LocationSampler(latest_data)
+
+    # Sensor ids follow the location's position in the full location list
+    sensors = [(i, location) for i, location in enumerate(locations) if sampler.has(location)]
+    if not sensors:
+        return []
+
+    rows = sampler.sample([location for _, location in sensors], rng)
+    values = _columns(latest_data, rows, ['Temp', 'pH', 'DO', 'TDS', 'BOD', 'COD'])
+    n = len(sensors)
+
+    status = np.where(rng.random(n) > 0.1, 'active', 'warning').tolist()
+    battery = rng.integers(70, 100, n).tolist()
+    signal = rng.integers(80, 100, n).tolist()
+    temperature = _json_list(values['Temp'], 1)
+    ph = _json_list(values['pH'], 1)
+    dissolved_oxygen = _json_list(values['DO'], 1)
+    tds = _json_list(values['TDS'], integer=True)
+    bod = _json_list(values['BOD'], 1)
+    cod = _json_list(values['COD'], 1)
+    last_reading = datetime.now().isoformat()
+
+    return [
+        {
+            'id': f'sensor_{i + 1}',
+            'name': f'{location} Sensor',
+            'location': location,
+            'status': status[k],
+            'battery': battery[k],
+            'signal': signal[k],
+            'last_reading': last_reading,
+            'temperature': temperature[k],
+            'ph': ph[k],
+            'dissolved_oxygen': dissolved_oxygen[k],
+            'tds': tds[k],
+            'bod': bod[k],
+            'cod': cod[k]
+        }
+        for k, (i, location) in enumerate(sensors)
+    ]
+
+
+def generate_heatmap(dataset, grid_size, year=None):
+    """
+    grid_size x grid_size surface interpolated (IDW) from per-station means for one year.
+    Station means come from the aggregate cube; the interpolator caches the surface
+    arrays per (dataset version, year, resolution), so a repeated request only
+    rounds those arrays and builds the per-cell payload.
+    """
+    year = dataset.latest_year if year is None else year
+    cube = dataset.cube
+    stations = [location for location in dataset.locations if cube.samples(year, location) > 0]
+    if not stations:
+        return []
+
+    # A station-year without any reading of a parameter is left out of that parameter's surface
+    station_means = []
+    for location in stations:
+        summary = cube.summary(year, location)
+        station_means.append([summary.get(parameter, {}).get('mean', np.nan) for parameter in HEATMAP_PARAMETERS])
+
+    cell_lat, cell_lng, surface = spatial_interpolator.surface(
+        get_station_coordinates(stations),
+        station_means,
+        grid_size,
+        cache_key=(dataset.path, dataset.signature, year, tuple(HEATMAP_PARAMETERS))
+    )
+    columns = dict(zip(HEATMAP_PARAMETERS, surface.T))
+
+    n_cells = grid_size * grid_size
+    x = np.repeat(np.arange(grid_size), grid_size).tolist()
+    y = np.tile(np.arange(grid_size), grid_size).tolist()
+    value = _json_list(np.clip(columns['TDS'] / 50, 0, 100), 2)
+    temperature = _json_list(columns['Temp'], 1)
+    tds = _json_list(columns['TDS'], 1)
+    bod = _json_list(columns['BOD'], 2)
+    cod = _json_list(columns['COD'], 2)
+    dissolved_oxygen = _json_list(columns['DO'], 2)
+    lat = np.round(cell_lat, 6).tolist()
+    lng = np.round(cell_lng, 6).tolist()
+
+    return [
+        {
+            'x': x[k],
+            'y': y[k],
+            'lat': lat[k],
+            'lng': lng[k],
+            'value': value[k],
+            'temperature': temperature[k],
+            'tds': tds[k],
+            'bod': bod[k],
+            'cod': cod[k],
+            'dissolved_oxygen': dissolved_oxygen[k],
+            'location': f'Grid_{x[k]}_{y[k]}'
+        }
+        for k in range(n_cells)
+    ]
+
+
+def generate_pollution_sources(latest_data, locations, rng, source_types=POLLUTION_SOURCE_TYPES):
+    """One source per (source type, location) pair, scored from a random reading at that location"""
+    sampler = LocationSampler(latest_data)
+    pairs = [(i, stype, location) for i, stype in enumerate(source_types)
+             for location in locations if sampler.has(location)]
+    if not pairs:
+        return []
+
+    rows = sampler.sample([location for _, _, location in pairs], rng)
+    values = _columns(latest_data, rows, ['BOD', 'COD', 'TDS'])
+    bod = values['BOD']
+    n = len(pairs)
+
+    severity = np.select([bod > 15, bod > 10], ['high', 'medium'], 'low').tolist()
+    compliance = np.select([bod > 15, bod > 10], ['violation', 'warning'], 'compliant').tolist()
+    impact_score = _json_list(np.minimum(100, bod + values['COD'] / 5 + values['TDS'] / 50), integer=True)
+    lat = (19.0 + rng.uniform(-0.1, 0.1, n)).tolist()
+    lng = (72.85 + rng.uniform(-0.1, 0.1, n)).tolist()
+    monthly_discharge = rng.integers(1000, 50000, n).tolist()
+
+    return [
+        {
+            'id': f'{stype.lower()}_{location.lower()}_{i}',
+            'name': f'{location} {stype} Source',
+            'type': stype,
+            'location': location,
+            'coordinates': {
+                'lat': lat[k],
+                'lng': lng[k]
+            },
+            'severity': severity[k],
+            'pollutants': ['BOD', 'COD', 'TDS'],
+            'impact_score': impact_score[k],
+            'status': 'active',
+            'monthly_discharge': monthly_discharge[k],
+            'compliance': compliance[k]
+        }
+        for k, (i, stype, location) in enumerate(pairs)
+    ]
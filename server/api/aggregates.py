@@ -0,0 +1,237 @@
+"""
+Mithi River Aggregate Cube
+Year x Location x parameter statistics (count/sum/min/max/sumsq) plus WQI category
+counts, built in one vectorized pass and updated incrementally as rows are appended
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+
+# Numeric score used when a WQI category has to be charted or averaged
+WQI_CATEGORY_SCORES = {'Good': 85, 'Moderate': 65}
+DEFAULT_WQI_SCORE = 45
+
+
+def _factorize(values):
+    """Integer codes and unique values for a column (works for categoricals and plain arrays)"""
+    codes, uniques = pd.factorize(values)
+    return codes, [u.item() if hasattr(u, 'item') else u for u in uniques]
+
+
+class AggregateCube:
+    """
+    Materialized statistics for every (year, location) cell.
+    Reads are dictionary lookups plus a reduction over at most len(locations) cells,
+    so their cost does not depend on how many rows have been loaded.
+    """
+
+    def __init__(self, parameters):
+        self.parameters = list(parameters)
+        self.years = []
+        self.locations = []
+        self.wqi_categories = []
+
+        self._year_index = {}
+        self._location_index = {}
+        self._wqi_index = {}
+        self._lock = threading.Lock()
+
+        n_params = len(self.parameters)
+        self.rows = np.zeros((0, 0), dtype=np.int64)
+        self.count = np.zeros((0, 0, n_params), dtype=np.int64)
+        self.sum = np.zeros((0, 0, n_params))
+        self.sumsq = np.zeros((0, 0, n_params))
+        self.min = np.zeros((0, 0, n_params))
+        self.max = np.zeros((0, 0, n_params))
+        self.wqi_counts = np.zeros((0, 0, 0), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, frame, parameters):
+        """Build a cube from a full frame with a single pass over its rows"""
+        cube = cls(parameters)
+        cube.add_frame(frame)
+        return cube
+
+    def copy(self):
+        """Independent cube with the same statistics (to extend without touching this one)"""
+        cube = AggregateCube(self.parameters)
+        with self._lock:
+            cube.years = list(self.years)
+            cube.locations = list(self.locations)
+            cube.wqi_categories = list(self.wqi_categories)
+            cube._year_index = dict(self._year_index)
+            cube._location_index = dict(self._location_index)
+            cube._wqi_index = dict(self._wqi_index)
+            for name in ('rows', 'count', 'sum', 'sumsq', 'min', 'max', 'wqi_counts'):
+                setattr(cube, name, getattr(self, name).copy())
+        return cube
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add_frame(self, frame):
+        """
+        Fold new rows (Year, Location, WQI and parameter columns) into the cube.
+        Rows missing any of the keys are skipped, as a groupby would drop them
+        """
+        year_codes, years = _factorize(frame['Year'])
+        location_codes, locations = _factorize(frame['Location'])
+        wqi_codes, categories = _factorize(frame['WQI'])
+        # pd.factorize gives missing keys code -1, which would index the last category
+        keep = (year_codes >= 0) & (location_codes >= 0) & (wqi_codes >= 0)
+        if not keep.all():
+            year_codes, location_codes, wqi_codes = year_codes[keep], location_codes[keep], wqi_codes[keep]
+        if len(year_codes) == 0:
+            return
+        values = frame[self.parameters].to_numpy(dtype=np.float64)[keep]
+
+        with self._lock:
+            self._grow(years, locations, categories)
+
+            # Map per-batch codes onto cube axes
+            year_map = np.array([self._year_index[y] for y in years], dtype=np.int64)
+            location_map = np.array([self._location_index[loc] for loc in locations], dtype=np.int64)
+            wqi_map = np.array([self._wqi_index[c] for c in categories], dtype=np.int64)
+
+            n_years, n_locations = self.rows.shape
+            n_cells = n_years * n_locations
+            n_params = len(self.parameters)
+            cells = year_map[year_codes] * n_locations + location_map[location_codes]
+
+            self.rows += np.bincount(cells, minlength=n_cells).reshape(n_years, n_locations)
+
+            valid = ~np.isnan(values)
+            filled = np.where(valid, values, 0.0)
+            for p in range(n_params):
+                self.count[:, :, p] += np.bincount(cells, weights=valid[:, p], minlength=n_cells).astype(np.int64).reshape(n_years, n_locations)
+                self.sum[:, :, p] += np.bincount(cells, weights=filled[:, p], minlength=n_cells).reshape(n_years, n_locations)
+                self.sumsq[:, :, p] += np.bincount(cells, weights=filled[:, p] ** 2, minlength=n_cells).reshape(n_years, n_locations)
+
+            # Min/max per cell via one sort + reduceat
+            order = np.argsort(cells, kind='stable')
+            sorted_cells = cells[order]
+            starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+            touched = sorted_cells[starts]
+            sorted_values = values[order]
+
+            flat_min = self.min.reshape(n_cells, n_params)
+            flat_max = self.max.reshape(n_cells, n_params)
+            flat_min[touched] = np.fmin(flat_min[touched], np.fmin.reduceat(sorted_values, starts, axis=0))
+            flat_max[touched] = np.fmax(flat_max[touched], np.fmax.reduceat(sorted_values, starts, axis=0))
+
+            n_wqi = len(self.wqi_categories)
+            wqi_cells = cells * n_wqi + wqi_map[wqi_codes]
+            self.wqi_counts += np.bincount(wqi_cells, minlength=n_cells * n_wqi).reshape(n_years, n_locations, n_wqi)
+
+    def _grow(self, years, locations, categories):
+        """Extend the cube axes for unseen years, locations or WQI categories"""
+        new_years = [y for y in years if y not in self._year_index]
+        new_locations = [loc for loc in locations if loc not in self._location_index]
+        new_categories = [c for c in categories if c not in self._wqi_index]
+        if not (new_years or new_locations or new_categories):
+            return
+
+        for year in new_years:
+            self._year_index[year] = len(self.years)
+            self.years.append(year)
+        for location in new_locations:
+            self._location_index[location] = len(self.locations)
+            self.locations.append(location)
+        for category in new_categories:
+            self._wqi_index[category] = len(self.wqi_categories)
+            self.wqi_categories.append(category)
+
+        pad = ((0, len(new_years)), (0, len(new_locations)))
+        self.rows = np.pad(self.rows, pad)
+        self.count = np.pad(self.count, pad + ((0, 0),))
+        self.sum = np.pad(self.sum, pad + ((0, 0),))
+        self.sumsq = np.pad(self.sumsq, pad + ((0, 0),))
+        self.min = np.pad(self.min, pad + ((0, 0),), constant_values=np.inf)
+        self.max = np.pad(self.max, pad + ((0, 0),), constant_values=-np.inf)
+        self.wqi_counts = np.pad(self.wqi_counts, pad + ((0, len(new_categories)),))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _cells(self, year, location=None):
+        """Index tuple selecting one cell or a whole year row; None if nothing is recorded"""
+        year_idx = self._year_index.get(year)
+        if year_idx is None:
+            return None
+        if location is None:
+            return (year_idx,)
+        location_idx = self._location_index.get(location)
+        if location_idx is None:
+            return None
+        return (year_idx, location_idx)
+
+    def samples(self, year, location=None):
+        """Number of rows recorded for a year (optionally one location)"""
+        with self._lock:
+            cells = self._cells(year, location)
+            return int(self.rows[cells].sum()) if cells is not None else 0
+
+    def summary(self, year, location=None):
+        """Per-parameter count/mean/min/max/std for a year (optionally one location)"""
+        with self._lock:
+            cells = self._cells(year, location)
+            if cells is None:
+                return {}
+
+            count = self.count[cells]
+            total = self.sum[cells]
+            sumsq = self.sumsq[cells]
+            minimum = self.min[cells]
+            maximum = self.max[cells]
+            if location is None:
+                count, total, sumsq = count.sum(axis=0), total.sum(axis=0), sumsq.sum(axis=0)
+                minimum, maximum = minimum.min(axis=0), maximum.max(axis=0)
+
+        result = {}
+        for p, parameter in enumerate(self.parameters):
+            n = int(count[p])
+            if n == 0:
+                continue
+            mean = total[p] / n
+            result[parameter] = {
+                'count': n,
+                'mean': float(mean),
+                'min': float(minimum[p]),
+                'max': float(maximum[p]),
+                'std': float(np.sqrt(max(sumsq[p] / n - mean * mean, 0.0)))
+            }
+        return result
+
+    def wqi_distribution(self, year, location=None):
+        """WQI category counts for a year, most frequent first (same order as value_counts)"""
+        with self._lock:
+            cells = self._cells(year, location)
+            if cells is None:
+                return {}
+            counts = self.wqi_counts[cells]
+            if location is None:
+                counts = counts.sum(axis=0)
+            categories = list(self.wqi_categories)
+
+        ranked = sorted(
+            ((category, int(n)) for category, n in zip(categories, counts) if n > 0),
+            key=lambda item: (-item[1], item[0])
+        )
+        return dict(ranked)
+
+    def wqi_mode(self, year, location=None, default='Poor'):
+        """Most frequent WQI category (ties resolved alphabetically, like Series.mode)"""
+        distribution = self.wqi_distribution(year, location)
+        return next(iter(distribution), default)
+
+    def wqi_score(self, year, location=None):
+        """Average numeric WQI score using WQI_CATEGORY_SCORES"""
+        distribution = self.wqi_distribution(year, location)
+        total = sum(distribution.values())
+        if total == 0:
+            return None
+        weighted = sum(WQI_CATEGORY_SCORES.get(category, DEFAULT_WQI_SCORE) * n for category, n in distribution.items())
+        return weighted / total
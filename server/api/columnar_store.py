@@ -0,0 +1,313 @@
+"""
+Columnar binary store for the Mithi River dataset
+Each store version is a directory holding one contiguous .npy file per column, with
+rows ordered by Year, plus a JSON manifest describing column dtypes, category
+dictionaries and the row range and min/max statistics of every Year partition.
+A CURRENT file names the active version and is replaced atomically on refresh, so
+readers (including memory-mapped ones in other worker processes) never see a
+half-written store. The CSV stays the import format.
+
+Measurements are stored as float32 together with the number of decimals the
+source values carry, so read_frame restores exactly the float64 values read_csv
+produces; a column that does not survive that round trip is stored as float64.
+
+This module has no Django dependency so standalone scripts can use it too.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+STORE_FORMAT_VERSION = 2
+MANIFEST_FILENAME = 'manifest.json'
+CURRENT_FILENAME = 'CURRENT'
+VERSIONS_DIRNAME = 'versions'
+DEFAULT_STORE_DIRNAME = 'mithi_river_store'
+
+# Number of store versions kept on disk (workers may still map an older one)
+KEEP_VERSIONS = 2
+
+MEASUREMENT_COLUMNS = ['Temp', 'DO', 'pH', 'TDS', 'BOD', 'COD']
+CATEGORY_COLUMNS = ['Location', 'WQI']
+COLUMNS = ['Year', 'Location'] + MEASUREMENT_COLUMNS + ['WQI']
+
+# On-disk dtypes (categoricals are stored as integer codes)
+STORE_DTYPES = {
+    'Year': 'int16',
+    **{column: 'float32' for column in MEASUREMENT_COLUMNS}
+}
+
+# Most decimals a float32 column is restored to; more precise columns stay float64
+MAX_STORED_DECIMALS = 6
+
+
+def _code_dtype(n_categories):
+    return 'int8' if n_categories < 127 else 'int16' if n_categories < 32767 else 'int32'
+
+
+def _float32_layout(values):
+    """
+    Column metadata for float64 values: float32 with the decimals that restore
+    them exactly, or float64 when no such decimals exist
+    """
+    restored = values.astype(np.float32).astype(np.float64)
+    for decimals in range(MAX_STORED_DECIMALS + 1):
+        if np.array_equal(np.round(values, decimals), values, equal_nan=True):
+            if np.array_equal(np.round(restored, decimals), values, equal_nan=True):
+                return {'dtype': 'float32', 'decimals': decimals}
+            break
+    return {'dtype': 'float64'}
+
+
+def _new_version_id():
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}"
+
+
+def write_store(frame, store_path, source=None, keep_versions=KEEP_VERSIONS):
+    """
+    Write a frame as a new store version and make it current.
+    The version directory is completed before CURRENT is switched to it with an
+    atomic rename; older versions beyond keep_versions are removed afterwards.
+    """
+    frame = frame[COLUMNS].dropna(subset=['Year', 'Location', 'WQI'])
+    categories = {column: sorted(frame[column].astype(str).unique().tolist()) for column in CATEGORY_COLUMNS}
+
+    # Order rows by Year so every partition is one contiguous row range
+    years = frame['Year'].to_numpy(dtype=STORE_DTYPES['Year'])
+    order = np.argsort(years, kind='stable')
+    frame = frame.iloc[order]
+    years = years[order]
+
+    version = _new_version_id()
+    versions_dir = os.path.join(store_path, VERSIONS_DIRNAME)
+    tmp_dir = os.path.join(versions_dir, f'{version}.tmp')
+    os.makedirs(tmp_dir)
+
+    columns = {}
+    layouts = {}
+    for column in COLUMNS:
+        if column in CATEGORY_COLUMNS:
+            codes = pd.Categorical(frame[column].astype(str), categories=categories[column]).codes
+            columns[column] = codes.astype(_code_dtype(len(categories[column])))
+            layouts[column] = {'dtype': 'category', 'categories': categories[column]}
+        elif column in MEASUREMENT_COLUMNS:
+            layouts[column] = _float32_layout(frame[column].to_numpy(dtype=np.float64))
+            columns[column] = frame[column].to_numpy(dtype=layouts[column]['dtype'])
+        else:
+            columns[column] = frame[column].to_numpy(dtype=STORE_DTYPES[column])
+            layouts[column] = {'dtype': STORE_DTYPES[column]}
+        np.save(os.path.join(tmp_dir, f'{column}.npy'), np.ascontiguousarray(columns[column]))
+
+    partitions = []
+    unique_years, starts = np.unique(years, return_index=True)
+    stops = list(starts[1:]) + [len(years)]
+    for year, start, stop in zip(unique_years, starts, stops):
+        stats = {}
+        for column in STORE_DTYPES:
+            # Statistics of the source values, so pruning never drops a row float32 rounded down
+            values = frame[column].to_numpy(dtype=np.float64)[start:stop]
+            stats[column] = {'min': float(np.nanmin(values)), 'max': float(np.nanmax(values))}
+        partitions.append({
+            'year': int(year),
+            'start': int(start),
+            'stop': int(stop),
+            'rows': int(stop - start),
+            'stats': stats
+        })
+
+    manifest = {
+        'format_version': STORE_FORMAT_VERSION,
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'source': source or {},
+        'row_count': int(len(frame)),
+        'columns': layouts,
+        'partitions': partitions
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Publish: finished directory first, then the pointer
+    os.rename(tmp_dir, os.path.join(versions_dir, version))
+    pointer_tmp = os.path.join(store_path, f'{CURRENT_FILENAME}.tmp-{os.getpid()}')
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(store_path, CURRENT_FILENAME))
+
+    _prune_versions(versions_dir, version, keep_versions)
+    return manifest
+
+
+def _prune_versions(versions_dir, current, keep_versions):
+    """Remove all but the newest keep_versions complete versions (never the current one)"""
+    versions = sorted(name for name in os.listdir(versions_dir) if not name.endswith('.tmp'))
+    for name in versions[:-keep_versions] if keep_versions > 0 else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+def import_csv(csv_path, store_path):
+    """Convert the river CSV into a new store version"""
+    stat = os.stat(csv_path)
+    frame = pd.read_csv(csv_path, usecols=COLUMNS)
+    return write_store(frame, store_path, source={
+        'path': os.path.abspath(csv_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size
+    })
+
+
+def current_pointer_path(store_path):
+    return os.path.join(store_path, CURRENT_FILENAME)
+
+
+def store_exists(store_path):
+    return os.path.isfile(current_pointer_path(store_path))
+
+
+def source_changed(source, csv_path):
+    """
+    Whether the CSV a store version was imported from (its manifest 'source') has
+    been modified since; False when the store came from another file or none
+    """
+    if not source or source.get('path') != os.path.abspath(csv_path) or not os.path.isfile(csv_path):
+        return False
+    stat = os.stat(csv_path)
+    return (stat.st_mtime_ns, stat.st_size) != (source.get('mtime_ns'), source.get('size'))
+
+
+class ColumnarStore:
+    """Read access to the current version of a store written by write_store"""
+
+    def __init__(self, store_path):
+        self.path = store_path
+        with open(current_pointer_path(store_path)) as f:
+            self.version = f.read().strip()
+        self.version_path = os.path.join(store_path, VERSIONS_DIRNAME, self.version)
+
+        with open(os.path.join(self.version_path, MANIFEST_FILENAME)) as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format_version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported store format: {self.manifest.get('format_version')}")
+
+        self.columns = self.manifest['columns']
+        self.partitions = self.manifest['partitions']
+
+    @property
+    def years(self):
+        return [partition['year'] for partition in self.partitions]
+
+    @property
+    def latest_year(self):
+        return max(self.years) if self.partitions else None
+
+    def select_partitions(self, years=None, ranges=None):
+        """
+        Partitions matching the given years and whose min/max statistics overlap
+        every (low, high) bound in ranges, e.g. {'BOD': (15, None)}
+        """
+        selected = []
+        for partition in self.partitions:
+            if years is not None and partition['year'] not in years:
+                continue
+            overlaps = True
+            for column, (low, high) in (ranges or {}).items():
+                stats = partition['stats'].get(column)
+                if stats is None:
+                    continue
+                if (low is not None and stats['max'] < low) or (high is not None and stats['min'] > high):
+                    overlaps = False
+                    break
+            if overlaps:
+                selected.append(partition)
+        return selected
+
+    def read_columns(self, columns=None, years=None, ranges=None, mmap_mode=None):
+        """
+        Dict of column arrays (categoricals as pd.Categorical) for the selected partitions.
+        With mmap_mode='r' numeric columns are read-only memory maps of the store files
+        whenever the selected partitions form one contiguous row range, so every
+        process mapping the same version shares the same page-cache pages.
+        """
+        columns = list(columns or COLUMNS)
+        partitions = self.select_partitions(years, ranges)
+        row_slices = [(p['start'], p['stop']) for p in partitions]
+
+        # Merge adjacent partitions into as few slices as possible
+        merged = []
+        for start, stop in row_slices:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], stop)
+            else:
+                merged.append((start, stop))
+
+        result = {}
+        for column in columns:
+            mapped = np.load(os.path.join(self.version_path, f'{column}.npy'), mmap_mode='r')
+            if len(merged) == 1:
+                values = mapped[merged[0][0]:merged[0][1]]
+            elif merged:
+                values = np.concatenate([mapped[start:stop] for start, stop in merged])
+            else:
+                values = mapped[:0]
+            if mmap_mode is None or len(merged) > 1:
+                values = np.array(values)
+
+            info = self.columns[column]
+            if info['dtype'] == 'category':
+                values = pd.Categorical.from_codes(np.asarray(values), categories=info['categories'])
+            result[column] = values
+        return result
+
+    def read_frame(self, columns=None, years=None, ranges=None):
+        """
+        Plain, writable DataFrame with the same dtypes and values read_csv would
+        produce (float32 measurements are rounded back to their source decimals)
+        """
+        data = self.read_columns(columns, years, ranges)
+        frame_columns = {}
+        for column, values in data.items():
+            if isinstance(values, pd.Categorical):
+                frame_columns[column] = np.asarray(values, dtype=object)
+            elif column == 'Year':
+                frame_columns[column] = np.asarray(values, dtype=np.int64)
+            else:
+                values = np.asarray(values, dtype=np.float64)
+                decimals = self.columns[column].get('decimals')
+                frame_columns[column] = np.round(values, decimals) if decimals is not None else values
+        return pd.DataFrame(frame_columns)
+
+    @property
+    def source(self):
+        """The manifest record of the CSV this version was imported from (may be empty)"""
+        return self.manifest.get('source') or {}
+
+
+def default_store_path(csv_path):
+    """The store directory offline scripts look for next to the CSV"""
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), DEFAULT_STORE_DIRNAME)
+
+
+def river_data_exists(csv_path, store_path=None):
+    return store_exists(store_path or default_store_path(csv_path)) or os.path.exists(csv_path)
+
+
+def load_river_frame(csv_path, store_path=None):
+    """
+    River data for offline scripts: read from the columnar store next to the CSV
+    when one exists and the CSV has not changed since it was imported, otherwise
+    parse the CSV
+    """
+    if store_path is None:
+        store_path = default_store_path(csv_path)
+    if store_exists(store_path):
+        store = ColumnarStore(store_path)
+        if not source_changed(store.source, csv_path):
+            return store.read_frame()
+        print(f"{csv_path} changed since the store was imported; reading the CSV "
+              f"(run manage.py import_river_csv to refresh the store)")
+    return pd.read_csv(csv_path)
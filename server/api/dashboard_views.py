@@ -1,84 +1,85 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-import pandas as pd
-import os
-from django.conf import settings
 import json
 from datetime import datetime
 import numpy as np
+from .dataset import get_river_dataset, get_dataset_path, source_value
+from .rules import get_rule_engine
 
 @api_view(['GET'])
 def get_dashboard_stats(request):
     """Get real-time dashboard statistics from CSV file"""
     try:
-        # Path to CSV file
-        csv_path = os.path.join(settings.BASE_DIR, 'mithi_river_data.csv')
-        
-        if not os.path.exists(csv_path):
+        # Shared, already-parsed dataset (CSV is only re-read when it changes)
+        try:
+            dataset = get_river_dataset()
+        except FileNotFoundError:
             return Response({
                 'error': 'CSV file not found',
-                'path': csv_path
+                'path': get_dataset_path()
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Read CSV file
-        df = pd.read_csv(csv_path)
+        cube = dataset.cube
+        rules = get_rule_engine()
         
         # Get latest year data (most recent)
-        latest_year = df['Year'].max()
-        latest_data = df[df['Year'] == latest_year]
+        latest_year = dataset.latest_year
+        latest_data = dataset.latest_data
         
-        # Calculate current statistics
+        # Calculate current statistics from the precomputed aggregate cube
+        stats = cube.summary(latest_year)
         current_stats = {
             'temperature': {
-                'value': round(latest_data['Temp'].mean(), 1),
+                'value': round(stats['Temp']['mean'], 1),
                 'unit': '°C',
-                'status': get_temp_status(latest_data['Temp'].mean())
+                'status': rules.status('Temp', stats['Temp']['mean'])
             },
             'ph': {
-                'value': round(latest_data['pH'].mean(), 1),
+                'value': round(stats['pH']['mean'], 1),
                 'unit': '',
-                'status': get_ph_status(latest_data['pH'].mean())
+                'status': rules.status('pH', stats['pH']['mean'])
             },
             'dissolved_oxygen': {
-                'value': round(latest_data['DO'].mean(), 1),
+                'value': round(stats['DO']['mean'], 1),
                 'unit': 'mg/L',
-                'status': get_do_status(latest_data['DO'].mean())
+                'status': rules.status('DO', stats['DO']['mean'])
             },
             'tds': {
-                'value': int(latest_data['TDS'].mean()),
+                'value': int(stats['TDS']['mean']),
                 'unit': 'ppm',
-                'status': get_tds_status(latest_data['TDS'].mean())
+                'status': rules.status('TDS', stats['TDS']['mean'])
             },
             'bod': {
-                'value': round(latest_data['BOD'].mean(), 1),
+                'value': round(stats['BOD']['mean'], 1),
                 'unit': 'mg/L',
-                'status': get_bod_status(latest_data['BOD'].mean())
+                'status': rules.status('BOD', stats['BOD']['mean'])
             },
             'cod': {
-                'value': round(latest_data['COD'].mean(), 1),
+                'value': round(stats['COD']['mean'], 1),
                 'unit': 'mg/L',
-                'status': get_cod_status(latest_data['COD'].mean())
+                'status': rules.status('COD', stats['COD']['mean'])
             }
         }
         
         # Water Quality Index distribution
-        wqi_counts = latest_data['WQI'].value_counts()
+        total_samples = cube.samples(latest_year)
         wqi_distribution = [
-            {'name': category, 'value': count, 'percentage': round((count/len(latest_data))*100, 1)}
-            for category, count in wqi_counts.items()
+            {'name': category, 'value': count, 'percentage': round((count/total_samples)*100, 1)}
+            for category, count in cube.wqi_distribution(latest_year).items()
         ]
         
         # Location-wise pollution data
         location_stats = []
-        for location in df['Location'].unique():
-            loc_data = latest_data[latest_data['Location'] == location]
-            if len(loc_data) > 0:
+        for location in dataset.locations:
+            samples = cube.samples(latest_year, location)
+            if samples > 0:
+                loc_stats = cube.summary(latest_year, location)
                 location_stats.append({
                     'location': location,
-                    'pollution_level': int(loc_data['BOD'].mean() + loc_data['COD'].mean()/10),
-                    'samples': len(loc_data),
-                    'wqi': loc_data['WQI'].mode().iloc[0] if len(loc_data) > 0 else 'Poor'
+                    'pollution_level': int(loc_stats['BOD']['mean'] + loc_stats['COD']['mean']/10),
+                    'samples': samples,
+                    'wqi': cube.wqi_mode(latest_year, location)
                 })
         
         # Trend data (last 7 days simulation using recent samples)
@@ -86,9 +87,9 @@ def get_dashboard_stats(request):
         
         # Dataset info
         dataset_info = {
-            'total_records': len(df),
-            'locations': df['Location'].nunique(),
-            'year_range': f"{df['Year'].min()} - {df['Year'].max()}",
+            'total_records': len(dataset),
+            'locations': len(dataset.locations),
+            'year_range': f"{min(cube.years)} - {max(cube.years)}",
             'latest_year': int(latest_year),
             'parameters': ['Temperature', 'pH', 'DO', 'TDS', 'BOD', 'COD', 'WQI']
         }
@@ -114,12 +115,11 @@ def get_dashboard_stats(request):
 def get_latest_readings(request):
     """Get latest sensor readings from CSV"""
     try:
-        csv_path = os.path.join(settings.BASE_DIR, 'mithi_river_data.csv')
-        df = pd.read_csv(csv_path)
+        dataset = get_river_dataset()
         
         # Get most recent readings (simulate real-time by sampling from latest year)
-        latest_year = df['Year'].max()
-        latest_samples = df[df['Year'] == latest_year].sample(n=min(10, len(df[df['Year'] == latest_year])))
+        latest_data = dataset.latest_data
+        latest_samples = latest_data.sample(n=min(10, len(latest_data)))
         
         readings = []
         for _, row in latest_samples.iterrows():
@@ -127,14 +127,14 @@ def get_latest_readings(request):
                 'id': len(readings) + 1,
                 'location': row['Location'],
                 'timestamp': datetime.now().isoformat(),
-                'temperature': row['Temp'],
-                'ph': row['pH'],
-                'dissolved_oxygen': row['DO'],
-                'tds': row['TDS'],
-                'bod': row['BOD'],
-                'cod': row['COD'],
+                'temperature': source_value(row['Temp']),
+                'ph': source_value(row['pH']),
+                'dissolved_oxygen': source_value(row['DO']),
+                'tds': source_value(row['TDS']),
+                'bod': source_value(row['BOD']),
+                'cod': source_value(row['COD']),
                 'wqi': row['WQI'],
-                'year': row['Year']
+                'year': int(row['Year'])
             })
         
         return Response({
@@ -149,56 +149,6 @@ def get_latest_readings(request):
             'success': False
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-def get_temp_status(temp):
-    if 20 <= temp <= 30:
-        return {'category': 'optimal', 'color': 'green', 'message': 'Optimal'}
-    elif temp < 20:
-        return {'category': 'cool', 'color': 'blue', 'message': 'Cool'}
-    else:
-        return {'category': 'warm', 'color': 'orange', 'message': 'Warm'}
-
-def get_ph_status(ph):
-    if 6.5 <= ph <= 8.5:
-        return {'category': 'normal', 'color': 'green', 'message': 'Normal Range'}
-    elif ph < 6.5:
-        return {'category': 'acidic', 'color': 'red', 'message': 'Acidic'}
-    else:
-        return {'category': 'alkaline', 'color': 'orange', 'message': 'Alkaline'}
-
-def get_do_status(do):
-    if do >= 6:
-        return {'category': 'excellent', 'color': 'green', 'message': 'Excellent'}
-    elif do >= 4:
-        return {'category': 'good', 'color': 'blue', 'message': 'Good'}
-    else:
-        return {'category': 'low', 'color': 'red', 'message': 'Low'}
-
-def get_tds_status(tds):
-    if tds <= 300:
-        return {'category': 'excellent', 'color': 'green', 'message': 'Excellent'}
-    elif tds <= 600:
-        return {'category': 'good', 'color': 'blue', 'message': 'Good'}
-    elif tds <= 900:
-        return {'category': 'fair', 'color': 'orange', 'message': 'Fair'}
-    else:
-        return {'category': 'poor', 'color': 'red', 'message': 'Poor'}
-
-def get_bod_status(bod):
-    if bod <= 3:
-        return {'category': 'excellent', 'color': 'green', 'message': 'Excellent'}
-    elif bod <= 6:
-        return {'category': 'good', 'color': 'blue', 'message': 'Good'}
-    else:
-        return {'category': 'poor', 'color': 'red', 'message': 'High'}
-
-def get_cod_status(cod):
-    if cod <= 50:
-        return {'category': 'good', 'color': 'green', 'message': 'Good'}
-    elif cod <= 100:
-        return {'category': 'moderate', 'color': 'orange', 'message': 'Moderate'}
-    else:
-        return {'category': 'poor', 'color': 'red', 'message': 'High'}
-
 def generate_trend_data(latest_data):
     """Generate 7-day trend data from recent samples"""
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
@@ -216,12 +166,12 @@ def generate_trend_data(latest_data):
             trend_data.append({
                 'day': day,
                 'wqi': max(20, min(100, int(wqi_numeric + np.random.normal(0, 5)))),
-                'ph': round(max(5, min(9, sample['pH'] + variation)), 1),
-                'temperature': round(max(15, min(40, sample['Temp'] + variation)), 1),
-                'do': round(max(1, min(12, sample['DO'] + variation)), 1),
+                'ph': round(max(5, min(9, float(sample['pH']) + variation)), 1),
+                'temperature': round(max(15, min(40, float(sample['Temp']) + variation)), 1),
+                'do': round(max(1, min(12, float(sample['DO']) + variation)), 1),
                 'tds': max(50, min(5000, int(sample['TDS'] + np.random.normal(0, 100)))),
-                'bod': round(max(1, min(25, sample['BOD'] + variation)), 1),
-                'cod': round(max(10, min(300, sample['COD'] + np.random.normal(0, 10))), 1)
+                'bod': round(max(1, min(25, float(sample['BOD']) + variation)), 1),
+                'cod': round(max(10, min(300, float(sample['COD']) + np.random.normal(0, 10))), 1)
             })
     
     return trend_data
\ No newline at end of file
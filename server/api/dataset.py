@@ -0,0 +1,194 @@
+"""
+Mithi River Dataset Loader
+Loads the river history once per process into typed columns (from the columnar
+store when one has been imported, otherwise from mithi_river_data.csv) and shares
+the resulting read-only frame with every dashboard view. A store whose source CSV
+has been modified since the import is re-imported before it is read.
+"""
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .aggregates import AggregateCube
+from .columnar_store import (
+    COLUMNS, MEASUREMENT_COLUMNS, CATEGORY_COLUMNS, DEFAULT_STORE_DIRNAME,
+    ColumnarStore, current_pointer_path, import_csv, source_changed, store_exists
+)
+
+DATASET_FILENAME = 'mithi_river_data.csv'
+
+# Compact dtypes used for every column we keep in memory
+COLUMN_DTYPES = {
+    'Year': 'int16',
+    'Location': 'category',
+    'WQI': 'category',
+    **{column: 'float32' for column in MEASUREMENT_COLUMNS}
+}
+
+
+def get_dataset_path():
+    """Location of the river CSV (overridable with the MITHI_RIVER_DATA_PATH setting)"""
+    return str(getattr(settings, 'MITHI_RIVER_DATA_PATH', os.path.join(settings.BASE_DIR, DATASET_FILENAME)))
+
+
+def get_store_path():
+    """Location of the columnar store (overridable with the MITHI_RIVER_STORE_PATH setting)"""
+    return str(getattr(settings, 'MITHI_RIVER_STORE_PATH', os.path.join(settings.BASE_DIR, DEFAULT_STORE_DIRNAME)))
+
+
+def file_signature(path):
+    """(mtime, size) pair used to decide whether the file must be parsed again"""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def build_frame(columns):
+    """
+    Wrap typed column arrays in a DataFrame without copying them.
+    Numeric arrays are flagged read-only so a view can never mutate the shared data.
+    """
+    frame_columns = {}
+    for name in COLUMNS:
+        values = columns[name]
+        if isinstance(values, np.ndarray):
+            values.setflags(write=False)
+        frame_columns[name] = values
+    return pd.DataFrame(frame_columns, copy=False)
+
+
+def read_river_csv(path):
+    """Parse the river CSV into a dict of typed column arrays"""
+    raw = pd.read_csv(path, usecols=COLUMNS, dtype=COLUMN_DTYPES)
+
+    columns = {}
+    for name in COLUMNS:
+        if name in CATEGORY_COLUMNS:
+            columns[name] = raw[name].array
+        else:
+            columns[name] = np.ascontiguousarray(raw[name].to_numpy(dtype=COLUMN_DTYPES[name]))
+    return columns
+
+
+def source_value(value):
+    """The float read_csv gives for a float32 measurement (its shortest decimal form, NaN when missing)"""
+    return float(str(np.float32(value)))
+
+
+def use_memory_map():
+    """Whether store columns are memory-mapped (MITHI_RIVER_STORE_MMAP setting)"""
+    return bool(getattr(settings, 'MITHI_RIVER_STORE_MMAP', False))
+
+
+def read_river_store(store):
+    """
+    Read every column and partition of a ColumnarStore's current version.
+    With memory mapping enabled the numeric columns stay backed by the store files,
+    so all worker processes share one copy of the data in the OS page cache.
+    """
+    columns = store.read_columns(mmap_mode='r' if use_memory_map() else None)
+    for name in MEASUREMENT_COLUMNS:
+        # Columns too precise for float32 are stored as float64; keep the in-memory dtypes uniform
+        if columns[name].dtype != COLUMN_DTYPES[name]:
+            columns[name] = columns[name].astype(COLUMN_DTYPES[name])
+    return columns
+
+
+def appended_rows(frame, previous):
+    """
+    Number of leading rows of frame identical to the previous snapshot's frame
+    when frame only adds rows after them, else None (e.g. rows were edited, or a
+    new location or WQI category changed a column's categories)
+    """
+    n = len(previous)
+    if len(frame) < n or list(frame.columns) != list(previous.frame.columns):
+        return None
+    if not frame.iloc[:n].reset_index(drop=True).equals(previous.frame.reset_index(drop=True)):
+        return None
+    return n
+
+
+class RiverDataset:
+    """Immutable snapshot of the river history shared by all requests in a worker"""
+
+    def __init__(self, frame, path, signature, previous=None, source=None):
+        self.frame = frame
+        self.path = path
+        self.signature = signature
+        # Manifest record of the CSV a store snapshot was imported from
+        self.source = source or {}
+
+        # Values every dashboard endpoint needs, computed once per snapshot
+        self.locations = [str(location) for location in frame['Location'].unique()]
+        self.latest_year = int(frame['Year'].max()) if len(frame) > 0 else None
+        self.latest_data = self._rows_for_year(self.latest_year)
+
+        # Per-year / per-location statistics answered by lookup instead of scans. When
+        # the source only gained rows, the previous snapshot's cube is extended with them
+        appended_from = appended_rows(frame, previous) if previous is not None else None
+        if appended_from is not None:
+            self.cube = previous.cube.copy()
+            self.cube.add_frame(frame.iloc[appended_from:])
+        else:
+            self.cube = AggregateCube.from_frame(frame, MEASUREMENT_COLUMNS)
+
+    def _rows_for_year(self, year):
+        """Rows of one year; a zero-copy slice when they are contiguous (always true for the store)"""
+        positions = np.flatnonzero(self.frame['Year'].to_numpy() == year)
+        if len(positions) > 0 and positions[-1] - positions[0] + 1 == len(positions):
+            return self.frame.iloc[positions[0]:positions[-1] + 1]
+        return self.frame.iloc[positions]
+
+    def __len__(self):
+        return len(self.frame)
+
+
+_dataset_lock = threading.Lock()
+_current_dataset = None
+
+
+def get_river_dataset():
+    """
+    Return the shared dataset snapshot.
+    The source (columnar store if imported, otherwise the CSV) is read only on first
+    use and whenever its mtime or size changes, and a store is re-imported first when
+    the CSV it came from has changed; raises FileNotFoundError if neither exists.
+    """
+    global _current_dataset
+
+    store_path = get_store_path()
+    csv_path = get_dataset_path()
+    if store_exists(store_path):
+        path = store_path
+        signature = file_signature(current_pointer_path(store_path))
+    else:
+        path = csv_path
+        signature = file_signature(path)
+
+    dataset = _current_dataset
+    if (dataset is not None and dataset.path == path and dataset.signature == signature
+            and not source_changed(dataset.source, csv_path)):
+        return dataset
+
+    with _dataset_lock:
+        # Another thread may have reloaded while we waited for the lock
+        dataset = _current_dataset
+        if (dataset is None or dataset.path != path or dataset.signature != signature
+                or source_changed(dataset.source, csv_path)):
+            previous = dataset if dataset is not None and dataset.path == path else None
+            if path == store_path:
+                store = ColumnarStore(store_path)
+                if source_changed(store.source, csv_path):
+                    print(f"{csv_path} changed since the store was imported; re-importing it")
+                    import_csv(csv_path, store_path)
+                    # Stat the pointer before opening, so a concurrent refresh is picked up next time
+                    signature = file_signature(current_pointer_path(store_path))
+                    store = ColumnarStore(store_path)
+                dataset = RiverDataset(build_frame(read_river_store(store)), path, signature, previous, store.source)
+            else:
+                dataset = RiverDataset(build_frame(read_river_csv(path)), path, signature, previous)
+            _current_dataset = dataset
+            print(f"Loaded river dataset: {len(dataset)} records from {path}")
+
+    return dataset
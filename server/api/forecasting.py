@@ -0,0 +1,508 @@
+"""
+Water quality forecasting models
+The trend models behind PredictiveAnalytics.forecast_trends are trained offline
+(`manage.py train_forecast_models`) and published as versions of an artifact
+store (model_artifacts) next to the ML models, in MITHI_ML_MODEL_DIR. Every
+process loads the current version once - at startup when MITHI_ML_PRELOAD is set -
+so no request trains anything, and all AIEngine instances share the same models.
+
+An optional background job (MITHI_FORECAST_RETRAIN_HOURS) retrains on a fresh
+history, publishes a new version and swaps it in with one reference assignment,
+like the ML model registry. Until a version has been published, forecasts fail
+with ForecastModelsUnavailable (a 503 for the API) rather than training inline.
+
+The models are seasonal trend fits (seasonal_forecast.SeasonalModel): a linear
+trend plus yearly and weekly Fourier terms, solved in closed form, with prediction
+intervals from the residual and coefficient uncertainty. Besides the network-wide
+model there is one per monitoring station; a forecast of any horizon is one
+design matrix and one matrix multiply.
+
+Readings ingested into the readings store are folded into the serving models by
+recursive least squares as they arrive (ForecastRegistry.observe, once models are
+loaded), so forecasts in the ingesting process reflect them at once and the
+forecast horizon moves forward with them (never past today). Like the training
+history, readings enter the models as one row per day: the daily mean over all
+stations for the network model, and per station for the station models; a day's
+row is replaced (downdate, then update) as more of its readings arrive. Other
+processes see them at their next refit, which trains on the history plus the
+stored readings. Full refits otherwise only happen when a model drifts - its new
+readings keep missing the prediction intervals - and then use the most recent
+REFIT_WINDOW_DAYS days with data, so the old regime ages out; a window without
+two yearly cycles keeps the current models.
+"""
+
+import copy
+import os
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .model_artifacts import ArtifactError, current_version, load_artifacts, store_exists, write_artifacts
+from .historical_data import DEFAULT_END, DEFAULT_SEED, DEFAULT_START, generate_history
+from .seasonal_forecast import DEFAULT_INTERVAL_LEVEL, SeasonalModel, seasonal_feature_names
+
+FORECAST_TARGETS = ['ph', 'tds', 'bod', 'cod']
+DEFAULT_FORECAST_DIRNAME = 'mithi_forecast_store'
+# The dataset's monitoring locations (as in interpolation.DEFAULT_STATION_COORDINATES)
+DEFAULT_FORECAST_STATIONS = ['Powai', 'Saki Naka', 'Kurla', 'Bandra', 'Mahim']
+# Longest horizon a single forecast may cover (ten years of days)
+MAX_FORECAST_DAYS = 3650
+# Days with data (history plus readings) a refit uses, the most recent ones
+REFIT_WINDOW_DAYS = 730
+# Fewest days with data a refit needs to pin down the yearly terms (two cycles);
+# a station with fewer keeps training on its offline history
+MIN_REFIT_DAYS = 730
+
+# Readings store columns of the forecast targets
+READING_TARGET_COLUMNS = {'pH': 'ph', 'TDS': 'tds', 'BOD': 'bod', 'COD': 'cod'}
+
+TRAIN_COMMAND_HINT = 'run `python manage.py train_forecast_models` to publish them'
+
+
+class ForecastModelsUnavailable(Exception):
+    """Raised when no usable forecast version has been published yet"""
+
+
+def get_forecast_store_path():
+    """Forecast artifact store in MITHI_ML_MODEL_DIR (the working directory without Django settings)"""
+    try:
+        from django.conf import settings
+        model_dir = str(getattr(settings, 'MITHI_ML_MODEL_DIR', settings.BASE_DIR)) if settings.configured else os.getcwd()
+    except ImportError:
+        model_dir = os.getcwd()
+    return os.path.join(model_dir, DEFAULT_FORECAST_DIRNAME)
+
+
+def _fit(history, origin):
+    """SeasonalModel and {target: metrics} for one history frame"""
+    values = history[FORECAST_TARGETS].to_numpy(dtype=float)
+    model = SeasonalModel.fit(history['date'], values, FORECAST_TARGETS, origin=origin)
+    r2 = model.r2(history['date'], values)
+    metrics = {
+        target: {'r2': float(r2[i]), 'residual_sd': float(model.sigma[i])}
+        for i, target in enumerate(FORECAST_TARGETS)
+    }
+    return model, metrics
+
+
+def train_forecast_models(history, station_history=None):
+    """
+    Fit the seasonal trend model on a history frame (date plus target columns),
+    and one per station on station_history (with a station column) when given.
+    Returns (artifacts, metrics) ready for write_artifacts.
+    """
+    start_date = history['date'].min()
+    model, metrics = _fit(history, start_date)
+
+    station_models, station_metrics = {}, {}
+    if station_history is not None:
+        for station, frame in station_history.groupby('station', sort=False):
+            station_model, station_metrics[station] = _fit(frame, start_date)
+            station_models[station] = station_model.to_arrays()
+
+    artifacts = {
+        'forecast_seasonal': model.to_arrays(),
+        'forecast_station_seasonal': station_models,
+        'forecast_calendar': {
+            'start_date': start_date.isoformat(),
+            'last_date': history['date'].max().isoformat(),
+            'rows': int(len(history)),
+            'stations': list(station_models)
+        }
+    }
+    return artifacts, {'network': metrics, 'stations': station_metrics}
+
+
+def publish_forecast_models(store_path, history, station_history=None):
+    """Train on history and publish the models as a new current version; returns the manifest"""
+    artifacts, metrics = train_forecast_models(history, station_history)
+    return write_artifacts(store_path, artifacts, feature_columns={'forecast': seasonal_feature_names()}, metrics=metrics)
+
+
+def default_history():
+    """The synthetic history PredictiveAnalytics has always trained on"""
+    return generate_history(DEFAULT_START, DEFAULT_END, freq='D', seed=DEFAULT_SEED)
+
+
+def default_station_history():
+    """Synthetic per-station history over the same period"""
+    return generate_history(DEFAULT_START, DEFAULT_END, freq='D', stations=DEFAULT_FORECAST_STATIONS,
+                            seed=DEFAULT_SEED + 1)
+
+
+def readings_history(readings):
+    """
+    History frame (station, date, targets) from readings store rows (station,
+    timestamp, pH, TDS, BOD, COD); readings missing any target are dropped
+    """
+    frame = readings.rename(columns=dict(READING_TARGET_COLUMNS, timestamp='date'))
+    frame = frame[['station', 'date'] + FORECAST_TARGETS].dropna(subset=FORECAST_TARGETS)
+    dates = pd.to_datetime(frame['date'], utc=True).dt.tz_localize(None)
+    return frame.assign(date=dates, **{target: frame[target].astype(np.float64) for target in FORECAST_TARGETS})
+
+
+def utc_today():
+    """Today's date (UTC midnight, tz-naive like the history dates)"""
+    return pd.Timestamp.now(tz='UTC').tz_localize(None).normalize()
+
+
+def past_readings(readings):
+    """Readings up to now; anything dated later (a sensor clock ahead) is skipped"""
+    return readings[readings['date'] <= pd.Timestamp.now(tz='UTC').tz_localize(None)]
+
+
+def daily_means(readings, per_station=False):
+    """One row per day (per station and day with per_station) holding each target's mean"""
+    keys = ['station', 'date'] if per_station else ['date']
+    frame = readings.assign(date=readings['date'].dt.normalize())
+    return frame.groupby(keys, sort=True)[FORECAST_TARGETS].mean().reset_index()
+
+
+def with_daily_readings(history, daily, keys):
+    """History with the days daily covers replaced by daily's rows, ordered by date"""
+    combined = pd.concat([history[keys + FORECAST_TARGETS], daily], ignore_index=True)
+    combined = combined.drop_duplicates(subset=keys, keep='last')
+    return combined.sort_values('date', kind='stable', ignore_index=True)
+
+
+def latest_days(frame, n_days):
+    """Rows of the frame's n_days most recent days with data (not calendar days)"""
+    days = np.sort(frame['date'].unique())
+    if len(days) <= n_days:
+        return frame
+    return frame[frame['date'] >= days[-n_days]]
+
+
+def stored_readings_history(window_days=REFIT_WINDOW_DAYS):
+    """
+    Readings of the live readings store's last window_days days (up to its newest
+    partition), or None without Django settings
+    """
+    try:
+        from django.conf import settings
+        if not settings.configured:
+            return None
+    except ImportError:
+        return None
+    from .readings_store import get_reading_store
+
+    store = get_reading_store()
+    days = store.partitions()
+    if not days:
+        return None
+    first_day = (pd.Timestamp(days[-1]) - pd.Timedelta(days=window_days)).strftime('%Y-%m-%d')
+    frames = [store.read_partition(day) for day in days if day >= first_day]
+    if not frames:
+        return None
+    return readings_history(pd.concat(frames, ignore_index=True))
+
+
+class ForecastBundle:
+    """
+    One version of the forecasting models. Never modified after loading: readings
+    are added by building an updated copy (see updated)
+    """
+
+    def __init__(self, artifacts, manifest):
+        if 'xty' not in artifacts.get('forecast_seasonal', {}):
+            raise ArtifactError(f"Forecast version {manifest['version']} predates the updatable seasonal models")
+        self.model = SeasonalModel.from_arrays(artifacts['forecast_seasonal'])
+        self.station_models = {station: SeasonalModel.from_arrays(arrays)
+                               for station, arrays in artifacts['forecast_station_seasonal'].items()}
+        calendar = artifacts['forecast_calendar']
+        self.start_date = pd.Timestamp(calendar['start_date'])
+        self.last_date = pd.Timestamp(calendar['last_date'])
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.loaded_at = datetime.now().isoformat()
+        self.observed_readings = 0
+        # Per model (None for the network one): {day: (target sums, readings)} of the
+        # readings added since loading, and (day, drift, updates) from before the
+        # latest day was added
+        self.daily_totals = {}
+        self.open_days = {}
+
+    @property
+    def stations(self):
+        return list(self.station_models)
+
+    @property
+    def drifted(self):
+        return self.model.drifted or any(model.drifted for model in self.station_models.values())
+
+    def updated(self, readings):
+        """
+        Copy with readings (a readings_history frame) added as daily means: one row
+        per day to the network model and one per day to each station's model;
+        readings of other stations only update the network model. A day that
+        already has a row (from an earlier call) gets it replaced by the mean of
+        all its readings, so the batches a day arrives in do not matter. Readings
+        dated in the future are skipped.
+        """
+        bundle = copy.copy(self)
+        readings = past_readings(readings)
+        if len(readings) == 0:
+            return bundle
+
+        bundle.daily_totals = dict(self.daily_totals)
+        bundle.open_days = dict(self.open_days)
+        bundle.model = bundle._add_days(None, self.model, readings)
+        bundle.station_models = dict(self.station_models)
+        for station, frame in readings.groupby('station', sort=False):
+            if station in self.station_models:
+                bundle.station_models[station] = bundle._add_days(station, self.station_models[station], frame)
+        # Forecasts start the day after the latest reading, and never later than tomorrow
+        bundle.last_date = min(max(self.last_date, readings['date'].max().normalize()), utc_today())
+        bundle.observed_readings = self.observed_readings + len(readings)
+        return bundle
+
+    def _add_days(self, key, model, readings):
+        """
+        model with the daily means of readings added, replacing (downdate, then
+        update) the rows of days added before; records the new totals under key
+        """
+        grouped = readings.assign(date=readings['date'].dt.normalize()).groupby('date', sort=True)
+        sums = grouped[FORECAST_TARGETS].sum()
+        counts = grouped.size()
+
+        totals = dict(self.daily_totals.get(key, {}))
+        replaced_days, replaced_means, means = [], [], []
+        for day, day_sums, count in zip(sums.index, sums.to_numpy(), counts.to_numpy()):
+            if day in totals:
+                old_sums, old_count = totals[day]
+                replaced_days.append(day)
+                replaced_means.append(old_sums / old_count)
+                day_sums, count = old_sums + day_sums, old_count + count
+            totals[day] = (day_sums, count)
+            means.append(day_sums / count)
+        self.daily_totals[key] = totals
+
+        if replaced_days:
+            model = model.removed(pd.DatetimeIndex(replaced_days), np.array(replaced_means))
+            open_day = self.open_days.get(key)
+            if open_day is not None and open_day[0] in replaced_days:
+                # The latest day counts once in the drift statistic, with its final mean
+                model.drift, model.updates = open_day[1], open_day[2]
+
+        means = np.array(means)
+        if len(means) > 1:
+            model = model.updated(sums.index[:-1], means[:-1])
+        self.open_days[key] = (sums.index[-1], model.drift, model.updates)
+        return model.updated(sums.index[-1:], means[-1:])
+
+    def forecast_dates(self, days_ahead):
+        """The days_ahead days following the training history"""
+        if not 1 <= days_ahead <= MAX_FORECAST_DAYS:
+            raise ValueError(f'days_ahead must be between 1 and {MAX_FORECAST_DAYS}')
+        return pd.date_range(start=self.last_date + pd.Timedelta(days=1), periods=days_ahead, freq='D')
+
+    def forecast(self, days_ahead, stations=None, level=DEFAULT_INTERVAL_LEVEL):
+        """
+        (dates, predictions) for the next days_ahead days. predictions is a
+        (mean, half_width) pair of (days x FORECAST_TARGETS) matrices for the
+        network, or {station: pair} when stations are given.
+        """
+        if not 0 < level < 1:
+            raise ValueError('level must be between 0 and 1')
+        dates = self.forecast_dates(days_ahead)
+        if stations is None:
+            return dates, self.model.predict(dates, level)
+
+        unknown = [station for station in stations if station not in self.station_models]
+        if unknown:
+            raise ValueError(f"No forecast models for stations: {', '.join(unknown)}")
+        return dates, {station: self.station_models[station].predict(dates, level) for station in stations}
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'trained_at': self.manifest.get('created_at'),
+            'loaded_at': self.loaded_at,
+            'stations': self.stations,
+            'metrics': self.manifest.get('metrics'),
+            'observed_readings': self.observed_readings,
+            'last_date': self.last_date.strftime('%Y-%m-%d'),
+            'drift': {
+                'network': self.model.drift,
+                'stations': {station: model.drift for station, model in self.station_models.items()}
+            }
+        }
+
+
+class ForecastRegistry:
+    """Current ForecastBundle of this process, loaded once and swapped atomically"""
+
+    def __init__(self, store_path=None, history_source=default_history, station_history_source=default_station_history,
+                 readings_source=stored_readings_history):
+        self._store_path = store_path
+        self._history_source = history_source
+        self._station_history_source = station_history_source
+        self._readings_source = readings_source
+        self._current = None
+        self._lock = threading.Lock()
+        self._retrain_thread = None
+        self._refit_thread = None
+        self.last_error = None
+
+    @property
+    def store_path(self):
+        return self._store_path or get_forecast_store_path()
+
+    def get(self):
+        """
+        Current bundle, loading the published version on first use. Never trains:
+        raises ForecastModelsUnavailable when nothing usable has been published
+        """
+        bundle = self._current
+        if bundle is not None:
+            return bundle
+        with self._lock:
+            if self._current is None:
+                if not store_exists(self.store_path):
+                    raise ForecastModelsUnavailable(f'No forecast models have been published; {TRAIN_COMMAND_HINT}')
+                try:
+                    self._load_locked()
+                except ArtifactError as e:
+                    # e.g. a version from before the current model format
+                    raise ForecastModelsUnavailable(f'{str(e)}; {TRAIN_COMMAND_HINT}')
+            return self._current
+
+    def reload(self):
+        """Load the store's current version and swap it in"""
+        with self._lock:
+            return self._load_locked()
+
+    def _load_locked(self):
+        manifest, artifacts = load_artifacts(self.store_path)
+        bundle = ForecastBundle(artifacts, manifest)
+        # Single reference assignment: forecasts in flight keep the bundle they took
+        self._current = bundle
+        print(f"Forecast models loaded (version {bundle.version})")
+        return bundle
+
+    def _training_histories(self):
+        """
+        (history, station_history) from the sources plus the stored readings as
+        daily means, each limited to its REFIT_WINDOW_DAYS most recent days with
+        data. Raises ValueError when the network window has fewer than
+        MIN_REFIT_DAYS days, so the current models are kept; a station short of
+        them trains on its offline history alone.
+        """
+        history = self._history_source()
+        station_history = self._station_history_source()
+        readings = self._readings_source() if self._readings_source is not None else None
+        if readings is not None:
+            readings = past_readings(readings)
+        if readings is None or len(readings) == 0:
+            return history, station_history
+
+        history = latest_days(with_daily_readings(history, daily_means(readings), ['date']), REFIT_WINDOW_DAYS)
+        if history['date'].nunique() < MIN_REFIT_DAYS:
+            raise ValueError(f"Only {history['date'].nunique()} days of history and readings; "
+                             f"a refit needs {MIN_REFIT_DAYS}")
+
+        combined = with_daily_readings(station_history, daily_means(readings, per_station=True), ['station', 'date'])
+        windows = []
+        for station, frame in combined.groupby('station', sort=False):
+            window = latest_days(frame, REFIT_WINDOW_DAYS)
+            if window['date'].nunique() < MIN_REFIT_DAYS:
+                window = station_history[station_history['station'] == station]
+            if len(window) > 0:
+                windows.append(window)
+        station_history = pd.concat(windows, ignore_index=True) if windows else None
+        return history, station_history
+
+    def retrain(self, history=None, station_history=None):
+        """Train on fresh histories (or the ones given), publish them and swap them in"""
+        if history is None and station_history is None:
+            history, station_history = self._training_histories()
+        history = history if history is not None else self._history_source()
+        station_history = station_history if station_history is not None else self._station_history_source()
+        publish_forecast_models(self.store_path, history, station_history)
+        return self.reload()
+
+    def observe(self, readings):
+        """
+        Add new readings (readings store rows) to the current models by recursive
+        least squares and swap the result in; starts a background refit when a
+        model drifts. Does nothing until models are loaded (the readings reach them
+        with the next refit). Returns the number of readings used.
+        """
+        if self._current is None:
+            return 0
+        readings = readings_history(readings)
+        if len(readings) == 0:
+            return 0
+        with self._lock:
+            previous = self._current
+            bundle = previous.updated(readings)
+            self._current = bundle
+        if bundle.drifted:
+            self._start_refit()
+        return bundle.observed_readings - previous.observed_readings
+
+    def _start_refit(self):
+        """Refit on the recent window in a background thread, unless one is running"""
+        with self._lock:
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return
+
+            def run():
+                print("Forecast models drifted; refitting on recent readings...")
+                try:
+                    self.retrain()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"Forecast refit failed: {str(e)}")
+
+            self._refit_thread = threading.Thread(target=run, name='forecast-refit', daemon=True)
+            self._refit_thread.start()
+
+    def refresh(self):
+        """
+        One background step: if another process already published a newer version,
+        load it; otherwise retrain. Server workers wake at different times, so
+        roughly one of them trains per interval and the rest pick its version up.
+        """
+        bundle = self._current
+        if bundle is not None and store_exists(self.store_path) and current_version(self.store_path) != bundle.version:
+            return self.reload()
+        return self.retrain()
+
+    def start_background_retrain(self, interval_seconds):
+        """Refresh every interval_seconds in a daemon thread (once per process)"""
+        if self._retrain_thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    self.refresh()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"Forecast retraining failed: {str(e)}")
+
+        self._retrain_thread = threading.Thread(target=run, name='forecast-retrain', daemon=True)
+        self._retrain_thread.start()
+
+
+# Shared by every PredictiveAnalytics in this process
+forecast_registry = ForecastRegistry()
+
+
+def start_forecasting_if_configured():
+    """Load the forecast models at startup (MITHI_ML_PRELOAD) and start periodic retraining"""
+    from django.conf import settings
+    if getattr(settings, 'MITHI_ML_PRELOAD', False):
+        try:
+            forecast_registry.get()
+        except ForecastModelsUnavailable as e:
+            forecast_registry.last_error = str(e)
+            print(f"Forecast models not loaded: {str(e)}")
+    retrain_hours = float(getattr(settings, 'MITHI_FORECAST_RETRAIN_HOURS', 0))
+    if retrain_hours > 0:
+        forecast_registry.start_background_retrain(retrain_hours * 3600)
@@ -0,0 +1,60 @@
+"""
+Fused linear regression
+The per-target StandardScaler + LinearRegression pairs are both affine, so each
+target collapses to one coefficient vector and intercept on the raw features:
+
+    ((x - mean) / scale) . coef + intercept
+        = x . (coef / scale) + (intercept - (mean / scale) . coef)
+
+All targets are stacked into one matrix, so predicting every target for a row or
+a whole batch is a single matrix multiply. Results match the sklearn pipeline to
+floating point rounding.
+
+This module has no Django dependency so the training script can use it too.
+"""
+
+import numpy as np
+
+
+class FusedRegression:
+    """Scaler-folded coefficients of several single-target linear regressions"""
+
+    def __init__(self, targets, coef, intercept):
+        self.targets = list(targets)
+        # n_features x n_targets, so X @ coef gives one column per target
+        self.coef = coef
+        self.intercept = intercept
+
+    @classmethod
+    def from_sklearn(cls, models, scalers, targets=None):
+        """Fold {target: StandardScaler} into {target: LinearRegression}"""
+        targets = list(targets or models)
+        columns, intercepts = [], []
+        for target in targets:
+            model, scaler = models[target], scalers[target]
+            coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+            scale = scaler.scale_ if scaler.scale_ is not None else np.ones_like(coef)
+            mean = scaler.mean_ if scaler.mean_ is not None else np.zeros_like(coef)
+            columns.append(coef / scale)
+            intercepts.append(float(model.intercept_) - float(np.dot(mean / scale, coef)))
+        return cls(targets, np.column_stack(columns), np.asarray(intercepts, dtype=np.float64))
+
+    def to_arrays(self):
+        """Plain dict for storing (see from_arrays)"""
+        return {'targets': self.targets, 'coef': self.coef, 'intercept': self.intercept}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['targets'], arrays['coef'], arrays['intercept'])
+
+    def predict(self, X):
+        """Predictions (n_samples x n_targets, in targets order) for raw features"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X @ self.coef + self.intercept
+
+    def predict_dict(self, X):
+        """{target: prediction array}"""
+        predictions = self.predict(X)
+        return {target: predictions[:, i] for i, target in enumerate(self.targets)}
@@ -0,0 +1,65 @@
+"""
+Synthetic water quality history
+Generates demonstration / load-test series with the seasonal (yearly) and weekly
+patterns the AI engine models: every column of every station is computed as a
+whole array from one seeded np.random.Generator, so decades of hourly data take
+no Python-level loops and the same seed always gives the same history.
+
+This module has no Django dependency.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 42
+DEFAULT_START = '2023-01-01'
+DEFAULT_END = '2024-12-31'
+
+# value = base + amplitude * seasonal factor + noise weight * noise, clipped to
+# [lower, upper]; pollution loads also follow the weekly cycle and the station's level
+SERIES_SHAPES = {
+    'ph': {'base': 7.2, 'amplitude': 0.5, 'noise': 1, 'lower': 6.0, 'upper': 9.0},
+    'tds': {'base': 250, 'amplitude': 100, 'load': True, 'noise': 50, 'lower': 50},
+    'bod': {'base': 15, 'amplitude': 10, 'load': True, 'noise': 5, 'lower': 1},
+    'cod': {'base': 30, 'amplitude': 20, 'load': True, 'noise': 10, 'lower': 5},
+}
+NOISE_SD = 0.1
+# Spread of the per-station pollution level multiplier
+STATION_LEVEL_SD = 0.1
+
+
+def generate_history(start=DEFAULT_START, end=DEFAULT_END, freq='D', stations=None, seed=DEFAULT_SEED):
+    """
+    Synthetic readings from start to end (inclusive) at the given pandas frequency.
+    Columns: date, ph, tds, bod, cod, plus station (first) when stations are given;
+    each station gets its own noise and a pollution level multiplier, rows are
+    grouped by station in the order given.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    dates = pd.date_range(start=start, end=end, freq=freq)
+    # Elapsed days (fractional for sub-daily data) drive both cycles
+    days = ((dates - dates[0]) / pd.Timedelta(days=1)).to_numpy(dtype=np.float64)
+    seasonal_factor = 1 + 0.3 * np.sin(2 * np.pi * days / 365)
+    weekly_factor = 1 + 0.1 * np.sin(2 * np.pi * days / 7)
+
+    stations = list(stations) if stations else None
+    station_names = stations or [None]
+    n_steps, n_stations = len(dates), len(station_names)
+    # One noise draw per reading, shared by its parameters (stations x steps)
+    noise = rng.normal(0, NOISE_SD, size=(n_stations, n_steps))
+    levels = (np.ones((n_stations, 1)) if stations is None
+              else 1 + rng.normal(0, STATION_LEVEL_SD, size=(n_stations, 1)))
+
+    columns = {}
+    if stations is not None:
+        columns['station'] = np.repeat(np.asarray(station_names, dtype=object), n_steps)
+    columns['date'] = np.tile(dates.to_numpy(), n_stations)
+    for parameter, shape in SERIES_SHAPES.items():
+        if shape.get('load'):
+            cycle = shape['amplitude'] * seasonal_factor * weekly_factor * levels
+        else:
+            cycle = shape['amplitude'] * seasonal_factor
+        values = shape['base'] + cycle + noise * shape['noise']
+        columns[parameter] = np.clip(values, shape['lower'], shape.get('upper')).ravel()
+
+    return pd.DataFrame(columns)
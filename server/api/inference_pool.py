@@ -0,0 +1,215 @@
+"""
+Process-pool ML inference
+Forest traversals (the RandomForest classifier, IsolationForest scoring) hold the
+GIL, so a threaded server runs them on one core no matter how many it has. With
+MITHI_ML_WORKERS > 0 they run in a pool of worker processes instead. Each worker
+loads the models itself, memory-mapped from the artifact store, so the workers
+share those pages; a request only sends the feature rows and gets the results
+back. Large batches are split across all workers.
+
+Workers keep the bundle they loaded until a request names another one (after a
+reload in the server process, or a new artifact version), and then reload. If
+that artifact version has since been pruned from the store, the request is
+computed in the server process with the bundle it already holds.
+With MITHI_ML_WORKERS = 0 (the default) no pool is started and callers run the
+models in the request thread.
+"""
+
+import atexit
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import joblib
+import numpy as np
+
+DEFAULT_WORKERS = 0
+# Smallest slice of a batch worth sending to a separate worker
+MIN_SHARD_ROWS = 256
+# Directory (under the model dir) for models published to the workers by this process
+INFERENCE_ARTIFACTS_DIRNAME = 'mithi_inference_artifacts'
+
+# ---- Worker process side -------------------------------------------------------
+
+_worker_model_dir = None
+_worker_bundle = None
+_worker_bundle_key = None
+_worker_artifacts = {}
+
+
+def _init_worker(model_dir):
+    global _worker_model_dir
+    _worker_model_dir = model_dir
+
+
+def _bundle_for(key):
+    """The worker's bundle for (server bundle version, artifact version), loading it if needed"""
+    global _worker_bundle, _worker_bundle_key
+    if _worker_bundle_key != key:
+        from .model_registry import load_model_bundle
+        _worker_bundle = load_model_bundle(_worker_model_dir, key[0], artifact_version=key[1])
+        _worker_bundle_key = key
+    return _worker_bundle
+
+
+def _classify(key, features):
+    return _bundle_for(key).classify_proba(features)
+
+
+def _score_anomalies(path, features):
+    """IsolationForest labels and decision scores from a (scaler, detector) artifact"""
+    model = _worker_artifacts.get(path)
+    if model is None:
+        # Forget artifacts the server has superseded (and deleted) since
+        for old_path in [old for old in _worker_artifacts if not os.path.exists(old)]:
+            del _worker_artifacts[old_path]
+        model = _worker_artifacts[path] = joblib.load(path, mmap_mode='r')
+    scaler, detector = model
+    features_scaled = scaler.transform(features)
+    return detector.predict(features_scaled), detector.decision_function(features_scaled)
+
+
+# ---- Server process side -------------------------------------------------------
+
+def bundle_key(bundle):
+    return (bundle.version, bundle.manifest.get('version'))
+
+
+class InferencePool:
+    """Runs model inference in worker processes that each hold the models"""
+
+    def __init__(self, workers, model_dir):
+        self.workers = workers
+        self.model_dir = model_dir
+        self._executor = None
+        self._lock = threading.Lock()
+        self._artifact_ids = itertools.count()
+        # Current published path per artifact name
+        self._artifact_paths = {}
+        # Bundles whose artifact version the workers can no longer load
+        self._local_keys = set()
+        atexit.register(self.shutdown)
+
+    def _get_executor(self):
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a threaded server process is not safe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                        initargs=(self.model_dir,)
+                    )
+                executor = self._executor
+        return executor
+
+    def _run_sharded(self, function, key, features):
+        """Run function(key, rows) over slices of features on all workers; results in row order"""
+        features = np.ascontiguousarray(features, dtype=np.float64)
+        n_shards = max(1, min(self.workers, len(features) // MIN_SHARD_ROWS))
+        executor = self._get_executor()
+        try:
+            futures = [executor.submit(function, key, shard) for shard in np.array_split(features, n_shards)]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool for the next call
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise
+
+    def classify_proba(self, bundle, features):
+        """bundle.classify_proba(features), computed by the workers when they can load the bundle"""
+        from .model_artifacts import ArtifactError
+        key = bundle_key(bundle)
+        if key not in self._local_keys:
+            try:
+                return np.vstack(self._run_sharded(_classify, key, features))
+            except ArtifactError as e:
+                # The version was pruned after this bundle was loaded (e.g. by several
+                # retrains in a row); this process still has its models
+                print(f"Inference workers cannot load model version {key[1]}: {str(e)}")
+                self._local_keys.add(key)
+        return bundle.classify_proba(features)
+
+    def warm_up(self, bundle, features):
+        """Start every worker and have it load the bundle, so no request waits for that"""
+        executor = self._get_executor()
+        futures = [executor.submit(_classify, bundle_key(bundle), features) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def publish_artifact(self, artifact, name):
+        """
+        Write a model the workers cannot load from the artifact store (e.g. one trained
+        in this process) next to the model store; returns the path to pass to them.
+        The file previously published under the same name is removed.
+        """
+        directory = os.path.join(self.model_dir, INFERENCE_ARTIFACTS_DIRNAME)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{name}-{os.getpid()}-{next(self._artifact_ids)}.joblib')
+        tmp_path = f'{path}.tmp'
+        joblib.dump(artifact, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            superseded = self._artifact_paths.get(name)
+            self._artifact_paths[name] = path
+        if superseded is not None:
+            _remove_file(superseded)
+        return path
+
+    def score_anomalies(self, path, features):
+        """(labels, decision scores) of a published (scaler, IsolationForest) artifact"""
+        results = self._run_sharded(_score_anomalies, path, features)
+        return (np.concatenate([labels for labels, _ in results]),
+                np.concatenate([scores for _, scores in results]))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            paths, self._artifact_paths = list(self._artifact_paths.values()), {}
+        for path in paths:
+            _remove_file(path)
+
+
+def _remove_file(path):
+    # Workers map artifacts read-only; where the OS refuses to delete a mapped file
+    # (Windows) it is left for the next cleanup
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_pool_lock = threading.Lock()
+_inference_pool = None
+
+
+def get_inference_pool():
+    """Shared pool when MITHI_ML_WORKERS > 0 in Django settings, else None"""
+    global _inference_pool
+    if _inference_pool is not None:
+        return _inference_pool
+
+    try:
+        from django.conf import settings
+        workers = int(getattr(settings, 'MITHI_ML_WORKERS', DEFAULT_WORKERS)) if settings.configured else 0
+    except ImportError:
+        workers = 0
+    if workers <= 0:
+        return None
+
+    from .model_registry import get_model_dir
+    with _pool_lock:
+        if _inference_pool is None:
+            _inference_pool = InferencePool(workers, get_model_dir())
+    return _inference_pool
@@ -0,0 +1,161 @@
+"""
+Spatial interpolation of station readings onto a regular grid
+Inverse-distance weighting (IDW) with the weight matrix precomputed once per
+(station layout, grid resolution), so refreshing a surface is one matrix multiply
+"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+from django.conf import settings
+
+# Approximate monitoring station positions along the Mithi River (lat, lng).
+# Override per deployment with the MITHI_STATION_COORDINATES setting.
+# Keys are the dataset's Location values.
+DEFAULT_STATION_COORDINATES = {
+    'Powai': (19.1290, 72.9010),
+    'Saki Naka': (19.1030, 72.8880),
+    'Kurla': (19.0780, 72.8760),
+    'Bandra': (19.0600, 72.8530),
+    'Mahim': (19.0430, 72.8400),
+}
+
+# Source (Vihar/Powai lakes) and mouth (Mahim creek); stations missing from the
+# coordinate table are spread evenly between these two points
+RIVER_SOURCE = (19.1440, 72.8998)
+RIVER_MOUTH = (19.0414, 72.8376)
+
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LNG = 111.32
+
+
+def get_station_coordinates(locations):
+    """(lat, lng) for each location, in the order given"""
+    configured = getattr(settings, 'MITHI_STATION_COORDINATES', None) or DEFAULT_STATION_COORDINATES
+    unknown = [location for location in locations if location not in configured]
+
+    coordinates = []
+    for location in locations:
+        if location in configured:
+            coordinates.append(tuple(configured[location]))
+        else:
+            t = (unknown.index(location) + 1) / (len(unknown) + 1)
+            coordinates.append((
+                RIVER_SOURCE[0] + t * (RIVER_MOUTH[0] - RIVER_SOURCE[0]),
+                RIVER_SOURCE[1] + t * (RIVER_MOUTH[1] - RIVER_SOURCE[1])
+            ))
+    return coordinates
+
+
+def grid_bounds(coordinates, padding=0.1):
+    """Bounding box (lat_min, lat_max, lng_min, lng_max) around the stations, padded on every side"""
+    points = np.asarray(coordinates, dtype=np.float64)
+    lat_min, lng_min = points.min(axis=0)
+    lat_max, lng_max = points.max(axis=0)
+    lat_pad = max(lat_max - lat_min, 0.01) * padding
+    lng_pad = max(lng_max - lng_min, 0.01) * padding
+    return (lat_min - lat_pad, lat_max + lat_pad, lng_min - lng_pad, lng_max + lng_pad)
+
+
+def grid_cells(bounds, resolution):
+    """
+    Cell-centre coordinates for a resolution x resolution grid.
+    Cell k has x = k // resolution (longitude axis) and y = k % resolution (latitude axis).
+    """
+    lat_min, lat_max, lng_min, lng_max = bounds
+    lng_centres = lng_min + (np.arange(resolution) + 0.5) * (lng_max - lng_min) / resolution
+    lat_centres = lat_min + (np.arange(resolution) + 0.5) * (lat_max - lat_min) / resolution
+    return np.tile(lat_centres, resolution), np.repeat(lng_centres, resolution)
+
+
+def idw_weights(station_coordinates, cell_lat, cell_lng, power=2.0):
+    """(cells x stations) row-normalized inverse-distance weight matrix"""
+    stations = np.asarray(station_coordinates, dtype=np.float64)
+    lat0 = np.radians(stations[:, 0].mean())
+
+    # Local equirectangular projection in km is accurate enough at river scale
+    dy = (cell_lat[:, None] - stations[None, :, 0]) * KM_PER_DEGREE_LAT
+    dx = (cell_lng[:, None] - stations[None, :, 1]) * KM_PER_DEGREE_LNG * np.cos(lat0)
+    distance = np.hypot(dx, dy)
+
+    exact = distance < 1e-9
+    with np.errstate(divide='ignore'):
+        weights = np.where(exact, 0.0, distance ** -power)
+    # A cell sitting on a station takes that station's value
+    hit = exact.any(axis=1)
+    weights[hit] = exact[hit].astype(np.float64)
+
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+class SpatialInterpolator:
+    """
+    Interpolates station values onto grids.
+    Weight matrices are cached per (station layout, resolution) and rendered
+    surfaces per caller-supplied key (parameters, resolution, time window, data version),
+    both in small LRUs so memory stays bounded whatever the requests ask for.
+    """
+
+    def __init__(self, power=2.0, max_layouts=8, max_surfaces=16):
+        self.power = power
+        self.max_layouts = max_layouts
+        self.max_surfaces = max_surfaces
+        self._layouts = OrderedDict()
+        self._surfaces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def layout(self, station_coordinates, resolution):
+        """Grid cell coordinates and IDW weight matrix for a station layout"""
+        key = (tuple(map(tuple, station_coordinates)), resolution)
+        with self._lock:
+            cached = self._layouts.get(key)
+            if cached is not None:
+                self._layouts.move_to_end(key)
+                return cached
+
+        cell_lat, cell_lng = grid_cells(grid_bounds(station_coordinates), resolution)
+        weights = idw_weights(station_coordinates, cell_lat, cell_lng, self.power)
+        for array in (cell_lat, cell_lng, weights):
+            array.setflags(write=False)
+        cached = (cell_lat, cell_lng, weights)
+        with self._lock:
+            self._layouts[key] = cached
+            while len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+        return cached
+
+    def surface(self, station_coordinates, station_values, resolution, cache_key=None):
+        """
+        Interpolated (cells x parameters) surface for a (stations x parameters) value matrix.
+        A NaN value leaves that station out of that parameter's surface (the other
+        stations' weights are renormalized); a parameter no station has is NaN.
+        Returns (cell_lat, cell_lng, values); results are cached when cache_key is given.
+        """
+        if cache_key is not None:
+            key = (cache_key, resolution)
+            with self._lock:
+                if key in self._surfaces:
+                    self._surfaces.move_to_end(key)
+                    return self._surfaces[key]
+
+        cell_lat, cell_lng, weights = self.layout(station_coordinates, resolution)
+        station_values = np.asarray(station_values, dtype=np.float64)
+        known = ~np.isnan(station_values)
+        if known.all():
+            values = weights @ station_values
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = (weights @ np.where(known, station_values, 0.0)) / (weights @ known)
+        values.setflags(write=False)
+        result = (cell_lat, cell_lng, values)
+
+        if cache_key is not None:
+            with self._lock:
+                self._surfaces[key] = result
+                while len(self._surfaces) > self.max_surfaces:
+                    self._surfaces.popitem(last=False)
+        return result
+
+
+# Shared interpolator for all requests in this process
+spatial_interpolator = SpatialInterpolator()
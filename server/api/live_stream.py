@@ -0,0 +1,179 @@
+"""
+Live stream of sensor readings, aggregates and alerts over Server-Sent Events
+One poller per worker process follows the latest-reading index and serializes every
+event exactly once; the encoded bytes are then fanned out to all subscribers whose
+station filter matches. Requires an ASGI server (e.g. uvicorn backend.asgi:application).
+"""
+
+import asyncio
+import json
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from .readings_store import READING_PARAMETERS, get_reading_store, reading_payload
+from .rules import get_rule_engine
+
+# Seconds between index refreshes (one refresh serves every connected client)
+POLL_INTERVAL = 1.0
+# Seconds of silence after which a comment line keeps proxies from closing the stream
+KEEPALIVE_INTERVAL = 15.0
+# Events buffered per client; a client that falls this far behind is disconnected
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Parameters whose status can raise an alert, and the status color that does
+ALERT_PARAMETERS = ['Temp', 'pH', 'DO', 'TDS', 'BOD', 'COD']
+ALERT_COLOR = 'red'
+
+
+def sse_message(event, data, event_id=None):
+    """Encode one SSE message"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+def reading_alerts(entry):
+    """Alert payloads for the parameters of a reading whose status is critical (red)"""
+    rules = get_rule_engine()
+    alerts = []
+    for parameter in ALERT_PARAMETERS:
+        value = entry['values'].get(parameter)
+        if value is None or value != value:
+            continue
+        result = rules.status(parameter, value)
+        if result['color'] == ALERT_COLOR:
+            alerts.append({
+                'location': entry['station'],
+                'parameter': parameter,
+                'value': round(value, 2),
+                'status': result,
+                'timestamp': reading_payload(entry)['timestamp']
+            })
+    return alerts
+
+
+class Subscriber:
+    """One connected client: its station filter and outgoing message queue"""
+
+    def __init__(self, stations=None, since=None):
+        self.stations = stations
+        self.since = since
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, station, updated=None):
+        if self.stations is not None and station is not None and station not in self.stations:
+            return False
+        return self.since is None or updated is None or updated > self.since
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class LiveBroadcaster:
+    """Polls the latest-reading index and fans encoded events out to subscribers"""
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.cursor = None
+        self._last_readings = {}
+        self._task = None
+
+    def subscribe(self, stations=None, since=None):
+        """Register a client and queue the current reading of every station it follows"""
+        subscriber = Subscriber(stations, since)
+        for station, (updated, message) in self._last_readings.items():
+            if subscriber.wants(station, updated):
+                subscriber.offer(message)
+        self.subscribers.add(subscriber)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, message, station=None, updated=None):
+        """Deliver an already-encoded message to every matching subscriber"""
+        for subscriber in list(self.subscribers):
+            if subscriber.wants(station, updated):
+                subscriber.offer(message)
+
+    async def _run(self):
+        """Poll while anyone is listening; the next subscriber restarts the task"""
+        index = get_reading_store().latest_index
+        while self.subscribers:
+            try:
+                entries, cursor = await asyncio.to_thread(index.latest, self.cursor)
+                if entries:
+                    all_entries, _ = await asyncio.to_thread(index.latest)
+                    self._broadcast(entries, cursor, all_entries)
+                self.cursor = cursor
+            except Exception as e:
+                print(f"Live stream poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _broadcast(self, updated_entries, cursor, all_entries):
+        for entry in updated_entries:
+            station = entry['station']
+            message = sse_message('reading', reading_payload(entry), event_id=entry['updated'])
+            self._last_readings[station] = (entry['updated'], message)
+            self.publish(message, station, entry['updated'])
+
+            for alert in reading_alerts(entry):
+                self.publish(sse_message('alert', alert, event_id=entry['updated']), station, entry['updated'])
+
+        # Network-wide means over every station's latest values
+        means = {}
+        for parameter in READING_PARAMETERS:
+            values = [entry['values'][parameter] for entry in all_entries
+                      if entry['values'][parameter] == entry['values'][parameter]]
+            means[parameter] = round(sum(values) / len(values), 2) if values else None
+        self.publish(sse_message('aggregate', {
+            'stations': len(all_entries),
+            'updated_stations': [entry['station'] for entry in updated_entries],
+            'means': means
+        }, event_id=cursor))
+
+
+# Shared broadcaster for every stream served by this worker
+live_broadcaster = LiveBroadcaster()
+
+
+async def _event_stream(subscriber):
+    try:
+        yield b'retry: 3000\n\n'
+        while not subscriber.overflowed:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                message = b': keep-alive\n\n'
+            yield message
+    finally:
+        live_broadcaster.unsubscribe(subscriber)
+
+
+async def stream_live_readings(request):
+    """
+    SSE stream of 'reading', 'alert' and 'aggregate' events.
+    ?stations=Powai,Kurla limits reading and alert events to those stations; a
+    reconnecting client's Last-Event-ID (or ?since=) resumes after that cursor.
+    """
+    stations = request.GET.get('stations')
+    stations = {name.strip() for name in stations.split(',') if name.strip()} if stations else None
+
+    since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        return HttpResponseBadRequest('since must be a cursor returned by the API')
+
+    subscriber = live_broadcaster.subscribe(stations, since)
+    response = StreamingHttpResponse(_event_stream(subscriber), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
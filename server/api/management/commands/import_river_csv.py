@@ -0,0 +1,31 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.columnar_store import import_csv
+
+
+class Command(BaseCommand):
+    help = 'Convert mithi_river_data.csv into a new version of the Year-partitioned columnar store used by the dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', default=settings.MITHI_RIVER_DATA_PATH, help='Path of the CSV to import')
+        parser.add_argument('--output', default=settings.MITHI_RIVER_STORE_PATH, help='Directory of the columnar store')
+
+    def handle(self, *args, **options):
+        csv_path = options['csv']
+        store_path = options['output']
+
+        if not os.path.exists(csv_path):
+            raise CommandError(f'CSV file not found: {csv_path}')
+
+        manifest = import_csv(csv_path, store_path)
+
+        for partition in manifest['partitions']:
+            self.stdout.write(f"  Year {partition['year']}: {partition['rows']} rows")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {manifest['row_count']} records into {len(manifest['partitions'])} partitions "
+                f"as version {manifest['version']} at {store_path}"
+            )
+        )
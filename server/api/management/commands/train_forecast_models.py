@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from api.forecasting import DEFAULT_FORECAST_STATIONS, forecast_registry, publish_forecast_models
+from api.historical_data import DEFAULT_END, DEFAULT_SEED, DEFAULT_START, generate_history
+
+
+class Command(BaseCommand):
+    help = 'Train the water quality forecasting models and publish them as a new version of the forecast store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', default=DEFAULT_START, help='First day of the training history')
+        parser.add_argument('--end', default=DEFAULT_END, help='Last day of the training history')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed of the synthetic history')
+        parser.add_argument('--stations', default=','.join(DEFAULT_FORECAST_STATIONS),
+                            help='Comma-separated stations to train per-station models for (empty for none)')
+        parser.add_argument('--output', default=None, help='Directory of the forecast store (default: in MITHI_ML_MODEL_DIR)')
+
+    def handle(self, *args, **options):
+        store_path = options['output'] or forecast_registry.store_path
+        history = generate_history(options['start'], options['end'], freq='D', seed=options['seed'])
+        stations = [station.strip() for station in options['stations'].split(',') if station.strip()]
+        station_history = generate_history(options['start'], options['end'], freq='D', stations=stations,
+                                           seed=options['seed'] + 1) if stations else None
+
+        manifest = publish_forecast_models(store_path, history, station_history)
+
+        for target, metrics in manifest['metrics']['network'].items():
+            self.stdout.write(f"  {target}: R² {metrics['r2']:.3f}")
+        if stations:
+            self.stdout.write(f"  plus per-station models for {len(stations)} stations")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Trained on {len(history)} days and published version {manifest['version']} at {store_path}"
+            )
+        )
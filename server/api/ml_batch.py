@@ -0,0 +1,116 @@
+"""
+Batch helpers for the ML endpoints
+Parses many input rows at once (JSON array or CSV), validates and encodes them
+column-wise, and streams results back in fixed-size chunks
+"""
+
+import io
+import numpy as np
+import pandas as pd
+from django.http import StreamingHttpResponse
+
+# Largest batch accepted by one request
+MAX_BATCH_ROWS = 200000
+# Rows serialized per streamed chunk
+STREAM_CHUNK_ROWS = 5000
+# Invalid rows reported back per batch
+MAX_REPORTED_ERRORS = 100
+
+REGRESSION_FIELDS = ['year', 'location', 'temp', 'do', 'ph']
+CLASSIFICATION_FIELDS = REGRESSION_FIELDS + ['tds', 'bod', 'cod']
+
+
+class BatchError(ValueError):
+    """Raised when a batch cannot be parsed at all"""
+
+
+def batch_frame(request):
+    """
+    Raw rows of a batch request as a DataFrame with lower-cased column names.
+    Accepts a JSON list (or {"rows": [...]}), a text/csv body or a CSV file upload.
+    """
+    if request.content_type.startswith('text/csv'):
+        frame = pd.read_csv(io.BytesIO(request.body), dtype=str, keep_default_na=False)
+    elif 'file' in request.FILES:
+        frame = pd.read_csv(request.FILES['file'], dtype=str, keep_default_na=False)
+    else:
+        rows = request.data.get('rows') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list):
+            raise BatchError('Expected a list of rows')
+        frame = pd.DataFrame.from_records(rows)
+
+    if len(frame) == 0:
+        raise BatchError('Batch is empty')
+    if len(frame) > MAX_BATCH_ROWS:
+        raise BatchError(f'Batch has {len(frame)} rows; the limit is {MAX_BATCH_ROWS}')
+    return frame.rename(columns=lambda name: str(name).strip().lower())
+
+
+def parse_batch(frame, fields):
+    """
+    Validate the required fields of every row at once.
+    Returns (columns, errors): columns maps each field to a NumPy array (year as
+    int64, location as str, the rest float64); errors lists {'index', 'error'}.
+    """
+    missing = [field for field in fields if field not in frame.columns]
+    if missing:
+        return None, [{'index': None, 'error': f"Missing required field: {', '.join(missing)}"}]
+
+    columns = {}
+    problems = {}
+    for field in fields:
+        if field == 'location':
+            locations = frame[field].astype(str).str.strip()
+            columns[field] = locations.to_numpy(dtype=str)
+            problems['missing location'] = (frame[field].isna() | (locations == '')).to_numpy()
+            continue
+        values = pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=np.float64)
+        problems[f'invalid {field}'] = ~np.isfinite(values)
+        columns[field] = values
+
+    invalid = np.zeros(len(frame), dtype=bool)
+    for mask in problems.values():
+        invalid |= mask
+
+    errors = []
+    for index in np.flatnonzero(invalid)[:MAX_REPORTED_ERRORS]:
+        reasons = [reason for reason, mask in problems.items() if mask[index]]
+        errors.append({'index': int(index), 'error': ', '.join(reasons)})
+    if errors:
+        return None, errors
+
+    # int() truncation, as the single-row endpoints do
+    columns['year'] = columns['year'].astype(np.int64)
+    return columns, []
+
+
+def encode_locations(encoder, locations):
+    """
+    LabelEncoder codes for an array of locations in one searchsorted pass;
+    locations unseen during training map to 0 like the single-row endpoints
+    """
+    classes = encoder.classes_
+    positions = np.searchsorted(classes, locations)
+    positions = np.minimum(positions, len(classes) - 1)
+    known = classes[positions] == locations
+    return np.where(known, positions, 0)
+
+
+def stream_table(columns, output='ndjson', chunk_rows=STREAM_CHUNK_ROWS):
+    """Stream a dict of equal-length arrays as NDJSON (default) or CSV, chunk by chunk"""
+    frame = pd.DataFrame(columns)
+
+    def chunks():
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows]
+            if output == 'csv':
+                yield chunk.to_csv(index=False, header=start == 0)
+            else:
+                lines = chunk.to_json(orient='records', lines=True)
+                # Newer pandas already terminates the last record
+                yield lines if lines.endswith('\n') else lines + '\n'
+
+    content_type = 'text/csv' if output == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(chunks(), content_type=content_type)
+    response['X-Row-Count'] = str(len(frame))
+    return response
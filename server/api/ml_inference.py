@@ -0,0 +1,87 @@
+"""
+Single-row ML inference through micro-batchers
+The single-row endpoints submit their feature row here; rows arriving from
+concurrent requests are stacked and predicted with one vectorized call per model
+bundle (MITHI_ML_BATCH_MAX_WAIT_MS, MITHI_ML_BATCH_MAX_SIZE; a size of 1 turns
+coalescing off). Classification runs in the worker processes of the inference
+pool when one is configured (MITHI_ML_WORKERS), with one batch in flight per
+worker; the fused regression is a single small matmul and stays in-process.
+"""
+
+import threading
+import numpy as np
+from django.conf import settings
+from .micro_batcher import MicroBatcher
+from .inference_pool import get_inference_pool
+
+DEFAULT_BATCH_MAX_WAIT_MS = 0
+DEFAULT_BATCH_MAX_SIZE = 64
+
+
+def _by_bundle(items):
+    """Group (bundle, row) items so each batch runs on the bundle its requests took"""
+    groups = {}
+    for index, (bundle, row) in enumerate(items):
+        groups.setdefault(id(bundle), (bundle, []))[1].append(index)
+    return groups.values()
+
+
+def _regression_batch(items):
+    results = [None] * len(items)
+    for bundle, indices in _by_bundle(items):
+        predictions = bundle.regression_fused.predict(np.vstack([items[i][1] for i in indices]))
+        for index, row in zip(indices, predictions):
+            results[index] = row
+    return results
+
+
+def classify_rows(bundle, features):
+    """Class probabilities for a feature matrix, on the inference pool when configured"""
+    pool = get_inference_pool()
+    if pool is not None:
+        return pool.classify_proba(bundle, features)
+    return bundle.classify_proba(features)
+
+
+def _classification_batch(items):
+    results = [None] * len(items)
+    for bundle, indices in _by_bundle(items):
+        probabilities = classify_rows(bundle, np.vstack([items[i][1] for i in indices]))
+        for index, row in zip(indices, probabilities):
+            results[index] = row
+    return results
+
+
+_batchers_lock = threading.Lock()
+_batchers = {}
+
+
+def _get_batcher(name, run_batch):
+    batcher = _batchers.get(name)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(name)
+            if batcher is None:
+                pool = get_inference_pool() if name == 'classification' else None
+                batcher = MicroBatcher(
+                    run_batch,
+                    max_wait=float(getattr(settings, 'MITHI_ML_BATCH_MAX_WAIT_MS', DEFAULT_BATCH_MAX_WAIT_MS)) / 1000,
+                    max_batch=int(getattr(settings, 'MITHI_ML_BATCH_MAX_SIZE', DEFAULT_BATCH_MAX_SIZE)),
+                    max_concurrent=pool.workers if pool is not None else 1
+                )
+                _batchers[name] = batcher
+    return batcher
+
+
+def predict_regression_row(bundle, features):
+    """Predicted targets (in bundle.regression_fused.targets order) for one feature row"""
+    return _get_batcher('regression', _regression_batch).submit((bundle, features))
+
+
+def classify_row(bundle, features):
+    """Class probabilities (in classifier_model.classes_ order) for one feature row"""
+    return _get_batcher('classification', _classification_batch).submit((bundle, features))
+
+
+def batcher_stats():
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
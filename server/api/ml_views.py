@@ -6,150 +6,25 @@ Provides prediction endpoints for linear regression and classification
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-import joblib
 import numpy as np
-import pandas as pd
-import os
-from django.conf import settings
-
-# Global variables to store loaded models
-ml_models = {
-    'regression_models': None,
-    'regression_scalers': None,
-    'classifier_model': None,
-    'classifier_scaler': None,
-    'location_encoder': None,
-    'model_metadata': None
-}
-
-def load_ml_models():
-    """Load all ML models once when server starts"""
-    try:
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        server_path = os.path.dirname(base_path)
-        
-        # Load regression models
-        ml_models['regression_models'] = joblib.load(os.path.join(server_path, 'mithi_regression_models.pkl'))
-        ml_models['regression_scalers'] = joblib.load(os.path.join(server_path, 'mithi_regression_scalers.pkl'))
-        
-        # Load classifier model
-        ml_models['classifier_model'] = joblib.load(os.path.join(server_path, 'mithi_classifier_model.pkl'))
-        ml_models['classifier_scaler'] = joblib.load(os.path.join(server_path, 'mithi_classifier_scaler.pkl'))
-        
-        # Load encoders and metadata
-        ml_models['location_encoder'] = joblib.load(os.path.join(server_path, 'location_encoder.pkl'))
-        ml_models['model_metadata'] = joblib.load(os.path.join(server_path, 'model_metadata.pkl'))
-        
-        print("ML models loaded successfully!")
-        return True
-        
-    except Exception as e:
-        print(f"Error loading ML models: {str(e)}")
-        return False
-
-# Load models when module is imported
-load_ml_models()
+from django.core.exceptions import RequestDataTooBig
+from .rules import get_rule_engine
+from .model_registry import model_registry
+from .prediction_cache import get_prediction_cache
+from .ml_inference import predict_regression_row, classify_row, classify_rows, batcher_stats
+from .ml_batch import BatchError, REGRESSION_FIELDS, CLASSIFICATION_FIELDS, batch_frame, parse_batch, encode_locations, stream_table
 
 def calculate_wqi(temperature, dissolved_oxygen, ph, tds, bod, cod):
     """
     Calculate Water Quality Index (WQI) based on water quality parameters
     Uses a weighted approach based on Indian water quality standards
     """
-    
-    # Parameter weights (importance factors)
-    weights = {
-        'pH': 0.12,
-        'DO': 0.17,
-        'TDS': 0.19,
-        'BOD': 0.22,
-        'COD': 0.19,
-        'Temp': 0.11
-    }
-    
-    # Calculate sub-indices for each parameter
-    # pH (optimal range: 6.5-8.5)
-    if 6.5 <= ph <= 8.5:
-        ph_index = 100
-    elif 6.0 <= ph < 6.5 or 8.5 < ph <= 9.0:
-        ph_index = 80
-    elif 5.5 <= ph < 6.0 or 9.0 < ph <= 9.5:
-        ph_index = 60
-    elif 5.0 <= ph < 5.5 or 9.5 < ph <= 10.0:
-        ph_index = 40
-    else:
-        ph_index = 20
-    
-    # Dissolved Oxygen (optimal: >6 mg/L)
-    if dissolved_oxygen >= 6:
-        do_index = 100
-    elif dissolved_oxygen >= 4:
-        do_index = 80
-    elif dissolved_oxygen >= 2:
-        do_index = 60
-    elif dissolved_oxygen >= 1:
-        do_index = 40
-    else:
-        do_index = 20
-    
-    # TDS (optimal: <500 mg/L)
-    if tds <= 500:
-        tds_index = 100
-    elif tds <= 1000:
-        tds_index = 80
-    elif tds <= 2000:
-        tds_index = 60
-    elif tds <= 3000:
-        tds_index = 40
-    else:
-        tds_index = 20
-    
-    # BOD (optimal: <3 mg/L)
-    if bod <= 3:
-        bod_index = 100
-    elif bod <= 6:
-        bod_index = 80
-    elif bod <= 12:
-        bod_index = 60
-    elif bod <= 20:
-        bod_index = 40
-    else:
-        bod_index = 20
-    
-    # COD (optimal: <20 mg/L)
-    if cod <= 20:
-        cod_index = 100
-    elif cod <= 40:
-        cod_index = 80
-    elif cod <= 80:
-        cod_index = 60
-    elif cod <= 120:
-        cod_index = 40
-    else:
-        cod_index = 20
-    
-    # Temperature (optimal: 20-30°C)
-    if 20 <= temperature <= 30:
-        temp_index = 100
-    elif 15 <= temperature < 20 or 30 < temperature <= 35:
-        temp_index = 80
-    elif 10 <= temperature < 15 or 35 < temperature <= 40:
-        temp_index = 60
-    elif 5 <= temperature < 10 or 40 < temperature <= 45:
-        temp_index = 40
-    else:
-        temp_index = 20
-    
-    # Calculate weighted WQI
-    wqi = (
-        weights['pH'] * ph_index +
-        weights['DO'] * do_index +
-        weights['TDS'] * tds_index +
-        weights['BOD'] * bod_index +
-        weights['COD'] * cod_index +
-        weights['Temp'] * temp_index
-    )
-    
-    return max(0, min(100, wqi))  # Ensure WQI is between 0 and 100
+    return float(calculate_wqi_batch(temperature, dissolved_oxygen, ph, tds, bod, cod)[0])
+
+def calculate_wqi_batch(temperature, dissolved_oxygen, ph, tds, bod, cod):
+    """WQI for arrays (or scalars) of readings in one vectorized pass"""
+    return get_rule_engine().calculate_wqi(*(np.atleast_1d(np.asarray(values, dtype=np.float64))
+                                             for values in (temperature, dissolved_oxygen, ph, tds, bod, cod)))
 
 @api_view(['POST'])
 def predict_water_quality(request):
@@ -158,8 +33,9 @@ def predict_water_quality(request):
     Predicts TDS, BOD, COD values based on input parameters
     """
     try:
-        # Check if models are loaded
-        if not ml_models['regression_models']:
+        # One bundle for the whole request, even if a reload swaps models meanwhile
+        models = model_registry.get()
+        if models is None:
             return Response({
                 'error': 'ML models not loaded. Please check server configuration.'
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -175,48 +51,48 @@ def predict_water_quality(request):
                     'error': f'Missing required field: {field}'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Prepare input data
+        # Prepare input data (readings normalized as the prediction cache keys them)
+        cache = get_prediction_cache()
         try:
             year = int(data['year'])
             location = data['location']
-            temp = float(data['temp'])
-            do_val = float(data['do'])
-            ph = float(data['ph'])
-            
+            temp = cache.normalize(data['temp'])
+            do_val = cache.normalize(data['do'])
+            ph = cache.normalize(data['ph'])
+        except (ValueError, TypeError, OverflowError) as e:
+            return Response({
+                'error': f'Invalid input data format: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        cache_key = ('predict', year, str(location), temp, do_val, ph)
+        predictions = cache.get(models.version, cache_key)
+        cached = predictions is not None
+        if not cached:
             # Encode location
             try:
-                location_encoded = ml_models['location_encoder'].transform([location])[0]
+                location_encoded = models.location_encoder.transform([location])[0]
             except ValueError:
                 # If location not in training data, use most common location
                 location_encoded = 0
-                
-        except (ValueError, TypeError) as e:
-            return Response({
-                'error': f'Invalid input data format: {str(e)}'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create feature array
-        features = np.array([[year, location_encoded, temp, do_val, ph]])
-        
-        # Make predictions for each target
-        predictions = {}
-        for target in ['TDS', 'BOD', 'COD']:
-            # Scale features
-            scaler = ml_models['regression_scalers'][target]
-            features_scaled = scaler.transform(features)
             
-            # Predict
-            model = ml_models['regression_models'][target]
-            prediction = model.predict(features_scaled)[0]
-            predictions[target] = round(float(prediction), 2)
-        
-        # Calculate Water Quality Index (WQI) based on predicted values
-        wqi = calculate_wqi(temp, do_val, ph, predictions['TDS'], predictions['BOD'], predictions['COD'])
-        predictions['WQI'] = round(float(wqi), 1)
+            # Create feature array
+            features = np.array([year, location_encoded, temp, do_val, ph], dtype=np.float64)
+            
+            # All targets in one matrix multiply (scalers folded into the coefficients),
+            # shared with concurrent requests by the micro-batcher
+            values = predict_regression_row(models, features)
+            predictions = {target: round(float(value), 2)
+                           for target, value in zip(models.regression_fused.targets, values)}
+            
+            # Calculate Water Quality Index (WQI) based on predicted values
+            wqi = calculate_wqi(temp, do_val, ph, predictions['TDS'], predictions['BOD'], predictions['COD'])
+            predictions['WQI'] = round(float(wqi), 1)
+            cache.put(models.version, cache_key, predictions)
         
         return Response({
             'success': True,
-            'predictions': predictions,
+            'predictions': dict(predictions),
+            'cached': cached,
             'input': {
                 'year': year,
                 'location': location,
@@ -231,6 +107,60 @@ def predict_water_quality(request):
             'error': f'Prediction failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+def predict_water_quality_batch(request):
+    """
+    Batch Linear Regression Prediction API
+    Predicts TDS, BOD, COD and WQI for many rows (JSON array or CSV) at once and
+    streams the results as NDJSON, or as CSV with ?output=csv
+    """
+    try:
+        models = model_registry.get()
+        if models is None:
+            return Response({
+                'error': 'ML models not loaded. Please check server configuration.'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        try:
+            columns, errors = parse_batch(batch_frame(request), REGRESSION_FIELDS)
+        except BatchError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if errors:
+            return Response({
+                'error': 'Invalid input data format',
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # One feature matrix for the whole batch, same column order as training
+        features = np.column_stack([
+            columns['year'],
+            encode_locations(models.location_encoder, columns['location']),
+            columns['temp'],
+            columns['do'],
+            columns['ph']
+        ]).astype(np.float64)
+
+        predictions = {target: np.round(values, 2)
+                       for target, values in models.regression_fused.predict_dict(features).items()}
+
+        wqi = calculate_wqi_batch(columns['temp'], columns['do'], columns['ph'],
+                                  predictions['TDS'], predictions['BOD'], predictions['COD'])
+
+        return stream_table({
+            **columns,
+            **predictions,
+            'WQI': np.round(wqi, 1)
+        }, output=request.GET.get('output', 'ndjson'))
+
+    except RequestDataTooBig:
+        return Response({
+            'error': 'Batch too large for a JSON body; upload it as a CSV file instead'
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except Exception as e:
+        return Response({
+            'error': f'Batch prediction failed: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
 def classify_water_quality(request):
     """
@@ -238,8 +168,9 @@ def classify_water_quality(request):
     Predicts WQI category (Good/Moderate/Poor) based on all water quality parameters
     """
     try:
-        # Check if models are loaded
-        if not ml_models['classifier_model']:
+        # One bundle for the whole request, even if a reload swaps models meanwhile
+        models = model_registry.get()
+        if models is None:
             return Response({
                 'error': 'ML models not loaded. Please check server configuration.'
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -255,47 +186,54 @@ def classify_water_quality(request):
                     'error': f'Missing required field: {field}'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Prepare input data
+        # Prepare input data (readings normalized as the prediction cache keys them)
+        cache = get_prediction_cache()
         try:
             year = int(data['year'])
             location = data['location']
-            temp = float(data['temp'])
-            do_val = float(data['do'])
-            ph = float(data['ph'])
-            tds = float(data['tds'])
-            bod = float(data['bod'])
-            cod = float(data['cod'])
-            
+            temp = cache.normalize(data['temp'])
+            do_val = cache.normalize(data['do'])
+            ph = cache.normalize(data['ph'])
+            tds = cache.normalize(data['tds'])
+            bod = cache.normalize(data['bod'])
+            cod = cache.normalize(data['cod'])
+        except (ValueError, TypeError, OverflowError) as e:
+            return Response({
+                'error': f'Invalid input data format: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        cache_key = ('classify', year, str(location), temp, do_val, ph, tds, bod, cod)
+        result = cache.get(models.version, cache_key)
+        cached = result is not None
+        if not cached:
             # Encode location
             try:
-                location_encoded = ml_models['location_encoder'].transform([location])[0]
+                location_encoded = models.location_encoder.transform([location])[0]
             except ValueError:
                 # If location not in training data, use most common location
                 location_encoded = 0
-                
-        except (ValueError, TypeError) as e:
-            return Response({
-                'error': f'Invalid input data format: {str(e)}'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create feature array
-        features = np.array([[year, location_encoded, temp, do_val, ph, tds, bod, cod]])
-        
-        # Scale features
-        features_scaled = ml_models['classifier_scaler'].transform(features)
-        
-        # Make prediction
-        prediction = ml_models['classifier_model'].predict(features_scaled)[0]
-        prediction_proba = ml_models['classifier_model'].predict_proba(features_scaled)[0]
-        
-        # Get class labels and probabilities
-        classes = ml_models['classifier_model'].classes_
-        probabilities = {cls: round(float(prob), 4) for cls, prob in zip(classes, prediction_proba)}
+            
+            # Create feature array
+            features = np.array([year, location_encoded, temp, do_val, ph, tds, bod, cod], dtype=np.float64)
+            
+            # One traversal of the flattened forest (scaling included), shared with
+            # concurrent requests by the micro-batcher: the label is the most probable
+            # class, as predict() would return
+            prediction_proba = classify_row(models, features)
+            classes = models.classifier_model.classes_
+            prediction = classes[np.argmax(prediction_proba)]
+            
+            # Get class labels and probabilities
+            probabilities = {cls: round(float(prob), 4) for cls, prob in zip(classes, prediction_proba)}
+            result = (prediction, probabilities)
+            cache.put(models.version, cache_key, result)
         
+        prediction, probabilities = result
         return Response({
             'success': True,
             'prediction': prediction,
-            'probabilities': probabilities,
+            'probabilities': dict(probabilities),
+            'cached': cached,
             'input': {
                 'year': year,
                 'location': location,
@@ -313,26 +251,89 @@ def classify_water_quality(request):
             'error': f'Classification failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+def classify_water_quality_batch(request):
+    """
+    Batch Random Forest Classification API
+    Classifies many rows (JSON array or CSV) with a single forest pass and
+    returns columnar output: labels plus a probability matrix in `classes` order
+    """
+    try:
+        models = model_registry.get()
+        if models is None:
+            return Response({
+                'error': 'ML models not loaded. Please check server configuration.'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        try:
+            columns, errors = parse_batch(batch_frame(request), CLASSIFICATION_FIELDS)
+        except BatchError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if errors:
+            return Response({
+                'error': 'Invalid input data format',
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        features = np.column_stack([
+            columns['year'],
+            encode_locations(models.location_encoder, columns['location']),
+            columns['temp'],
+            columns['do'],
+            columns['ph'],
+            columns['tds'],
+            columns['bod'],
+            columns['cod']
+        ]).astype(np.float64)
+
+        model = models.classifier_model
+        # Split across the inference worker processes when they are configured
+        probabilities = classify_rows(models, features)
+        labels = model.classes_[np.argmax(probabilities, axis=1)]
+
+        return Response({
+            'success': True,
+            'count': len(labels),
+            'classes': model.classes_.tolist(),
+            'labels': labels.tolist(),
+            'probabilities': np.round(probabilities, 4).tolist()
+        }, status=status.HTTP_200_OK)
+
+    except RequestDataTooBig:
+        return Response({
+            'error': 'Batch too large for a JSON body; upload it as a CSV file instead'
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except Exception as e:
+        return Response({
+            'error': f'Batch classification failed: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 def get_model_info(request):
     """
     Get information about loaded ML models
     """
     try:
-        if not ml_models['model_metadata']:
+        models = model_registry.get()
+        if models is None or not models.model_metadata:
             return Response({
                 'error': 'Model metadata not available'
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
         return Response({
             'success': True,
-            'model_info': ml_models['model_metadata'],
-            'available_locations': ml_models['location_encoder'].classes_.tolist() if ml_models['location_encoder'] else [],
+            'model_info': models.model_metadata,
+            'available_locations': models.locations,
             'models_loaded': {
-                'regression': ml_models['regression_models'] is not None,
-                'classifier': ml_models['classifier_model'] is not None,
-                'location_encoder': ml_models['location_encoder'] is not None
-            }
+                'regression': models.regression_models is not None,
+                'classifier': models.classifier_model is not None,
+                'location_encoder': models.location_encoder is not None
+            },
+            'model_version': models.describe(),
+            'training_metrics': models.manifest.get('metrics'),
+            'prediction_cache': get_prediction_cache().stats(),
+            'micro_batching': batcher_stats(),
+            'loaded_versions': [bundle.describe() for bundle in model_registry.versions()]
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -344,17 +345,20 @@ def get_model_info(request):
 def reload_models(request):
     """
     Reload ML models (useful for development)
+    The new models replace the current ones atomically; requests already running
+    finish on the models they started with.
     """
     try:
-        success = load_ml_models()
-        if success:
+        bundle = model_registry.reload()
+        if bundle is not None:
             return Response({
                 'success': True,
-                'message': 'Models reloaded successfully'
+                'message': 'Models reloaded successfully',
+                'model_version': bundle.describe()
             }, status=status.HTTP_200_OK)
         else:
             return Response({
-                'error': 'Failed to reload models'
+                'error': f'Failed to reload models: {model_registry.last_error}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
     except Exception as e:
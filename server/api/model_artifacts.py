@@ -0,0 +1,163 @@
+"""
+Versioned ML model artifact store
+Each training run is published as one version directory holding every model
+artifact as an uncompressed joblib file, plus a JSON manifest with the SHA-256 and
+size of each file, the feature columns, the training metrics and the library
+versions used. A CURRENT file names the active version and is replaced atomically,
+as in the columnar river store, so a server never loads a half-written version.
+
+Artifacts are loaded with joblib's mmap_mode, so the NumPy arrays inside them are
+mapped read-only from the page cache and shared by every worker process instead
+of being copied into each one.
+
+This module has no Django dependency so the training script can use it too.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+import joblib
+import numpy as np
+import sklearn
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_FILENAME = 'manifest.json'
+CURRENT_FILENAME = 'CURRENT'
+VERSIONS_DIRNAME = 'versions'
+DEFAULT_ARTIFACTS_DIRNAME = 'mithi_model_store'
+ARTIFACT_SUFFIX = '.joblib'
+
+# Complete versions kept on disk (the current one included), for rollback
+KEEP_VERSIONS = 3
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+class ArtifactError(Exception):
+    """Raised when a stored version is missing, incomplete or fails verification"""
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _new_version_id():
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}"
+
+
+def write_artifacts(store_path, artifacts, feature_columns=None, metrics=None, keep_versions=KEEP_VERSIONS):
+    """
+    Publish a dict of named artifacts as a new version and make it current.
+    The version directory and its manifest are completed before CURRENT is switched
+    to it with an atomic rename; older versions beyond keep_versions are removed.
+    Returns the manifest.
+    """
+    version = _new_version_id()
+    versions_dir = os.path.join(store_path, VERSIONS_DIRNAME)
+    tmp_dir = os.path.join(versions_dir, f'{version}.tmp')
+    os.makedirs(tmp_dir)
+
+    files = {}
+    for name, artifact in artifacts.items():
+        filename = f'{name}{ARTIFACT_SUFFIX}'
+        path = os.path.join(tmp_dir, filename)
+        # Uncompressed, so the arrays can be memory-mapped on load
+        joblib.dump(artifact, path, compress=0)
+        files[name] = {
+            'filename': filename,
+            'sha256': file_sha256(path),
+            'size': os.path.getsize(path)
+        }
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'libraries': {'scikit-learn': sklearn.__version__, 'numpy': np.__version__, 'joblib': joblib.__version__},
+        'files': files,
+        'feature_columns': feature_columns or {},
+        'metrics': metrics or {}
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Publish: finished directory first, then the pointer
+    os.rename(tmp_dir, os.path.join(versions_dir, version))
+    set_current_version(store_path, version)
+
+    _prune_versions(versions_dir, version, keep_versions)
+    return manifest
+
+
+def set_current_version(store_path, version):
+    """Point CURRENT at an existing version (also used to roll back)"""
+    if not os.path.isfile(os.path.join(store_path, VERSIONS_DIRNAME, version, MANIFEST_FILENAME)):
+        raise ArtifactError(f'Unknown model version: {version}')
+    pointer_tmp = os.path.join(store_path, f'{CURRENT_FILENAME}.tmp-{os.getpid()}')
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(store_path, CURRENT_FILENAME))
+
+
+def _prune_versions(versions_dir, current, keep_versions):
+    """Remove all but the newest keep_versions complete versions (never the current one)"""
+    versions = sorted(name for name in os.listdir(versions_dir) if not name.endswith('.tmp'))
+    for name in versions[:-keep_versions] if keep_versions > 0 else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+def store_exists(store_path):
+    return os.path.isfile(os.path.join(store_path, CURRENT_FILENAME))
+
+
+def current_version(store_path):
+    with open(os.path.join(store_path, CURRENT_FILENAME)) as f:
+        return f.read().strip()
+
+
+def list_versions(store_path):
+    """Complete versions on disk, oldest first"""
+    versions_dir = os.path.join(store_path, VERSIONS_DIRNAME)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(name for name in os.listdir(versions_dir) if not name.endswith('.tmp'))
+
+
+def read_manifest(store_path, version=None):
+    version = version or current_version(store_path)
+    path = os.path.join(store_path, VERSIONS_DIRNAME, version, MANIFEST_FILENAME)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ArtifactError(f'Model version {version} has no manifest')
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format: {manifest.get('format_version')}")
+    return manifest
+
+
+def load_artifacts(store_path, version=None, mmap_mode='r', verify=True):
+    """
+    Load every artifact of a version (the current one by default).
+    Returns (manifest, {name: object}). With verify, each file's SHA-256 is checked
+    against the manifest first, so a corrupted or swapped file is never unpickled.
+    """
+    manifest = read_manifest(store_path, version)
+    version_path = os.path.join(store_path, VERSIONS_DIRNAME, manifest['version'])
+
+    artifacts = {}
+    for name, entry in manifest['files'].items():
+        path = os.path.join(version_path, entry['filename'])
+        if not os.path.isfile(path):
+            raise ArtifactError(f"Model version {manifest['version']} is missing {entry['filename']}")
+        if verify and file_sha256(path) != entry['sha256']:
+            raise ArtifactError(f"Checksum mismatch for {entry['filename']} in model version {manifest['version']}")
+        artifacts[name] = joblib.load(path, mmap_mode=mmap_mode)
+    return manifest, artifacts
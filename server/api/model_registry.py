@@ -0,0 +1,194 @@
+"""
+ML model registry
+Models are loaded lazily on first use, not at import time, so management commands
+never pay for them. Every load produces an immutable ModelBundle; a reload builds
+the new bundle completely and then replaces the current reference in one step, so
+a request that took a bundle keeps a consistent set of models even mid-reload.
+
+Models come from the current version of the artifact store (model_artifacts) in
+MITHI_ML_MODEL_DIR, memory-mapped and checksum-verified; the loose pickle files
+of older training runs are still read when no store exists.
+"""
+
+import os
+import threading
+from collections import deque
+from datetime import datetime
+import joblib
+import numpy as np
+from django.conf import settings
+from .model_artifacts import DEFAULT_ARTIFACTS_DIRNAME, load_artifacts, store_exists
+from .forest import FlatForest
+from .fused_regression import FusedRegression
+from .inference_pool import get_inference_pool
+
+# Loose model files of older training runs; the keys are also the artifact names
+MODEL_FILES = {
+    'regression_models': 'mithi_regression_models.pkl',
+    'regression_scalers': 'mithi_regression_scalers.pkl',
+    'classifier_model': 'mithi_classifier_model.pkl',
+    'classifier_scaler': 'mithi_classifier_scaler.pkl',
+    'location_encoder': 'location_encoder.pkl',
+    'model_metadata': 'model_metadata.pkl',
+}
+
+# Previous bundles kept loaded next to the current one
+KEEP_VERSIONS = 2
+
+# Targets predicted by the regression models, in response order
+REGRESSION_TARGETS = ['TDS', 'BOD', 'COD']
+
+# Largest batch classified with the flat forest; beyond it sklearn's compiled
+# traversal is faster (both give identical probabilities)
+FLAT_FOREST_MAX_ROWS = 1024
+
+
+def get_model_dir():
+    """Directory holding the trained model files (MITHI_ML_MODEL_DIR setting)"""
+    return str(getattr(settings, 'MITHI_ML_MODEL_DIR', settings.BASE_DIR))
+
+
+class ModelBundle:
+    """One consistent set of trained models; never modified after loading"""
+
+    def __init__(self, models, version, source, manifest=None):
+        self.regression_models = models['regression_models']
+        self.regression_scalers = models['regression_scalers']
+        self.classifier_model = models['classifier_model']
+        self.classifier_scaler = models['classifier_scaler']
+        self.location_encoder = models['location_encoder']
+        self.model_metadata = models['model_metadata']
+        # Serving forms exported by training; derived here for artifacts that predate them
+        if models.get('regression_fused') is not None:
+            self.regression_fused = FusedRegression.from_arrays(models['regression_fused'])
+        else:
+            self.regression_fused = FusedRegression.from_sklearn(self.regression_models, self.regression_scalers,
+                                                                 REGRESSION_TARGETS)
+        if models.get('classifier_forest') is not None and 'missing_right' in models['classifier_forest']:
+            self.classifier_forest = FlatForest.from_arrays(models['classifier_forest'])
+        else:
+            self.classifier_forest = FlatForest.from_sklearn(self.classifier_model, self.classifier_scaler)
+        self.version = version
+        self.source = source
+        self.manifest = manifest or {}
+        self.loaded_at = datetime.now().isoformat()
+
+    @property
+    def locations(self):
+        return self.location_encoder.classes_.tolist()
+
+    def classify_proba(self, features):
+        """Class probabilities (in classifier_model.classes_ order) for unscaled classifier features"""
+        if len(features) <= FLAT_FOREST_MAX_ROWS:
+            return self.classifier_forest.predict_proba(features)
+        return self.classifier_model.predict_proba(self.classifier_scaler.transform(features))
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'source': self.source,
+            'artifact_version': self.manifest.get('version'),
+            'trained_at': self.manifest.get('created_at'),
+            'loaded_at': self.loaded_at
+        }
+
+
+def get_artifact_store_path(model_dir):
+    return os.path.join(model_dir, DEFAULT_ARTIFACTS_DIRNAME)
+
+
+def load_model_bundle(model_dir, version, artifact_version=None):
+    """
+    Read the current (or the given) artifact version, or the loose model files, of a
+    directory into a new bundle
+    """
+    store_path = get_artifact_store_path(model_dir)
+    if store_exists(store_path):
+        manifest, models = load_artifacts(store_path, artifact_version)
+        missing = set(MODEL_FILES) - set(models)
+        if missing:
+            raise ValueError(f"Model version {manifest['version']} lacks: {', '.join(sorted(missing))}")
+        return ModelBundle(models, version, store_path, manifest)
+
+    models = {key: joblib.load(os.path.join(model_dir, filename), mmap_mode='r') for key, filename in MODEL_FILES.items()}
+    return ModelBundle(models, version, model_dir)
+
+
+class ModelRegistry:
+    """Holds the current ModelBundle plus a few previous ones"""
+
+    def __init__(self, loader=load_model_bundle, keep_versions=KEEP_VERSIONS):
+        self._loader = loader
+        self._current = None
+        self._previous = deque(maxlen=keep_versions)
+        self._load_lock = threading.Lock()
+        self._next_version = 1
+        self.last_error = None
+
+    def get(self):
+        """
+        Current bundle, loading it on first use; None if the models cannot be loaded.
+        Reading the reference takes no lock; only the first load is serialized.
+        """
+        bundle = self._current
+        if bundle is not None:
+            return bundle
+        with self._load_lock:
+            if self._current is None:
+                self._load_locked()
+            return self._current
+
+    def reload(self):
+        """Load a fresh bundle and swap it in; returns it (None and the old bundle kept on failure)"""
+        with self._load_lock:
+            return self._load_locked()
+
+    def _load_locked(self):
+        version = self._next_version
+        try:
+            bundle = self._loader(get_model_dir(), version)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error loading ML models: {str(e)}")
+            return None
+
+        self._next_version += 1
+        if self._current is not None:
+            self._previous.append(self._current)
+        # Single reference assignment: readers see either the old or the new bundle
+        self._current = bundle
+        self.last_error = None
+        print(f"ML models loaded successfully! (version {bundle.version})")
+        return bundle
+
+    def versions(self):
+        """Loaded bundles, current first"""
+        current = self._current
+        return ([current] if current is not None else []) + list(reversed(self._previous))
+
+    def warm_up(self):
+        """
+        Load the models and run one prediction through each, so the first real request
+        does not pay for unpickling or lazy library initialisation
+        """
+        bundle = self.get()
+        if bundle is None:
+            return False
+        location = bundle.location_encoder.transform(bundle.location_encoder.classes_[:1])[0]
+        bundle.regression_fused.predict(np.array([[2024, location, 25.0, 5.0, 7.0]], dtype=np.float64))
+        classifier_features = np.array([[2024, location, 25.0, 5.0, 7.0, 500.0, 10.0, 50.0]], dtype=np.float64)
+        bundle.classify_proba(classifier_features)
+        pool = get_inference_pool()
+        if pool is not None:
+            pool.warm_up(bundle, classifier_features)
+        return True
+
+
+# Shared registry for every request in this process
+model_registry = ModelRegistry()
+
+
+def warm_up_if_configured():
+    """Preload models at server start when MITHI_ML_PRELOAD is enabled"""
+    if getattr(settings, 'MITHI_ML_PRELOAD', False):
+        model_registry.warm_up()
@@ -0,0 +1,114 @@
+"""
+ML prediction cache
+Dashboards and partner integrations send the same station, year and readings over
+and over, so single-row prediction results are kept in a bounded LRU cache keyed
+on the normalized inputs. Readings are rounded to MITHI_ML_CACHE_DECIMALS places
+before both the lookup and the prediction, so one key always maps to one result.
+
+Entries belong to one model version: the first lookup made with a newer bundle
+empties the cache, so a reload never serves predictions of the old models. Model
+versions only increase, so a request still holding an older bundle mid-reload
+bypasses the cache instead of emptying it again.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_DECIMALS = 4
+
+
+class PredictionCache:
+    """Thread-safe LRU of prediction results for one model version at a time"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, decimals=DEFAULT_CACHE_DECIMALS):
+        self.max_entries = max_entries
+        self.decimals = decimals
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def normalize(self, value):
+        """A reading as used for both the cache key and the prediction; ValueError unless finite"""
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(f'{value} is not a finite number')
+        return round(value, self.decimals) if self.enabled else value
+
+    def _check_version(self, model_version):
+        """Whether entries of model_version can be used, moving the cache to it if newer"""
+        # Called with the lock held
+        if self._model_version is None or model_version > self._model_version:
+            self._entries.clear()
+            self._model_version = model_version
+        return model_version == self._model_version
+
+    def get(self, model_version, key):
+        """Cached result for key under this model version, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            result = self._entries.get(key) if self._check_version(model_version) else None
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, model_version, key, result):
+        """Store a result; it must not be modified afterwards"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._check_version(model_version):
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'model_version': self._model_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+_cache_lock = threading.Lock()
+_prediction_cache = None
+
+
+def get_prediction_cache():
+    """Process-wide cache sized by MITHI_ML_CACHE_SIZE (0 disables caching)"""
+    global _prediction_cache
+    if _prediction_cache is None:
+        with _cache_lock:
+            if _prediction_cache is None:
+                _prediction_cache = PredictionCache(
+                    int(getattr(settings, 'MITHI_ML_CACHE_SIZE', DEFAULT_CACHE_SIZE)),
+                    int(getattr(settings, 'MITHI_ML_CACHE_DECIMALS', DEFAULT_CACHE_DECIMALS))
+                )
+    return _prediction_cache
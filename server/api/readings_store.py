@@ -0,0 +1,480 @@
+"""
+Append-only time-series store for live sensor readings
+Batches are validated column-wise and written as immutable .npz chunks into one
+directory per UTC day. Publishing is serialized across worker processes by an
+append lock, so chunk sequence numbers (the `since=` cursors) become visible in
+increasing order, and each chunk is recorded in a publish log so readers can find
+chunks written into any partition, including backfills of old days.
+"""
+
+import io
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .rules import get_rule_engine
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_READINGS_DIRNAME = 'readings_store'
+LOCK_FILENAME = 'append.lock'
+# Sequence number of the last published chunk, written after the chunk is visible
+SEQUENCE_FILENAME = 'SEQUENCE'
+# One "<sequence> <day>" line per published chunk, appended before SEQUENCE advances
+PUBLISH_LOG_FILENAME = 'PUBLISHED'
+
+READING_PARAMETERS = ['Temp', 'pH', 'DO', 'TDS', 'BOD', 'COD']
+
+# Physically plausible bounds; readings outside them are rejected
+VALID_RANGES = {
+    'Temp': (-5.0, 60.0),
+    'pH': (0.0, 14.0),
+    'DO': (0.0, 25.0),
+    'TDS': (0.0, 100000.0),
+    'BOD': (0.0, 1000.0),
+    'COD': (0.0, 5000.0),
+}
+
+# Accepted spellings of each field (matched case-insensitively)
+FIELD_ALIASES = {
+    'station': 'station',
+    'location': 'station',
+    'timestamp': 'timestamp',
+    'time': 'timestamp',
+    'temp': 'Temp',
+    'temperature': 'Temp',
+    'ph': 'pH',
+    'do': 'DO',
+    'dissolved_oxygen': 'DO',
+    'tds': 'TDS',
+    'bod': 'BOD',
+    'cod': 'COD',
+}
+
+# Errors reported back to the client per batch
+MAX_REPORTED_ERRORS = 100
+
+# Sensor clocks may run this far ahead of ours; later timestamps are rejected
+MAX_CLOCK_SKEW = pd.Timedelta(minutes=5)
+# Oldest reading accepted (backfills of a sensor's buffered history are fine, typos are not)
+MAX_READING_AGE = pd.Timedelta(days=3650)
+
+
+def readings_from_csv(text):
+    """DataFrame of raw readings from CSV text"""
+    return pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False)
+
+
+def readings_from_records(records):
+    """DataFrame of raw readings from a list of JSON objects"""
+    return pd.DataFrame.from_records(records)
+
+
+def validate_readings(raw, now=None):
+    """
+    Validate a batch of raw readings column-wise.
+    Timestamps must lie between now - MAX_READING_AGE and now + MAX_CLOCK_SKEW.
+    Returns (valid, errors): valid is a frame with station, timestamp (UTC) and
+    float parameter columns; errors lists {'index', 'error'} for rejected rows.
+    """
+    raw = _canonical_columns(raw)
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+    n = len(raw)
+
+    for required in ('station', 'timestamp'):
+        if required not in raw.columns:
+            return _empty_readings(), [{'index': None, 'error': f'Missing required field: {required}'}]
+
+    station = raw['station'].astype(str).str.strip()
+    timestamp = pd.to_datetime(raw['timestamp'], utc=True, errors='coerce', format='ISO8601')
+
+    problems = {
+        'missing station': raw['station'].isna().to_numpy() | (station == '').to_numpy(),
+        'invalid timestamp': timestamp.isna().to_numpy(),
+        'timestamp is in the future': (timestamp > now + MAX_CLOCK_SKEW).to_numpy(),
+        f'timestamp older than {MAX_READING_AGE.days} days': (timestamp < now - MAX_READING_AGE).to_numpy(),
+    }
+
+    values = {}
+    for parameter in READING_PARAMETERS:
+        if parameter not in raw.columns:
+            values[parameter] = np.full(n, np.nan)
+            continue
+        column = raw[parameter]
+        provided = column.notna().to_numpy() & (column.astype(str).str.strip() != '').to_numpy()
+        numeric = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64)
+        low, high = VALID_RANGES[parameter]
+        problems[f'{parameter} is not a number'] = provided & np.isnan(numeric)
+        problems[f'{parameter} outside {low}-{high}'] = (numeric < low) | (numeric > high)
+        values[parameter] = numeric
+
+    measured = np.zeros(n, dtype=bool)
+    for parameter in READING_PARAMETERS:
+        measured |= ~np.isnan(values[parameter])
+    problems['no measurements'] = ~measured
+
+    invalid = np.zeros(n, dtype=bool)
+    for mask in problems.values():
+        invalid |= mask
+
+    errors = []
+    for index in np.flatnonzero(invalid)[:MAX_REPORTED_ERRORS]:
+        reasons = [reason for reason, mask in problems.items() if mask[index]]
+        errors.append({'index': int(index), 'error': ', '.join(reasons)})
+
+    keep = ~invalid
+    valid = pd.DataFrame({
+        'station': station.to_numpy()[keep],
+        'timestamp': timestamp.to_numpy()[keep],
+        **{parameter: values[parameter][keep].astype(np.float32) for parameter in READING_PARAMETERS}
+    })
+    return valid, errors
+
+
+def _canonical_columns(raw):
+    """Rename aliased fields; when several aliases of one field are present, the first non-empty wins"""
+    groups = {}
+    for name in raw.columns:
+        groups.setdefault(FIELD_ALIASES.get(str(name).strip().lower(), name), []).append(name)
+
+    columns = {}
+    for field, names in groups.items():
+        column = raw[names[0]]
+        for name in names[1:]:
+            column = column.where(column.notna() & (column.astype(str).str.strip() != ''), raw[name])
+        columns[field] = column
+    return pd.DataFrame(columns, index=raw.index)
+
+
+def _empty_readings():
+    return pd.DataFrame({
+        'station': np.array([], dtype=str),
+        'timestamp': pd.to_datetime(np.array([], dtype='datetime64[ns]'), utc=True),
+        **{parameter: np.array([], dtype=np.float32) for parameter in READING_PARAMETERS}
+    })
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock on a file, held across processes for the duration of the block"""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ReadingStore:
+    """Day-partitioned, append-only chunk files under one root directory"""
+
+    def __init__(self, path):
+        self.path = path
+        self._counter = itertools.count()
+        self.latest_index = LatestReadingIndex(self)
+
+    def _partition_dir(self, day):
+        return os.path.join(self.path, f'date={day}')
+
+    def last_sequence(self):
+        """Sequence number of the newest published chunk (None before the first append)"""
+        try:
+            with open(os.path.join(self.path, SEQUENCE_FILENAME)) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return None
+
+    def _write_sequence(self, sequence):
+        tmp_path = os.path.join(self.path, f'.{SEQUENCE_FILENAME}-{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(str(sequence))
+        os.replace(tmp_path, os.path.join(self.path, SEQUENCE_FILENAME))
+
+    def append(self, readings):
+        """Write validated readings, one new chunk per UTC day touched; returns rows written"""
+        if len(readings) == 0:
+            return 0
+
+        timestamps = readings['timestamp'].dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+        days = timestamps.astype('datetime64[D]')
+        staged = []
+        for day in np.unique(days):
+            mask = days == day
+            partition = self._partition_dir(str(day))
+            os.makedirs(partition, exist_ok=True)
+
+            tmp_path = os.path.join(partition, f'.chunk-{os.getpid()}-{next(self._counter)}.tmp.npz')
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    timestamp=timestamps[mask].astype(np.int64),
+                    station=readings['station'].to_numpy(dtype=str)[mask],
+                    **{parameter: readings[parameter].to_numpy(dtype=np.float32)[mask]
+                       for parameter in READING_PARAMETERS}
+                )
+            staged.append((partition, tmp_path))
+
+        # Sequence numbers are taken and published under the append lock, and SEQUENCE
+        # is only advanced once the chunks are visible: every chunk at or below the
+        # value a reader sees in SEQUENCE is already listed. They follow the clock
+        # (nanoseconds) so cursors issued before the lock existed stay comparable
+        with _file_lock(os.path.join(self.path, LOCK_FILENAME)):
+            sequence = self.last_sequence() or 0
+            published = []
+            for day, (partition, tmp_path) in zip(np.unique(days), staged):
+                sequence = max(sequence + 1, time.time_ns())
+                os.replace(tmp_path, os.path.join(partition, f'chunk-{sequence}-{os.getpid()}-{next(self._counter)}.npz'))
+                published.append(f'{sequence} {day}\n')
+            with open(os.path.join(self.path, PUBLISH_LOG_FILENAME), 'a') as f:
+                f.write(''.join(published))
+            self._write_sequence(sequence)
+        self.latest_index.refresh()
+        return len(readings)
+
+    def publish_log_end(self):
+        """Byte offset of the end of the publish log, taken while no append is in progress"""
+        if not os.path.isdir(self.path):
+            return 0
+        with _file_lock(os.path.join(self.path, LOCK_FILENAME)):
+            try:
+                return os.path.getsize(os.path.join(self.path, PUBLISH_LOG_FILENAME))
+            except FileNotFoundError:
+                return 0
+
+    def published_since(self, offset):
+        """
+        (chunks, offset): (sequence, day) of every chunk logged after a byte offset of the
+        publish log, and the offset to continue from. A line still being written is left
+        for the next call.
+        """
+        try:
+            with open(os.path.join(self.path, PUBLISH_LOG_FILENAME), 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+        end = data.rfind(b'\n') + 1
+        chunks = []
+        for line in data[:end].decode().splitlines():
+            sequence, day = line.split()
+            chunks.append((int(sequence), day))
+        return chunks, offset + end
+
+    def partitions(self):
+        """UTC days with data, oldest first"""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name[len('date='):] for name in os.listdir(self.path) if name.startswith('date='))
+
+    def chunk_names(self, day):
+        """Published chunks of one UTC day"""
+        return sorted(name for name in os.listdir(self._partition_dir(day))
+                      if name.startswith('chunk-') and name.endswith('.npz'))
+
+    def read_chunk(self, day, name):
+        """Dict of column arrays stored in one chunk"""
+        with np.load(os.path.join(self._partition_dir(day), name), allow_pickle=False) as chunk:
+            return {key: chunk[key] for key in chunk.files}
+
+    def read_partition(self, day):
+        """All readings of one UTC day as a frame, ordered by timestamp"""
+        chunks = [self.read_chunk(day, name) for name in self.chunk_names(day)]
+        if not chunks:
+            return _empty_readings()
+
+        frame = pd.DataFrame({
+            'station': np.concatenate([c['station'] for c in chunks]).astype(object),
+            'timestamp': pd.to_datetime(np.concatenate([c['timestamp'] for c in chunks]), utc=True),
+            **{parameter: np.concatenate([c[parameter] for c in chunks]) for parameter in READING_PARAMETERS}
+        })
+        return frame.sort_values('timestamp', kind='stable', ignore_index=True)
+
+
+
+def utc_timestamp(ns):
+    """UTC pd.Timestamp for a nanosecond epoch value"""
+    return pd.Timestamp(ns, tz='UTC')
+
+
+def _rounded(value, digits):
+    """Rounded float, or None for a parameter the sensor did not report"""
+    return None if value != value else round(float(value), digits)
+
+
+def reading_wqi(values):
+    """WQI of one reading, or None unless every parameter was reported"""
+    if any(values[parameter] != values[parameter] for parameter in READING_PARAMETERS):
+        return None
+    wqi = get_rule_engine().calculate_wqi(values['Temp'], values['DO'], values['pH'], values['TDS'], values['BOD'], values['COD'])
+    return round(float(wqi), 1)
+
+
+def reading_payload(entry):
+    """API representation of one LatestReadingIndex entry"""
+    values = entry['values']
+    timestamp = utc_timestamp(entry['timestamp'])
+    return {
+        'location': entry['station'],
+        'timestamp': timestamp.isoformat(),
+        'temperature': _rounded(values['Temp'], 1),
+        'ph': _rounded(values['pH'], 1),
+        'dissolved_oxygen': _rounded(values['DO'], 1),
+        'tds': None if values['TDS'] != values['TDS'] else int(values['TDS']),
+        'bod': _rounded(values['BOD'], 1),
+        'cod': _rounded(values['COD'], 1),
+        'wqi': reading_wqi(values),
+        'year': timestamp.year,
+        'last_known': {
+            parameter: {
+                'value': round(value, 2),
+                'timestamp': utc_timestamp(at).isoformat()
+            }
+            for parameter, (value, at) in entry['last_known'].items()
+        }
+    }
+
+
+def chunk_sequence(name):
+    """Sequence number encoded in a chunk file name"""
+    return int(name.split('-')[1])
+
+
+class LatestReadingIndex:
+    """
+    Last known value of every station, and of every parameter per station.
+    Built once from the newest partitions, then kept current by folding in only the
+    chunks named in the publish log since the previous refresh, whichever day they
+    were written to; a refresh with nothing new reads the empty tail of the log, so
+    reads never scan history.
+    """
+
+    def __init__(self, store, bootstrap_days=7):
+        self.store = store
+        self.bootstrap_days = bootstrap_days
+        self._lock = threading.Lock()
+        self._stations = {}
+        self._log_offset = None
+        self.cursor = 0
+
+    def refresh(self):
+        """Fold chunks published since the last refresh (also picks up other workers' writes)"""
+        with self._lock:
+            if not os.path.isdir(self.store.path):
+                return
+            # Read before listing: every chunk up to this sequence is visible below
+            published = self.store.last_sequence()
+
+            folded = []
+            if self._log_offset is None:
+                # Chunks logged after this offset are folded again below; folding is idempotent
+                self._log_offset = self.store.publish_log_end()
+                for day in self.store.partitions()[-self.bootstrap_days:]:
+                    for name in self.store.chunk_names(day):
+                        folded.append(chunk_sequence(name))
+                        self._fold(self.store.read_chunk(day, name), folded[-1])
+
+            logged, self._log_offset = self.store.published_since(self._log_offset)
+            touched = {}
+            for sequence, day in logged:
+                touched.setdefault(day, set()).add(sequence)
+            for day, sequences in touched.items():
+                for name in self.store.chunk_names(day):
+                    if chunk_sequence(name) in sequences:
+                        folded.append(chunk_sequence(name))
+                        self._fold(self.store.read_chunk(day, name), folded[-1])
+
+            # Stores written before SEQUENCE existed: the newest chunk seen
+            if published is None and folded:
+                published = max(folded)
+            if published is not None:
+                self.cursor = max(self.cursor, published)
+
+    def _fold(self, chunk, sequence):
+        """Merge one chunk into the index; newer measurement timestamps win"""
+        timestamps = chunk['timestamp']
+        stations = chunk['station']
+        order = np.argsort(timestamps, kind='stable')
+        stations, timestamps = stations[order], timestamps[order]
+
+        # Position of the newest row per station (last occurrence after sorting)
+        names, last = np.unique(stations[::-1], return_index=True)
+        last = len(stations) - 1 - last
+
+        values = {parameter: chunk[parameter][order] for parameter in READING_PARAMETERS}
+        last_known = {}
+        for parameter, column in values.items():
+            rows = np.flatnonzero(~np.isnan(column))
+            present, newest = np.unique(stations[rows][::-1], return_index=True)
+            last_known[parameter] = dict(zip(present.tolist(), rows[len(rows) - 1 - newest].tolist()))
+
+        for station, row in zip(names.tolist(), last.tolist()):
+            entry = self._stations.get(station)
+            if entry is None:
+                entry = self._stations[station] = {'station': station, 'timestamp': None, 'values': {}, 'last_known': {}}
+            changed = False
+            if entry['timestamp'] is None or timestamps[row] >= entry['timestamp']:
+                entry['timestamp'] = int(timestamps[row])
+                entry['values'] = {parameter: float(values[parameter][row]) for parameter in READING_PARAMETERS}
+                changed = True
+            for parameter in READING_PARAMETERS:
+                known_row = last_known[parameter].get(station)
+                if known_row is None:
+                    continue
+                known = entry['last_known'].get(parameter)
+                if known is None or timestamps[known_row] >= known[1]:
+                    entry['last_known'][parameter] = (float(values[parameter][known_row]), int(timestamps[known_row]))
+                    changed = True
+            if changed:
+                entry['updated'] = sequence
+
+    def latest(self, since=None):
+        """
+        (entries, cursor): station entries newest first, limited to those updated after
+        the `since` cursor when one is given, and the cursor to poll with next.
+        The cursor is the last sequence known to be fully published, so a chunk that
+        appears while a poll is in flight may be delivered twice but never skipped.
+        """
+        self.refresh()
+        with self._lock:
+            entries = [entry for entry in self._stations.values()
+                       if since is None or entry['updated'] > since]
+            entries = [dict(entry, values=dict(entry['values']), last_known=dict(entry['last_known']))
+                       for entry in entries]
+            cursor = self.cursor
+        entries.sort(key=lambda entry: entry['timestamp'], reverse=True)
+        return entries, cursor
+
+
+_store_lock = threading.Lock()
+_reading_store = None
+
+
+def get_readings_store_path():
+    """Root of the readings store (overridable with the MITHI_READINGS_STORE_PATH setting)"""
+    return str(getattr(settings, 'MITHI_READINGS_STORE_PATH', os.path.join(settings.BASE_DIR, DEFAULT_READINGS_DIRNAME)))
+
+
+def get_reading_store():
+    """Process-wide ReadingStore for the configured path"""
+    global _reading_store
+    path = get_readings_store_path()
+    with _store_lock:
+        if _reading_store is None or _reading_store.path != path:
+            _reading_store = ReadingStore(path)
+        return _reading_store
@@ -0,0 +1,172 @@
+"""
+Water quality rule engine
+One place for every threshold the API applies: parameter status bands (the
+dashboard's "Normal Range", "Low", ...), WQI risk levels and the WQI sub-index
+breakpoints. Tables are compiled once into sorted cut arrays and evaluated with
+binary search, for a single value or a whole column.
+
+Rules can be replaced per deployment (e.g. IS 10500 or CPCB limits) with the
+MITHI_WATER_QUALITY_RULES setting: a dict or the path of a JSON file shaped like
+{"status": {...}, "wqi": {"breakpoints": {...}, "weights": {...}}}; anything left
+out keeps the defaults below.
+
+Importing this module does not require Django, so standalone scripts can use it.
+"""
+
+import json
+import threading
+import numpy as np
+from .wqi import DEFAULT_WQI_BREAKPOINTS, DEFAULT_WQI_WEIGHTS, WQIEngine
+
+# Bands in ascending value order. 'below': value < bound, 'upto': value <= bound;
+# the last band takes everything above.
+DEFAULT_STATUS_RULES = {
+    'Temp': [
+        {'below': 20, 'category': 'cool', 'color': 'blue', 'message': 'Cool'},
+        {'upto': 30, 'category': 'optimal', 'color': 'green', 'message': 'Optimal'},
+        {'category': 'warm', 'color': 'orange', 'message': 'Warm'},
+    ],
+    'pH': [
+        {'below': 6.5, 'category': 'acidic', 'color': 'red', 'message': 'Acidic'},
+        {'upto': 8.5, 'category': 'normal', 'color': 'green', 'message': 'Normal Range'},
+        {'category': 'alkaline', 'color': 'orange', 'message': 'Alkaline'},
+    ],
+    'DO': [
+        {'below': 4, 'category': 'low', 'color': 'red', 'message': 'Low'},
+        {'below': 6, 'category': 'good', 'color': 'blue', 'message': 'Good'},
+        {'category': 'excellent', 'color': 'green', 'message': 'Excellent'},
+    ],
+    'TDS': [
+        {'upto': 300, 'category': 'excellent', 'color': 'green', 'message': 'Excellent'},
+        {'upto': 600, 'category': 'good', 'color': 'blue', 'message': 'Good'},
+        {'upto': 900, 'category': 'fair', 'color': 'orange', 'message': 'Fair'},
+        {'category': 'poor', 'color': 'red', 'message': 'Poor'},
+    ],
+    'BOD': [
+        {'upto': 3, 'category': 'excellent', 'color': 'green', 'message': 'Excellent'},
+        {'upto': 6, 'category': 'good', 'color': 'blue', 'message': 'Good'},
+        {'category': 'poor', 'color': 'red', 'message': 'High'},
+    ],
+    'COD': [
+        {'upto': 50, 'category': 'good', 'color': 'green', 'message': 'Good'},
+        {'upto': 100, 'category': 'moderate', 'color': 'orange', 'message': 'Moderate'},
+        {'category': 'poor', 'color': 'red', 'message': 'High'},
+    ],
+    # Risk level of a WQI score
+    'WQI': [
+        {'below': 40, 'category': 'critical', 'color': 'red', 'message': 'Critical'},
+        {'below': 60, 'category': 'high', 'color': 'orange', 'message': 'High'},
+        {'below': 80, 'category': 'moderate', 'color': 'yellow', 'message': 'Moderate'},
+        {'category': 'low', 'color': 'green', 'message': 'Low'},
+    ],
+}
+
+# Status reported for a missing (NaN) value
+UNKNOWN_STATUS = {'category': 'unknown', 'color': 'gray', 'message': 'No data'}
+
+
+class StatusTable:
+    """Compiled status bands of one parameter"""
+
+    def __init__(self, bands):
+        if not bands or any('below' in band or 'upto' in band for band in bands[-1:]):
+            raise ValueError('The last status band must be open-ended')
+
+        # A 'below' cut moves values equal to the bound into the next band, an 'upto' cut does not
+        below = [band['below'] for band in bands[:-1] if 'below' in band]
+        upto = [band['upto'] for band in bands[:-1] if 'upto' in band]
+        if len(below) + len(upto) != len(bands) - 1:
+            raise ValueError("Every status band except the last needs 'below' or 'upto'")
+        cuts = [band.get('below', band.get('upto')) for band in bands[:-1]]
+        if cuts != sorted(cuts):
+            raise ValueError('Status bands must be in ascending order')
+
+        self._below = np.asarray(below, dtype=np.float64)
+        self._upto = np.asarray(upto, dtype=np.float64)
+        # Immutable results shared by every lookup; callers must not modify them
+        self.statuses = tuple(
+            {key: band[key] for key in ('category', 'color', 'message') if key in band}
+            for band in bands
+        ) + (UNKNOWN_STATUS,)
+
+    def codes(self, values):
+        """Band index per value (len(bands) for NaN)"""
+        values = np.asarray(values, dtype=np.float64)
+        codes = (np.searchsorted(self._below, values, side='right') +
+                 np.searchsorted(self._upto, values, side='left'))
+        return np.where(np.isnan(values), len(self.statuses) - 1, codes)
+
+    def status(self, value):
+        return self.statuses[int(self.codes(value))]
+
+
+class RuleEngine:
+    """Status tables plus the WQI engine built from one rules config"""
+
+    def __init__(self, rules=None):
+        rules = rules or {}
+        status_rules = dict(DEFAULT_STATUS_RULES, **rules.get('status', {}))
+        wqi_rules = rules.get('wqi', {})
+
+        self.status_tables = {parameter: StatusTable(bands) for parameter, bands in status_rules.items()}
+        self.wqi = WQIEngine(
+            dict(DEFAULT_WQI_BREAKPOINTS, **wqi_rules.get('breakpoints', {})),
+            wqi_rules.get('weights') or DEFAULT_WQI_WEIGHTS
+        )
+
+    def status(self, parameter, value):
+        """Status dict ({'category', 'color', 'message'}) of one value"""
+        return self.status_tables[parameter].status(value)
+
+    def status_codes(self, parameter, values):
+        """Band index array for a column; map through status_tables[parameter].statuses"""
+        return self.status_tables[parameter].codes(values)
+
+    def statuses(self, parameter, values):
+        """Status dict per value of a column"""
+        statuses = self.status_tables[parameter].statuses
+        return [statuses[code] for code in self.status_codes(parameter, values).tolist()]
+
+    def sub_index(self, parameter, values):
+        """WQI sub-index array of one parameter"""
+        return self.wqi.tables[parameter].sub_index(values)
+
+    def calculate_wqi(self, temperature, dissolved_oxygen, ph, tds, bod, cod):
+        """WQI array (see wqi.WQIEngine)"""
+        return self.wqi.calculate(temperature, dissolved_oxygen, ph, tds, bod, cod)
+
+    def risk_level(self, wqi):
+        return self.status('WQI', wqi)
+
+
+def load_rules(source):
+    """Rules config from a dict or a JSON file path"""
+    if source is None or isinstance(source, dict):
+        return source
+    with open(source) as f:
+        return json.load(f)
+
+
+# Engine with the built-in rules, for scripts that run without Django settings
+default_rule_engine = RuleEngine()
+
+_engine_lock = threading.Lock()
+_configured_engine = None
+
+
+def get_rule_engine():
+    """Engine for MITHI_WATER_QUALITY_RULES when Django settings are configured, else the defaults"""
+    global _configured_engine
+    if _configured_engine is not None:
+        return _configured_engine
+
+    try:
+        from django.conf import settings
+        source = getattr(settings, 'MITHI_WATER_QUALITY_RULES', None) if settings.configured else None
+    except ImportError:
+        source = None
+
+    with _engine_lock:
+        if _configured_engine is None:
+            _configured_engine = RuleEngine(load_rules(source)) if source else default_rule_engine
+    return _configured_engine
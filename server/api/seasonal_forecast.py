@@ -0,0 +1,240 @@
+"""
+Seasonal trend forecasting
+Each target is modelled as a linear trend plus Fourier terms for the yearly and
+weekly cycles:
+
+    y(t) = b0 + b1 t + sum_k (a_k sin(2 pi k t / P) + c_k cos(2 pi k t / P)) + noise
+
+for P = 365.25 and 7 days. Every target shares the same design matrix, so one
+factorization of X'X fits all of them in closed form; years of daily (or hourly)
+readings fit in tens of milliseconds per station.
+
+Prediction intervals combine the residual variance with the uncertainty of the
+fitted coefficients:
+
+    y_hat +- t(dof) * sigma * sqrt(1 + x (X'X)^-1 x')
+
+A model keeps the sufficient statistics of its fit (X'X, X'Y, sum of y^2 and the
+count), so new readings are added by recursive least squares in O(features^2)
+each, with no refit, and taken out again by the matching downdate. Every update
+also tracks how large the new readings' forecast errors are compared to the
+intervals; a sustained excess (drift) tells the caller the fit no longer
+describes the river and a full refit is due.
+
+This module has no Django dependency so the training scripts can use it too.
+"""
+
+import copy
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+YEAR_DAYS = 365.25
+WEEK_DAYS = 7
+# (period in days, number of harmonics)
+DEFAULT_SEASONALITIES = ((YEAR_DAYS, 3), (WEEK_DAYS, 2))
+DEFAULT_INTERVAL_LEVEL = 0.9
+
+# Batches up to this size are added reading by reading (Sherman-Morrison); larger
+# ones are added to the statistics in one step and re-solved
+RLS_MAX_BATCH = 64
+# Weight of each new reading in the drift statistic (about the last 1 / alpha readings)
+DRIFT_ALPHA = 0.05
+# Mean squared standardized forecast error that counts as drift (1 when the fit holds)
+DRIFT_THRESHOLD = 3.0
+# Readings since the fit before drift can be reported
+DRIFT_MIN_READINGS = 50
+
+
+def seasonal_feature_names(seasonalities=DEFAULT_SEASONALITIES):
+    names = ['intercept', 'trend']
+    for period, harmonics in seasonalities:
+        for k in range(1, harmonics + 1):
+            names += [f'sin_{period:g}d_{k}', f'cos_{period:g}d_{k}']
+    return names
+
+
+def seasonal_design(days, seasonalities=DEFAULT_SEASONALITIES):
+    """Design matrix (rows x seasonal_feature_names) for elapsed days since the origin"""
+    days = np.asarray(days, dtype=np.float64)
+    columns = [np.ones_like(days), days / YEAR_DAYS]
+    for period, harmonics in seasonalities:
+        angle = (2 * np.pi / period) * days
+        for k in range(1, harmonics + 1):
+            columns += [np.sin(k * angle), np.cos(k * angle)]
+    return np.column_stack(columns)
+
+
+def elapsed_days(dates, origin):
+    """Fractional days from origin for a DatetimeIndex (or anything pandas can convert)"""
+    return ((pd.DatetimeIndex(dates) - pd.Timestamp(origin)) / pd.Timedelta(days=1)).to_numpy(dtype=np.float64)
+
+
+def t_quantile(probability, dof):
+    """
+    Student-t quantile from the normal one (Cornish-Fisher expansion); within 0.5%
+    from 5 degrees of freedom, and the histories here have hundreds
+    """
+    z = NormalDist().inv_cdf(probability)
+    return (z + (z ** 3 + z) / (4 * dof)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2))
+
+
+class SeasonalModel:
+    """Least-squares trend + Fourier fit of several targets over one calendar"""
+
+    def __init__(self, targets, origin, xtx, xty, yty, n_samples, seasonalities=DEFAULT_SEASONALITIES):
+        self.targets = list(targets)
+        self.origin = pd.Timestamp(origin)
+        self.seasonalities = tuple(tuple(seasonality) for seasonality in seasonalities)
+        # Sufficient statistics: X'X, X'Y (n_features x n_targets), sum of y^2 per target
+        self.xtx = np.asarray(xtx, dtype=np.float64)
+        self.xty = np.asarray(xty, dtype=np.float64)
+        self.yty = np.asarray(yty, dtype=np.float64)
+        self.n_samples = int(n_samples)
+        self._solve()
+        # Exponentially weighted mean squared standardized error of the readings added since the fit
+        self.drift = 1.0
+        self.updates = 0
+
+    def _solve(self):
+        self.xtx_inv = np.linalg.inv(self.xtx)
+        # n_features x n_targets
+        self.coef = np.linalg.solve(self.xtx, self.xty)
+        # Residual sum of squares per target
+        self.rss = np.maximum(self.yty - (self.coef * self.xty).sum(axis=0), 0)
+
+    @property
+    def dof(self):
+        return max(self.n_samples - len(self.coef), 1)
+
+    @property
+    def sigma(self):
+        """Residual standard deviation per target"""
+        return np.sqrt(self.rss / self.dof)
+
+    @property
+    def drifted(self):
+        return self.updates >= DRIFT_MIN_READINGS and self.drift > DRIFT_THRESHOLD
+
+    @classmethod
+    def fit(cls, dates, values, targets, origin=None, seasonalities=DEFAULT_SEASONALITIES):
+        """Fit on readings (rows x targets) taken at dates; origin defaults to the first date"""
+        origin = pd.Timestamp(origin if origin is not None else pd.DatetimeIndex(dates).min())
+        X = seasonal_design(elapsed_days(dates, origin), seasonalities)
+        Y = np.asarray(values, dtype=np.float64)
+        n_features = X.shape[1]
+        if len(X) <= n_features:
+            raise ValueError(f'Need more than {n_features} readings to fit a seasonal model')
+        return cls(targets, origin, X.T @ X, X.T @ Y, (Y ** 2).sum(axis=0), len(X), seasonalities)
+
+    def to_arrays(self):
+        """Plain dict for storing (see from_arrays)"""
+        return {
+            'targets': self.targets,
+            'origin': self.origin.isoformat(),
+            'xtx': self.xtx,
+            'xty': self.xty,
+            'yty': self.yty,
+            'n_samples': self.n_samples,
+            'seasonalities': [list(seasonality) for seasonality in self.seasonalities]
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['targets'], arrays['origin'], arrays['xtx'], arrays['xty'], arrays['yty'],
+                   arrays['n_samples'], arrays['seasonalities'])
+
+    def updated(self, dates, values):
+        """
+        Copy of the model with readings (rows x targets) taken at dates added, by
+        recursive least squares; the model itself is not modified
+        """
+        X = self._design(dates)
+        Y = np.asarray(values, dtype=np.float64)
+        model = copy.copy(self)
+        if len(X) == 0:
+            return model
+
+        sigma2 = np.maximum(self.sigma ** 2, np.finfo(np.float64).tiny)
+        if len(X) <= RLS_MAX_BATCH:
+            xtx_inv, coef, rss = self.xtx_inv.copy(), self.coef.copy(), self.rss.copy()
+            z2 = np.empty(len(X))
+            for i, (x, y) in enumerate(zip(X, Y)):
+                px = xtx_inv @ x
+                denominator = 1 + x @ px
+                # Error of the forecast made before this reading, and its predicted variance
+                error = y - x @ coef
+                z2[i] = np.mean(error ** 2 / (sigma2 * denominator))
+                xtx_inv -= np.outer(px, px) / denominator
+                coef += np.outer(px / denominator, error)
+                rss += error ** 2 / denominator
+            model.xtx_inv, model.coef, model.rss = xtx_inv, coef, rss
+        else:
+            leverage = np.einsum('ij,jk,ik->i', X, self.xtx_inv, X)
+            z2 = np.mean((Y - X @ self.coef) ** 2 / (sigma2[None, :] * (1 + leverage)[:, None]), axis=1)
+
+        model.xtx = self.xtx + X.T @ X
+        model.xty = self.xty + X.T @ Y
+        model.yty = self.yty + (Y ** 2).sum(axis=0)
+        model.n_samples = self.n_samples + len(X)
+        if len(X) > RLS_MAX_BATCH:
+            model._solve()
+
+        # Exponential moving average over the readings in order
+        weights = DRIFT_ALPHA * (1 - DRIFT_ALPHA) ** np.arange(len(z2) - 1, -1, -1)
+        model.drift = (1 - DRIFT_ALPHA) ** len(z2) * self.drift + float(weights @ z2)
+        model.updates = self.updates + len(X)
+        return model
+
+    def removed(self, dates, values):
+        """
+        Copy of the model without readings it was fitted or updated with (a rank-one
+        downdate per reading); the drift statistic is left as it was
+        """
+        X = self._design(dates)
+        Y = np.asarray(values, dtype=np.float64)
+        model = copy.copy(self)
+        if len(X) == 0:
+            return model
+
+        model.xtx = self.xtx - X.T @ X
+        model.xty = self.xty - X.T @ Y
+        model.yty = self.yty - (Y ** 2).sum(axis=0)
+        model.n_samples = self.n_samples - len(X)
+        if len(X) <= RLS_MAX_BATCH:
+            xtx_inv, coef, rss = self.xtx_inv.copy(), self.coef.copy(), self.rss.copy()
+            for x, y in zip(X, Y):
+                px = xtx_inv @ x
+                denominator = 1 - x @ px
+                error = y - x @ coef
+                xtx_inv += np.outer(px, px) / denominator
+                coef -= np.outer(px / denominator, error)
+                rss -= error ** 2 / denominator
+            model.xtx_inv, model.coef, model.rss = xtx_inv, coef, np.maximum(rss, 0)
+        else:
+            model._solve()
+        return model
+
+    def r2(self, dates, values):
+        """Coefficient of determination per target on the given readings"""
+        Y = np.asarray(values, dtype=np.float64)
+        residuals = Y - self.predict_mean(dates)
+        return 1 - (residuals ** 2).sum(axis=0) / ((Y - Y.mean(axis=0)) ** 2).sum(axis=0)
+
+    def _design(self, dates):
+        return seasonal_design(elapsed_days(dates, self.origin), self.seasonalities)
+
+    def predict_mean(self, dates):
+        """Point forecasts (rows x targets)"""
+        return self._design(dates) @ self.coef
+
+    def predict(self, dates, level=DEFAULT_INTERVAL_LEVEL):
+        """(mean, half_width) arrays (rows x targets); the interval is mean +- half_width"""
+        X = self._design(dates)
+        mean = X @ self.coef
+        # x (X'X)^-1 x' for every row at once
+        leverage = np.einsum('ij,jk,ik->i', X, self.xtx_inv, X)
+        half_width = (t_quantile(0.5 + level / 2, self.dof)
+                      * np.sqrt(1 + leverage)[:, None] * self.sigma[None, :])
+        return mean, half_width
@@ -0,0 +1,86 @@
+"""Shared fixtures: synthetic river data in a temporary directory, small trained models"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from api import dataset
+from api.columnar_store import MEASUREMENT_COLUMNS
+from api.model_registry import REGRESSION_TARGETS
+
+LOCATIONS = ('Powai', 'Saki Naka', 'Kurla', 'Bandra', 'Mahim')
+
+
+def river_frame(n=500, seed=0, locations=LOCATIONS, years=(2019, 2025)):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'Year': rng.integers(years[0], years[1], n),
+        'Location': rng.choice(locations, n),
+        **{column: rng.normal(50, 10, n) for column in MEASUREMENT_COLUMNS},
+        'WQI': rng.choice(['Good', 'Moderate', 'Poor'], n),
+    })
+    frame.loc[rng.random(n) < 0.05, 'BOD'] = np.nan
+    return frame
+
+
+class TempDirMixin:
+    """self.tmp: a directory removed after the test"""
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+
+class RiverDataMixin(TempDirMixin):
+    """River CSV (and store path) in a temporary directory, used as the process dataset"""
+
+    def setUp(self):
+        super().setUp()
+        self.csv = os.path.join(self.tmp, 'river.csv')
+        self.store = os.path.join(self.tmp, 'store')
+        river_frame().round(2).to_csv(self.csv, index=False)
+        overrides = override_settings(MITHI_RIVER_DATA_PATH=self.csv, MITHI_RIVER_STORE_PATH=self.store)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        dataset._current_dataset = None
+        self.addCleanup(setattr, dataset, '_current_dataset', None)
+        self.factory = APIRequestFactory()
+
+    def touch(self, path):
+        """Move the file's mtime forward so the signature check sees the change"""
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+
+
+def trained_models(n=600, seed=0, n_estimators=20):
+    """Models shaped like train_mithi_models' output, trained on synthetic data"""
+    frame = river_frame(n, seed).dropna()
+    encoder = LabelEncoder().fit(frame['Location'])
+    frame = frame.assign(Location_encoded=encoder.transform(frame['Location']))
+
+    regression_X = frame[['Year', 'Location_encoded', 'Temp', 'DO', 'pH']].to_numpy(dtype=np.float64)
+    regression_models, regression_scalers = {}, {}
+    for target in REGRESSION_TARGETS:
+        scaler = StandardScaler().fit(regression_X)
+        regression_models[target] = LinearRegression().fit(scaler.transform(regression_X), frame[target])
+        regression_scalers[target] = scaler
+
+    classifier_X = frame[['Year', 'Location_encoded', 'Temp', 'DO', 'pH', 'TDS', 'BOD', 'COD']].to_numpy(dtype=np.float64)
+    classifier_scaler = StandardScaler().fit(classifier_X)
+    classifier = RandomForestClassifier(n_estimators, max_depth=8, random_state=seed)
+    classifier.fit(classifier_scaler.transform(classifier_X), frame['WQI'])
+
+    return {
+        'regression_models': regression_models,
+        'regression_scalers': regression_scalers,
+        'classifier_model': classifier,
+        'classifier_scaler': classifier_scaler,
+        'location_encoder': encoder,
+        'model_metadata': {'locations': encoder.classes_.tolist()},
+    }
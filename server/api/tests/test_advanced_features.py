@@ -0,0 +1,75 @@
+import json
+import numpy as np
+from django.test import SimpleTestCase
+from api import views
+from api.advanced_features import MAX_HEATMAP_GRID_SIZE, generate_pollution_sources, generate_sensor_network
+from .helpers import LOCATIONS, RiverDataMixin, river_frame
+
+
+class AdvancedFeaturesParameterTests(RiverDataMixin, SimpleTestCase):
+    def get(self, query=''):
+        response = views.get_advanced_features_data(self.factory.get('/api/advanced-features/' + query))
+        response.render()
+        return response, json.loads(response.content)
+
+    def test_defaults(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body['heatmap_data'])
+
+    def test_invalid_year(self):
+        for query in ('?year=abc', '?year=1800', '?year=2.5'):
+            response, body = self.get(query)
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('year', body['error'])
+
+    def test_invalid_grid_size(self):
+        for query in ('?grid_size=abc', '?grid_size=0', '?grid_size=21', f'?grid_size={MAX_HEATMAP_GRID_SIZE + 1}'):
+            response, body = self.get(query)
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('grid_size', body['error'])
+
+    def test_valid_year(self):
+        response, body = self.get('?year=2020')
+        self.assertEqual(response.status_code, 200)
+
+    def test_allowed_grid_sizes(self):
+        response, body = self.get('?grid_size=10')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(body['heatmap_data']), 100)
+        self.assertEqual(set(body['heatmap_data'][0]), {
+            'x', 'y', 'lat', 'lng', 'value', 'temperature', 'tds', 'bod', 'cod', 'dissolved_oxygen', 'location'
+        })
+
+    def test_station_year_without_a_parameter(self):
+        frame = river_frame().round(2)
+        year = int(frame['Year'].max())
+        in_year = frame['Year'] == year
+        frame.loc[in_year & (frame['Location'] == 'Kurla'), 'BOD'] = np.nan
+        frame.loc[in_year, 'COD'] = np.nan
+        frame.to_csv(self.csv, index=False)
+        self.touch(self.csv)
+
+        response, body = self.get(f'?year={year}&grid_size=10')
+        self.assertEqual(response.status_code, 200, body)
+        cells = body['heatmap_data']
+        self.assertEqual(len(cells), 100)
+        # Kurla is left out of the BOD surface only; a parameter no station has is null
+        self.assertTrue(all(isinstance(cell['bod'], float) for cell in cells))
+        self.assertTrue(all(cell['cod'] is None for cell in cells))
+        self.assertTrue(all(isinstance(cell['tds'], float) for cell in cells))
+
+
+class MissingReadingTests(SimpleTestCase):
+    def test_missing_readings_serialize_as_null(self):
+        frame = river_frame(50).assign(BOD=np.nan, TDS=np.nan)
+        rng = np.random.default_rng(0)
+
+        sensors = generate_sensor_network(frame, list(LOCATIONS), rng)
+        self.assertEqual(len(sensors), len(LOCATIONS))
+        self.assertTrue(all(sensor['bod'] is None and sensor['tds'] is None for sensor in sensors))
+        self.assertTrue(all(isinstance(sensor['cod'], float) for sensor in sensors))
+
+        sources = generate_pollution_sources(frame, list(LOCATIONS[:3]), rng)
+        self.assertTrue(all(source['impact_score'] is None for source in sources))
+        json.dumps(sensors + sources, allow_nan=False)
@@ -0,0 +1,101 @@
+import os
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from api import dataset
+from api.aggregates import AggregateCube
+from api.columnar_store import MEASUREMENT_COLUMNS
+from .helpers import RiverDataMixin, river_frame
+
+
+class AggregateCubeTests(SimpleTestCase):
+    def assert_matches_pandas(self, cube, frame):
+        for (year, location), group in frame.groupby(['Year', 'Location']):
+            summary = cube.summary(year, location)
+            self.assertEqual(cube.samples(year, location), len(group))
+            for column in MEASUREMENT_COLUMNS:
+                values = group[column].dropna()
+                self.assertEqual(summary[column]['count'], len(values))
+                self.assertAlmostEqual(summary[column]['mean'], values.mean(), places=9)
+                self.assertEqual(summary[column]['min'], values.min())
+                self.assertEqual(summary[column]['max'], values.max())
+                self.assertAlmostEqual(summary[column]['std'], values.std(ddof=0), places=6)
+            self.assertEqual(cube.wqi_distribution(year, location), group['WQI'].value_counts().to_dict())
+
+        for year, group in frame.groupby('Year'):
+            self.assertEqual(cube.samples(year), len(group))
+            self.assertAlmostEqual(cube.summary(year)['TDS']['mean'], group['TDS'].mean(), places=9)
+            self.assertEqual(cube.wqi_mode(year), group['WQI'].mode().iloc[0])
+
+    def test_matches_pandas_groupby(self):
+        frame = river_frame()
+        self.assert_matches_pandas(AggregateCube.from_frame(frame, MEASUREMENT_COLUMNS), frame)
+
+    def test_incremental_updates_match_full_build(self):
+        frame = river_frame()
+        # The second batch brings a new year and a new location
+        extra = river_frame(200, seed=1, locations=('Powai', 'Vihar')).assign(Year=2025)
+        cube = AggregateCube.from_frame(frame, MEASUREMENT_COLUMNS)
+        cube.add_frame(extra)
+        self.assert_matches_pandas(cube, pd.concat([frame, extra], ignore_index=True))
+
+    def test_rows_missing_a_key_are_skipped(self):
+        frame = river_frame()
+        frame['Location'] = frame['Location'].astype(object)
+        frame.loc[[0, 10, 20], 'Location'] = np.nan
+        frame.loc[[1, 11, 21], 'WQI'] = np.nan
+        frame.loc[[2, 12], 'Year'] = np.nan
+        cube = AggregateCube.from_frame(frame, MEASUREMENT_COLUMNS)
+        kept = frame.dropna(subset=['Year', 'Location', 'WQI']).astype({'Year': 'int64'})
+        self.assert_matches_pandas(cube, kept)
+        self.assertEqual(sum(cube.samples(year) for year in cube.years), len(kept))
+        self.assertEqual(sorted(cube.locations), sorted(kept['Location'].unique()))
+        self.assertEqual(sorted(cube.wqi_categories), sorted(kept['WQI'].unique()))
+
+        # Only keyless rows leave the cube empty
+        empty = AggregateCube.from_frame(frame.assign(WQI=np.nan), MEASUREMENT_COLUMNS)
+        self.assertEqual(empty.years, [])
+
+    def test_copy_is_independent(self):
+        frame = river_frame()
+        cube = AggregateCube.from_frame(frame, MEASUREMENT_COLUMNS)
+        copy = cube.copy()
+        copy.add_frame(frame)
+        self.assertEqual(copy.samples(2020), 2 * cube.samples(2020))
+        self.assert_matches_pandas(cube, frame)
+
+    def test_unknown_cells(self):
+        cube = AggregateCube.from_frame(river_frame(), MEASUREMENT_COLUMNS)
+        self.assertEqual(cube.samples(1990), 0)
+        self.assertEqual(cube.summary(2020, 'Nowhere'), {})
+        self.assertIsNone(AggregateCube(MEASUREMENT_COLUMNS).wqi_score(2020))
+
+
+class DatasetAppendTests(RiverDataMixin, SimpleTestCase):
+    def test_appended_csv_rows_extend_the_previous_cube(self):
+        first = dataset.get_river_dataset()
+
+        extra = river_frame(50, seed=2).round(2)
+        extra.to_csv(self.csv, mode='a', header=False, index=False)
+        self.touch(self.csv)
+        second = dataset.get_river_dataset()
+
+        self.assertIsNot(second, first)
+        self.assertEqual(dataset.appended_rows(second.frame, first), len(first))
+        expected = AggregateCube.from_frame(second.frame, MEASUREMENT_COLUMNS)
+        for year in expected.years:
+            self.assertEqual(second.cube.summary(year), expected.summary(year))
+            self.assertEqual(second.cube.wqi_distribution(year), expected.wqi_distribution(year))
+        # The earlier snapshot is left as it was
+        self.assertEqual(sum(first.cube.samples(year) for year in first.cube.years), len(first))
+
+    def test_edited_rows_rebuild_the_cube(self):
+        first = dataset.get_river_dataset()
+        frame = pd.read_csv(self.csv)
+        frame.loc[0, 'TDS'] += 1
+        frame.to_csv(self.csv, index=False)
+        self.touch(self.csv)
+        second = dataset.get_river_dataset()
+        self.assertIsNone(dataset.appended_rows(second.frame, first))
+        self.assertAlmostEqual(second.cube.summary(int(frame.loc[0, 'Year']))['TDS']['max'],
+                               frame[frame.Year == frame.loc[0, 'Year']]['TDS'].max(), places=3)
@@ -0,0 +1,74 @@
+import os
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from api import dataset
+from api.columnar_store import (
+    COLUMNS, ColumnarStore, import_csv, load_river_frame, river_data_exists, source_changed
+)
+from .helpers import RiverDataMixin, TempDirMixin, river_frame
+
+
+class ColumnarStoreTests(RiverDataMixin, SimpleTestCase):
+    def test_read_frame_matches_read_csv_exactly(self):
+        import_csv(self.csv, self.store)
+        store = ColumnarStore(self.store)
+        self.assertEqual(store.columns['TDS'], {'dtype': 'float32', 'decimals': 2})
+
+        expected = pd.read_csv(self.csv, usecols=COLUMNS).sort_values('Year', kind='stable').reset_index(drop=True)
+        pd.testing.assert_frame_equal(store.read_frame()[COLUMNS], expected[COLUMNS], check_exact=True)
+
+    def test_columns_float32_cannot_restore_stay_float64(self):
+        river_frame().to_csv(self.csv, index=False)
+        import_csv(self.csv, self.store)
+        store = ColumnarStore(self.store)
+        self.assertEqual(store.columns['DO'], {'dtype': 'float64'})
+
+        expected = pd.read_csv(self.csv).sort_values('Year', kind='stable').reset_index(drop=True)
+        pd.testing.assert_frame_equal(store.read_frame()[COLUMNS], expected[COLUMNS], check_exact=True)
+
+    def test_partition_statistics_never_prune_matching_rows(self):
+        import_csv(self.csv, self.store)
+        store = ColumnarStore(self.store)
+        frame = store.read_frame()
+        threshold = float(frame['BOD'].max())
+        years = store.select_partitions(ranges={'BOD': (threshold, None)})
+        self.assertIn(int(frame.loc[frame['BOD'].idxmax(), 'Year']), [p['year'] for p in years])
+
+    def test_modified_csv_is_detected(self):
+        import_csv(self.csv, self.store)
+        self.assertFalse(source_changed(ColumnarStore(self.store).source, self.csv))
+        self.touch(self.csv)
+        self.assertTrue(source_changed(ColumnarStore(self.store).source, self.csv))
+        # A store imported from elsewhere (or written without a source) is never stale
+        self.assertFalse(source_changed({}, self.csv))
+
+    def test_load_river_frame_prefers_a_newer_csv(self):
+        import_csv(self.csv, self.store)
+        updated = river_frame(300, seed=5).round(2)
+        updated.to_csv(self.csv, index=False)
+        self.touch(self.csv)
+        self.assertEqual(len(load_river_frame(self.csv, self.store)), 300)
+
+    def test_get_river_dataset_reimports_a_stale_store(self):
+        import_csv(self.csv, self.store)
+        self.assertEqual(len(dataset.get_river_dataset()), 500)
+
+        river_frame(300, seed=5).round(2).to_csv(self.csv, index=False)
+        self.touch(self.csv)
+        snapshot = dataset.get_river_dataset()
+        self.assertEqual(len(snapshot), 300)
+        self.assertEqual(snapshot.frame['TDS'].dtype, np.float32)
+        self.assertFalse(source_changed(ColumnarStore(self.store).source, self.csv))
+        self.assertIs(dataset.get_river_dataset(), snapshot)
+
+
+class RiverDataExistsTests(TempDirMixin, SimpleTestCase):
+    def test_store_alone_is_enough(self):
+        csv = os.path.join(self.tmp, 'mithi_river_data.csv')
+        self.assertFalse(river_data_exists(csv))
+        river_frame().round(2).to_csv(csv, index=False)
+        import_csv(csv, os.path.join(self.tmp, 'mithi_river_store'))
+        os.remove(csv)
+        self.assertTrue(river_data_exists(csv))
+        self.assertEqual(len(load_river_frame(csv)), 500)
@@ -0,0 +1,49 @@
+import json
+import pandas as pd
+from django.test import SimpleTestCase
+from api import dashboard_views, views
+from api.dataset import source_value
+from .helpers import RiverDataMixin, river_frame
+
+
+class RawReadingTests(RiverDataMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        # Values with more decimals than float32 prints exactly, as read_csv returns them
+        frame = river_frame().dropna().round(2)
+        frame['TDS'] = (frame['TDS'] + 0.123).round(3)
+        frame.to_csv(self.csv, index=False)
+        self.touch(self.csv)
+        source = pd.read_csv(self.csv)
+        self.latest = source[source['Year'] == source['Year'].max()]
+
+    def get(self, view):
+        response = view(self.factory.get('/'))
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def assert_csv_row(self, location, **values):
+        rows = self.latest[self.latest['Location'] == location]
+        for column, value in values.items():
+            rows = rows[rows[column] == value]
+        self.assertTrue(len(rows), values)
+
+    def test_latest_readings_are_the_csv_values(self):
+        readings = self.get(dashboard_views.get_latest_readings)['readings']
+        self.assertTrue(readings)
+        for reading in readings:
+            self.assert_csv_row(reading['location'], Temp=reading['temperature'], pH=reading['ph'],
+                                DO=reading['dissolved_oxygen'], TDS=reading['tds'], BOD=reading['bod'],
+                                COD=reading['cod'])
+
+    def test_3d_points_are_the_csv_values(self):
+        points = self.get(views.get_3d_visualization_data)['data']
+        self.assertTrue(points)
+        for point in points:
+            self.assert_csv_row(point['location'], TDS=point['value'], Temp=point['temperature'], pH=point['ph'],
+                                DO=point['do'], BOD=point['bod'], COD=point['cod'])
+
+    def test_source_value(self):
+        self.assertEqual(source_value(pd.Series([523.173], dtype='float32')[0]), 523.173)
+        self.assertNotEqual(source_value(float('nan')), source_value(float('nan')))
@@ -0,0 +1,187 @@
+import json
+import os
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from api import views
+from api.forecasting import (
+    DEFAULT_FORECAST_STATIONS, FORECAST_TARGETS, MIN_REFIT_DAYS, REFIT_WINDOW_DAYS, ForecastModelsUnavailable,
+    ForecastRegistry, forecast_registry, publish_forecast_models, readings_history, utc_today
+)
+from api.historical_data import DEFAULT_END, DEFAULT_START, generate_history
+from api.interpolation import DEFAULT_STATION_COORDINATES
+from .helpers import LOCATIONS, TempDirMixin
+
+
+def histories(stations=DEFAULT_FORECAST_STATIONS):
+    return (generate_history(DEFAULT_START, DEFAULT_END, seed=1),
+            generate_history(DEFAULT_START, DEFAULT_END, stations=stations, seed=2))
+
+
+class ForecastRegistryTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = os.path.join(self.tmp, 'forecast')
+        self.registry = ForecastRegistry(store_path=self.store, readings_source=None)
+
+    def test_never_trains_on_first_use(self):
+        with self.assertRaises(ForecastModelsUnavailable) as raised:
+            self.registry.get()
+        self.assertIn('manage.py train_forecast_models', str(raised.exception))
+        self.assertFalse(os.path.exists(self.store))
+
+    def test_observe_needs_loaded_models(self):
+        readings = pd.DataFrame({'station': ['Powai'], 'timestamp': [pd.Timestamp('2025-01-01', tz='UTC')],
+                                 'pH': [7.1], 'TDS': [300.0], 'BOD': [10.0], 'COD': [40.0]})
+        self.assertEqual(self.registry.observe(readings), 0)
+        self.assertFalse(os.path.exists(self.store))
+
+        publish_forecast_models(self.store, *histories())
+        self.registry.get()
+        self.assertEqual(self.registry.observe(readings), 1)
+        self.assertEqual(self.registry.get().observed_readings, 1)
+
+    def test_loads_the_published_version(self):
+        manifest = publish_forecast_models(self.store, *histories())
+        bundle = self.registry.get()
+        self.assertEqual(bundle.version, manifest['version'])
+        dates, predictions = bundle.forecast(30, stations=['Bandra', 'Kurla'])
+        self.assertEqual(len(dates), 30)
+        self.assertEqual(dates[0], bundle.last_date + pd.Timedelta(days=1))
+        self.assertEqual(predictions['Bandra'][0].shape, (30, 4))
+        with self.assertRaises(ValueError):
+            bundle.forecast(30, stations=['Nowhere'])
+
+
+def ingested_readings(days=60, per_day=3, stations=DEFAULT_FORECAST_STATIONS, seed=3):
+    """readings_history rows of the last days days, per_day readings per station and day"""
+    first_day = utc_today() - pd.Timedelta(days=days)
+    frame = generate_history(first_day, first_day + pd.Timedelta(days=days) - pd.Timedelta(hours=24 // per_day),
+                             freq=f'{24 // per_day}h', stations=stations, seed=seed)
+    return frame.assign(date=frame['date'].astype('datetime64[ns]'))
+
+
+def readings_rows(history):
+    """Readings store rows (as ingested) for readings_history rows"""
+    return pd.DataFrame({'station': history['station'], 'timestamp': history['date'].dt.tz_localize('UTC'),
+                         'pH': history['ph'], 'TDS': history['tds'], 'BOD': history['bod'], 'COD': history['cod']})
+
+
+class ForecastUpdateTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = os.path.join(self.tmp, 'forecast')
+        self.history, self.station_history = histories()
+        self.readings = ingested_readings()
+        self.registry = ForecastRegistry(store_path=self.store, history_source=lambda: self.history,
+                                         station_history_source=lambda: self.station_history,
+                                         readings_source=lambda: self.readings)
+        publish_forecast_models(self.store, self.history, self.station_history)
+        self.bundle = self.registry.get()
+
+    def test_refit_after_an_ingest(self):
+        bundle = self.registry.retrain()
+        self.assertNotEqual(bundle.version, self.bundle.version)
+        # The window is the latest days with data, not the calendar days before the latest reading
+        self.assertEqual(bundle.model.n_samples, REFIT_WINDOW_DAYS)
+        self.assertEqual(sorted(bundle.station_models), sorted(DEFAULT_FORECAST_STATIONS))
+        self.assertEqual(bundle.last_date, utc_today() - pd.Timedelta(days=1))
+
+        dates, (mean, half_width) = bundle.forecast(90)
+        self.assertEqual(dates[0], utc_today())
+        low = self.history[FORECAST_TARGETS].min().to_numpy()
+        high = self.history[FORECAST_TARGETS].max().to_numpy()
+        self.assertTrue(np.all((mean > low - (high - low)) & (mean < high + (high - low))))
+        self.assertTrue(np.all(half_width < high - low))
+
+    def test_short_window_keeps_the_current_models(self):
+        self.history = self.history.iloc[-(MIN_REFIT_DAYS - 100):]
+        with self.assertRaises(ValueError):
+            self.registry.retrain()
+        self.assertEqual(self.registry.get().version, self.bundle.version)
+
+    def test_station_short_of_data_keeps_its_history(self):
+        recent = self.station_history['date'] > self.station_history['date'].max() - pd.Timedelta(days=200)
+        self.station_history = self.station_history[(self.station_history['station'] != 'Mahim') | recent]
+        self.readings = ingested_readings(stations=['Powai', 'Mahim', 'Ghatkopar'])
+        bundle = self.registry.retrain()
+        self.assertEqual(sorted(bundle.station_models), sorted(DEFAULT_FORECAST_STATIONS))
+        self.assertEqual(bundle.station_models['Powai'].n_samples, REFIT_WINDOW_DAYS)
+        # Without two cycles of data it is refit on its offline history alone
+        self.assertEqual(bundle.station_models['Mahim'].n_samples, 200)
+
+    @mock.patch.object(ForecastRegistry, '_start_refit')
+    def test_readings_enter_as_daily_means(self, start_refit):
+        self.assertEqual(self.registry.observe(readings_rows(self.readings)), len(self.readings))
+        bundle = self.registry.get()
+        days = self.readings['date'].dt.normalize().nunique()
+        self.assertEqual(bundle.model.n_samples, self.bundle.model.n_samples + days)
+        self.assertEqual(bundle.station_models['Powai'].n_samples,
+                         self.bundle.station_models['Powai'].n_samples + days)
+        self.assertEqual(bundle.last_date, utc_today() - pd.Timedelta(days=1))
+
+    def test_batches_of_one_day_give_the_same_model(self):
+        day = self.readings[self.readings['date'].dt.normalize() == self.readings['date'].max().normalize()]
+        rows = readings_rows(day)
+        single = self.bundle.updated(readings_history(rows))
+        twice = self.bundle.updated(readings_history(rows.iloc[:4])).updated(readings_history(rows.iloc[4:]))
+        thrice = twice.updated(readings_history(rows.iloc[:0]))
+        for key in [None] + list(DEFAULT_FORECAST_STATIONS):
+            expected = single.model if key is None else single.station_models[key]
+            actual = twice.model if key is None else twice.station_models[key]
+            self.assertEqual(actual.n_samples, expected.n_samples)
+            np.testing.assert_allclose(actual.coef, expected.coef, rtol=1e-6, atol=1e-9)
+            np.testing.assert_allclose(actual.sigma, expected.sigma, rtol=1e-6)
+            np.testing.assert_allclose(actual.xtx_inv, expected.xtx_inv, rtol=1e-5, atol=1e-12)
+            self.assertAlmostEqual(actual.drift, expected.drift, places=9)
+            self.assertEqual(actual.updates, expected.updates)
+        self.assertEqual(twice.model.n_samples, self.bundle.model.n_samples + 1)
+        self.assertEqual(thrice.model.n_samples, twice.model.n_samples)
+
+    def test_a_later_batch_for_an_earlier_day_replaces_its_row(self):
+        dates = self.readings['date'].dt.normalize()
+        first, second = self.readings[dates == dates.min()], self.readings[dates == dates.min() + pd.Timedelta(days=1)]
+        single = self.bundle.updated(pd.concat([first, second], ignore_index=True))
+        split = self.bundle.updated(pd.concat([first.iloc[:2], second], ignore_index=True)).updated(first.iloc[2:])
+        self.assertEqual(split.model.n_samples, single.model.n_samples)
+        np.testing.assert_allclose(split.model.coef, single.model.coef, rtol=1e-6, atol=1e-9)
+        np.testing.assert_allclose(split.station_models['Powai'].coef, single.station_models['Powai'].coef,
+                                   rtol=1e-6, atol=1e-9)
+
+    def test_future_readings_do_not_move_the_horizon(self):
+        future = readings_rows(self.readings.iloc[:1]).assign(timestamp=pd.Timestamp('2099-01-01', tz='UTC'))
+        self.assertEqual(self.registry.observe(future), 0)
+        bundle = self.registry.get()
+        self.assertEqual(bundle.last_date, self.bundle.last_date)
+        self.assertEqual(bundle.model.n_samples, self.bundle.model.n_samples)
+
+        today = readings_rows(self.readings.iloc[:1]).assign(timestamp=pd.Timestamp.now(tz='UTC'))
+        self.registry.observe(pd.concat([today, future], ignore_index=True))
+        self.assertEqual(self.registry.get().last_date, utc_today())
+
+    def test_refit_skips_future_readings(self):
+        future = self.readings.iloc[:1].assign(date=pd.Timestamp('2099-01-01'))
+        self.readings = pd.concat([self.readings, future], ignore_index=True)
+        self.assertEqual(self.registry.retrain().last_date, utc_today() - pd.Timedelta(days=1))
+
+
+class ForecastStationTests(SimpleTestCase):
+    def test_default_stations_are_the_dataset_locations(self):
+        self.assertEqual(sorted(DEFAULT_FORECAST_STATIONS), sorted(LOCATIONS))
+        self.assertEqual(sorted(DEFAULT_FORECAST_STATIONS), sorted(DEFAULT_STATION_COORDINATES))
+
+
+class IngestForecastTests(TempDirMixin, SimpleTestCase):
+    def test_ingest_does_not_load_or_train_models(self):
+        readings = [{'station': 'Powai', 'timestamp': pd.Timestamp.now(tz='UTC').isoformat(),
+                     'ph': 7.2, 'tds': 310, 'bod': 9, 'cod': 41}]
+        with override_settings(MITHI_ML_MODEL_DIR=self.tmp, MITHI_READINGS_STORE_PATH=os.path.join(self.tmp, 'readings')), \
+                mock.patch.object(forecast_registry, '_current', None):
+            request = APIRequestFactory().post('/api/readings/ingest/', json.dumps(readings), content_type='application/json')
+            response = views.ingest_readings(request)
+            response.render()
+            self.assertEqual(response.status_code, 201)
+            self.assertIsNone(forecast_registry._current)
+            self.assertFalse(os.path.exists(forecast_registry.store_path))
@@ -0,0 +1,94 @@
+import json
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from api import ml_views
+from api.forest import FlatForest
+from api.model_registry import ModelBundle, model_registry
+from .helpers import trained_models
+
+
+class FlatForestTests(SimpleTestCase):
+    def fit(self, missing_in_training):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(2000, 6))
+        y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(int) + (X[:, 3] > 1)
+        if missing_in_training:
+            X[rng.random(X.shape) < 0.1] = np.nan
+        scaler = StandardScaler().fit(X)
+        forest = RandomForestClassifier(30, random_state=0).fit(scaler.transform(X), y)
+        queries = rng.normal(size=(3000, 6)) * 2
+        return forest, scaler, queries
+
+    def assert_bit_exact(self, forest, scaler, flat, queries):
+        expected = forest.predict_proba(scaler.transform(queries))
+        self.assertTrue(np.array_equal(flat.predict_proba(queries), expected))
+        self.assertTrue(np.array_equal(flat.predict(queries), forest.predict(scaler.transform(queries))))
+
+    def test_bit_exact_with_sklearn(self):
+        forest, scaler, queries = self.fit(False)
+        flat = FlatForest.from_sklearn(forest, scaler)
+        self.assert_bit_exact(forest, scaler, flat, queries)
+        # Single rows take the same path
+        self.assert_bit_exact(forest, scaler, flat, queries[:1])
+        # and so does the stored form
+        self.assert_bit_exact(forest, scaler, FlatForest.from_arrays(flat.to_arrays()), queries)
+
+    def test_missing_values_follow_sklearn(self):
+        for missing_in_training in (False, True):
+            forest, scaler, queries = self.fit(missing_in_training)
+            queries[np.random.default_rng(1).random(queries.shape) < 0.2] = np.nan
+            self.assert_bit_exact(forest, scaler, FlatForest.from_sklearn(forest, scaler), queries)
+
+    def test_artifacts_without_missing_directions_are_rebuilt(self):
+        models = trained_models()
+        arrays = FlatForest.from_sklearn(models['classifier_model'], models['classifier_scaler']).to_arrays()
+        del arrays['missing_right']
+        bundle = ModelBundle(dict(models, classifier_forest=arrays), 1, 'test')
+        expected = FlatForest.from_sklearn(models['classifier_model'], models['classifier_scaler'])
+        self.assertTrue(np.array_equal(bundle.classifier_forest.missing_right, expected.missing_right))
+
+
+class SingleRowEndpointTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bundle = ModelBundle(trained_models(), 1, 'test')
+
+    def setUp(self):
+        patcher = mock.patch.object(model_registry, '_current', self.bundle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = APIRequestFactory()
+
+    def post(self, view, data):
+        response = view(self.factory.post('/api/ml/', data, format='json'))
+        response.render()
+        return response, json.loads(response.content)
+
+    def reading(self, **overrides):
+        return {'year': 2024, 'location': 'Powai', 'temp': 28, 'do': 5.5, 'ph': 7.2,
+                'tds': 600, 'bod': 12, 'cod': 80, **overrides}
+
+    def test_classify(self):
+        response, body = self.post(ml_views.classify_water_quality, self.reading())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(body['prediction'], self.bundle.classifier_model.classes_)
+
+    def test_non_finite_inputs_are_rejected(self):
+        for view in (ml_views.classify_water_quality, ml_views.predict_water_quality):
+            for field, value in (('temp', 'nan'), ('do', 'inf'), ('ph', '-Infinity'), ('temp', '1e400'),
+                                 ('year', '1e400'), ('temp', 'warm')):
+                response, body = self.post(view, self.reading(**{field: value}))
+                self.assertEqual(response.status_code, 400, (view.__name__, field, value))
+                self.assertIn('Invalid input data format', body['error'])
+
+    def test_missing_field(self):
+        data = self.reading()
+        del data['cod']
+        response, body = self.post(ml_views.classify_water_quality, data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(body['error'], 'Missing required field: cod')
@@ -0,0 +1,37 @@
+import numpy as np
+from django.test import SimpleTestCase
+from api.fused_regression import FusedRegression
+from api.model_registry import REGRESSION_TARGETS
+from .helpers import trained_models
+
+
+class FusedRegressionTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.models = trained_models()
+        cls.fused = FusedRegression.from_sklearn(cls.models['regression_models'], cls.models['regression_scalers'],
+                                                 REGRESSION_TARGETS)
+        rng = np.random.default_rng(1)
+        cls.X = np.column_stack([rng.integers(2019, 2026, 500), rng.integers(0, 5, 500),
+                                 rng.normal(50, 10, (500, 3))]).astype(np.float64)
+
+    def expected(self, X):
+        return np.column_stack([
+            self.models['regression_models'][target].predict(self.models['regression_scalers'][target].transform(X))
+            for target in REGRESSION_TARGETS
+        ])
+
+    def test_matches_the_sklearn_pipelines(self):
+        np.testing.assert_allclose(self.fused.predict(self.X), self.expected(self.X), rtol=1e-10, atol=1e-9)
+
+    def test_single_row_and_dict(self):
+        np.testing.assert_allclose(self.fused.predict(self.X[0]), self.expected(self.X[:1]), rtol=1e-10, atol=1e-9)
+        predictions = self.fused.predict_dict(self.X)
+        self.assertEqual(list(predictions), list(REGRESSION_TARGETS))
+        np.testing.assert_allclose(predictions[REGRESSION_TARGETS[1]], self.expected(self.X)[:, 1],
+                                   rtol=1e-10, atol=1e-9)
+
+    def test_stored_form(self):
+        restored = FusedRegression.from_arrays(self.fused.to_arrays())
+        self.assertTrue(np.array_equal(restored.predict(self.X), self.fused.predict(self.X)))
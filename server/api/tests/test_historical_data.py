@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from api.historical_data import DEFAULT_END, DEFAULT_START, SERIES_SHAPES, generate_history
+
+TARGETS = ['ph', 'tds', 'bod', 'cod']
+
+
+def legacy_history(rng):
+    """The loop PredictiveAnalytics used before generate_history, drawing its noise from rng"""
+    dates = pd.date_range(start='2023-01-01', end='2024-12-31', freq='D')
+    data = []
+    for i, date in enumerate(dates):
+        seasonal_factor = 1 + 0.3 * np.sin(2 * np.pi * i / 365)
+        weekly_factor = 1 + 0.1 * np.sin(2 * np.pi * i / 7)
+        noise = rng.normal(0, 0.1)
+        ph = 7.2 + 0.5 * seasonal_factor + noise
+        tds = 250 + 100 * seasonal_factor * weekly_factor + noise * 50
+        bod = 15 + 10 * seasonal_factor * weekly_factor + noise * 5
+        cod = 30 + 20 * seasonal_factor * weekly_factor + noise * 10
+        data.append({
+            'date': date,
+            'ph': max(6.0, min(9.0, ph)),
+            'tds': max(50, tds),
+            'bod': max(1, bod),
+            'cod': max(5, cod)
+        })
+    return pd.DataFrame(data)
+
+
+class GenerateHistoryTests(SimpleTestCase):
+    def test_matches_the_former_loop(self):
+        history = generate_history(seed=7)
+        expected = legacy_history(np.random.default_rng(7))
+        self.assertEqual(list(history.columns), ['date'] + TARGETS)
+        self.assertTrue((history['date'].to_numpy() == expected['date'].to_numpy()).all())
+        np.testing.assert_allclose(history[TARGETS].to_numpy(), expected[TARGETS].to_numpy(), rtol=1e-12)
+
+    def test_same_seed_same_history(self):
+        first = generate_history(seed=3, stations=['Powai', 'Kurla'])
+        pd.testing.assert_frame_equal(first, generate_history(seed=3, stations=['Powai', 'Kurla']))
+        self.assertFalse(first[TARGETS].equals(generate_history(seed=4, stations=['Powai', 'Kurla'])[TARGETS]))
+        # A Generator is used as given, continuing its stream
+        rng = np.random.default_rng(3)
+        pd.testing.assert_frame_equal(generate_history(seed=rng, stations=['Powai', 'Kurla']), first)
+
+    def test_per_station_output(self):
+        stations = ['Powai', 'Saki Naka', 'Kurla']
+        history = generate_history('2024-01-01', '2024-01-10', stations=stations, seed=1)
+        self.assertEqual(list(history.columns), ['station', 'date'] + TARGETS)
+        self.assertEqual(len(history), 10 * len(stations))
+        # Rows grouped by station in the order given, each over the whole range
+        self.assertEqual(history['station'].iloc[::10].tolist(), stations)
+        for _, frame in history.groupby('station', sort=False):
+            self.assertEqual(frame['date'].tolist(), pd.date_range('2024-01-01', '2024-01-10').tolist())
+        # Each station has its own noise
+        by_station = history.pivot(index='date', columns='station', values='ph')
+        self.assertFalse(np.allclose(by_station['Powai'], by_station['Kurla']))
+
+    def test_sub_daily_frequency_and_bounds(self):
+        history = generate_history(DEFAULT_START, DEFAULT_END, freq='h', seed=2)
+        self.assertEqual(len(history), len(pd.date_range(DEFAULT_START, DEFAULT_END, freq='h')))
+        for parameter, shape in SERIES_SHAPES.items():
+            self.assertGreaterEqual(history[parameter].min(), shape['lower'])
+            if shape.get('upper') is not None:
+                self.assertLessEqual(history[parameter].max(), shape['upper'])
+        # Hourly data keeps the daily series' yearly shape
+        daily = history.set_index('date')['tds'].resample('D').mean()
+        np.testing.assert_allclose(daily.to_numpy(), generate_history(seed=2)['tds'].to_numpy(), rtol=0.1)
@@ -0,0 +1,54 @@
+import os
+import shutil
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+from api.inference_pool import INFERENCE_ARTIFACTS_DIRNAME, InferencePool
+from api.model_artifacts import VERSIONS_DIRNAME, write_artifacts
+from api.model_registry import get_artifact_store_path, load_model_bundle
+from .helpers import TempDirMixin, trained_models
+
+
+class InferencePoolTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = InferencePool(1, self.tmp)
+        self.addCleanup(self.pool.shutdown)
+
+    def detector(self, seed):
+        X = np.random.default_rng(seed).normal(size=(200, 4))
+        scaler = StandardScaler().fit(X)
+        return scaler, IsolationForest(n_estimators=10, random_state=seed).fit(scaler.transform(X))
+
+    def test_published_artifacts_live_in_the_model_dir(self):
+        first = self.pool.publish_artifact(self.detector(0), 'anomaly_detector')
+        self.assertEqual(os.path.dirname(first), os.path.join(self.tmp, INFERENCE_ARTIFACTS_DIRNAME))
+
+        second = self.pool.publish_artifact(self.detector(1), 'anomaly_detector')
+        other = self.pool.publish_artifact(self.detector(2), 'other')
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second) and os.path.exists(other))
+
+        self.pool.shutdown()
+        self.assertEqual(os.listdir(os.path.join(self.tmp, INFERENCE_ARTIFACTS_DIRNAME)), [])
+
+    def test_workers_score_and_classify(self):
+        scaler, detector = self.detector(0)
+        features = np.random.default_rng(3).normal(size=(50, 4))
+        labels, scores = self.pool.score_anomalies(self.pool.publish_artifact((scaler, detector), 'anomaly_detector'),
+                                                   features)
+        self.assertTrue(np.array_equal(labels, detector.predict(scaler.transform(features))))
+        self.assertTrue(np.allclose(scores, detector.decision_function(scaler.transform(features))))
+
+        store = get_artifact_store_path(self.tmp)
+        manifest = write_artifacts(store, trained_models())
+        bundle = load_model_bundle(self.tmp, 1)
+        rows = np.array([[2024, 1, 28, 5.5, 7.2, 600, 12, 80], [2020, 0, 22, 7, 7.8, 200, 2, 20]], dtype=np.float64)
+        expected = bundle.classify_proba(rows)
+        self.assertTrue(np.array_equal(self.pool.classify_proba(bundle, rows), expected))
+
+        # A version pruned after the server loaded it: computed in this process instead
+        bundle = load_model_bundle(self.tmp, 2)
+        shutil.rmtree(os.path.join(store, VERSIONS_DIRNAME, manifest['version']))
+        self.assertTrue(np.array_equal(self.pool.classify_proba(bundle, rows), expected))
@@ -0,0 +1,53 @@
+import numpy as np
+from django.test import SimpleTestCase
+from api.interpolation import (
+    DEFAULT_STATION_COORDINATES, SpatialInterpolator, get_station_coordinates, grid_bounds, grid_cells, idw_weights
+)
+from .helpers import LOCATIONS
+
+
+class InterpolationTests(SimpleTestCase):
+    def test_dataset_locations_have_coordinates(self):
+        for location in LOCATIONS:
+            self.assertIn(location, DEFAULT_STATION_COORDINATES)
+        self.assertEqual(get_station_coordinates(['Bandra']), [DEFAULT_STATION_COORDINATES['Bandra']])
+
+    def test_weights_are_normalized_and_exact_at_stations(self):
+        stations = [DEFAULT_STATION_COORDINATES[location] for location in LOCATIONS]
+        cell_lat, cell_lng = grid_cells(grid_bounds(stations), 20)
+        weights = idw_weights(stations, cell_lat, cell_lng)
+        np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+
+        lat, lng = np.array([stations[1][0]]), np.array([stations[1][1]])
+        np.testing.assert_array_equal(idw_weights(stations, lat, lng)[0], np.eye(len(stations))[1])
+
+    def test_caches_stay_bounded(self):
+        interpolator = SpatialInterpolator(max_layouts=2, max_surfaces=3)
+        stations = [DEFAULT_STATION_COORDINATES[location] for location in LOCATIONS]
+        values = np.arange(len(stations) * 2, dtype=np.float64).reshape(-1, 2)
+        for resolution in (4, 5, 6, 7):
+            for year in range(5):
+                interpolator.surface(stations, values, resolution, cache_key=year)
+        self.assertEqual(len(interpolator._layouts), 2)
+        self.assertEqual(len(interpolator._surfaces), 3)
+
+        # Most recently used entries survive
+        self.assertIn((tuple(map(tuple, stations)), 7), interpolator._layouts)
+        _, _, surface = interpolator.surface(stations, values, 7, cache_key=4)
+        self.assertEqual(surface.shape, (49, 2))
+
+    def test_missing_station_values_are_left_out(self):
+        interpolator = SpatialInterpolator()
+        stations = [DEFAULT_STATION_COORDINATES[location] for location in LOCATIONS]
+        values = np.arange(len(stations) * 3, dtype=np.float64).reshape(-1, 3)
+        values[1, 0] = np.nan
+        values[:, 2] = np.nan
+        cell_lat, cell_lng, surface = interpolator.surface(stations, values, 6)
+
+        # Column 0 is IDW over the other stations, on the same grid
+        others = [i for i in range(len(stations)) if i != 1]
+        weights = idw_weights(stations, cell_lat, cell_lng)[:, others]
+        np.testing.assert_allclose(surface[:, 0], weights @ values[others, 0] / weights.sum(axis=1))
+        _, _, complete = interpolator.surface(stations, np.nan_to_num(values), 6)
+        np.testing.assert_allclose(surface[:, 1], complete[:, 1])
+        self.assertTrue(np.isnan(surface[:, 2]).all())
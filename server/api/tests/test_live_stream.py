@@ -0,0 +1,150 @@
+import asyncio
+import json
+from unittest import mock
+import pandas as pd
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from api import live_stream
+from api.live_stream import SUBSCRIBER_QUEUE_SIZE, LiveBroadcaster, sse_message
+from api.readings_store import get_reading_store, readings_from_records, validate_readings
+from .helpers import TempDirMixin
+
+HEALTHY = {'temp': 25, 'ph': 7.2, 'do': 7, 'tds': 250, 'bod': 2, 'cod': 30}
+# pH and BOD in their red bands
+POLLUTED = {'temp': 25, 'ph': 5.5, 'do': 7, 'tds': 250, 'bod': 12, 'cod': 30}
+
+
+def parse(message):
+    """(id, event, data) of one encoded SSE message"""
+    fields = dict(line.split(': ', 1) for line in message.decode().strip().split('\n'))
+    event_id = fields.get('id')
+    return (int(event_id) if event_id is not None else None), fields['event'], json.loads(fields['data'])
+
+
+async def drain(subscriber, until='aggregate', timeout=5):
+    """Messages of a subscriber up to and including the first `until` event"""
+    events = []
+    while True:
+        event = parse(await asyncio.wait_for(subscriber.queue.get(), timeout))
+        events.append(event)
+        if event[1] == until:
+            return events
+
+
+class LiveStreamTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        overrides = override_settings(MITHI_READINGS_STORE_PATH=self.tmp)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.store = get_reading_store()
+        self.broadcaster = LiveBroadcaster(poll_interval=0.01)
+        patcher = mock.patch.object(live_stream, 'live_broadcaster', self.broadcaster)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def append(self, station, values=HEALTHY):
+        valid, errors = validate_readings(readings_from_records([
+            {'station': station, 'timestamp': pd.Timestamp.now(tz='UTC').isoformat(), **values}]))
+        self.assertEqual(errors, [])
+        self.store.append(valid)
+        return self.store.last_sequence()
+
+    async def stop(self, *subscribers):
+        for subscriber in subscribers:
+            self.broadcaster.unsubscribe(subscriber)
+        await asyncio.wait_for(self.broadcaster._task, 5)
+
+    def test_station_filter_and_event_types(self):
+        async def scenario():
+            self.append('Powai')
+            self.append('Kurla', POLLUTED)
+            everything = self.broadcaster.subscribe()
+            powai = self.broadcaster.subscribe({'Powai'})
+            events = await drain(everything), await drain(powai)
+            await self.stop(everything, powai)
+            return events
+
+        everything, powai = asyncio.run(scenario())
+        readings = {data['location']: data for _, event, data in everything if event == 'reading'}
+        self.assertEqual(set(readings), {'Powai', 'Kurla'})
+        self.assertEqual(readings['Powai']['ph'], 7.2)
+        aggregate = everything[-1][2]
+        self.assertEqual(aggregate['stations'], 2)
+        self.assertEqual(aggregate['means']['pH'], round((7.2 + 5.5) / 2, 2))
+
+        # Reading and alert events follow the filter; aggregates go to everyone
+        self.assertEqual([(event, data.get('location')) for _, event, data in powai],
+                         [('reading', 'Powai'), ('aggregate', None)])
+
+    def test_red_statuses_raise_alerts(self):
+        async def scenario():
+            sequence = self.append('Kurla', POLLUTED)
+            subscriber = self.broadcaster.subscribe()
+            events = await drain(subscriber)
+            await self.stop(subscriber)
+            return sequence, events
+
+        sequence, events = asyncio.run(scenario())
+        alerts = [(event_id, data) for event_id, event, data in events if event == 'alert']
+        self.assertEqual(sorted(data['parameter'] for _, data in alerts), ['BOD', 'pH'])
+        for event_id, data in alerts:
+            self.assertEqual(event_id, sequence)
+            self.assertEqual(data['location'], 'Kurla')
+            self.assertEqual(data['status']['color'], 'red')
+
+        self.append('Powai')
+        self.assertEqual(live_stream.reading_alerts(self.store.latest_index.latest()[0][0]), [])
+
+    def stream(self, path, **headers):
+        """(response, subscriber) for a request to the stream view"""
+        response = asyncio.run(live_stream.stream_live_readings(RequestFactory().get(path, **headers)))
+        subscribers = list(self.broadcaster.subscribers)
+        self.broadcaster.subscribers.clear()
+        return response, (subscribers[0] if subscribers else None)
+
+    def test_resume_after_a_cursor(self):
+        async def first_poll():
+            subscriber = self.broadcaster.subscribe()
+            await drain(subscriber)
+            await self.stop(subscriber)
+
+        first = self.append('Powai')
+        second = self.append('Kurla')
+        asyncio.run(first_poll())
+
+        for path, headers in ((f'/api/live/stream/?since={first}', {}),
+                              ('/api/live/stream/', {'HTTP_LAST_EVENT_ID': str(first)})):
+            response, subscriber = self.stream(path, **headers)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertEqual(subscriber.since, first)
+            # Only the station updated after the cursor is replayed
+            replayed = [parse(subscriber.queue.get_nowait()) for _ in range(subscriber.queue.qsize())]
+            self.assertEqual([(event_id, data['location']) for event_id, _, data in replayed], [(second, 'Kurla')])
+
+        _, subscriber = self.stream('/api/live/stream/?stations=Powai')
+        self.assertEqual(subscriber.stations, {'Powai'})
+        self.assertEqual(subscriber.queue.qsize(), 1)
+
+        response, subscriber = self.stream('/api/live/stream/?since=yesterday')
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(subscriber)
+
+    def test_slow_subscribers_are_dropped(self):
+        async def scenario():
+            slow = self.broadcaster.subscribe()
+            fast = self.broadcaster.subscribe()
+            for i in range(SUBSCRIBER_QUEUE_SIZE + 1):
+                self.broadcaster.publish(sse_message('aggregate', {'n': i}, event_id=i))
+                if i < SUBSCRIBER_QUEUE_SIZE:
+                    fast.queue.get_nowait()
+            stream = live_stream._event_stream(slow)
+            chunks = [chunk async for chunk in stream]
+            await self.stop(fast)
+            return slow, fast, chunks
+
+        slow, fast, chunks = asyncio.run(scenario())
+        self.assertTrue(slow.overflowed)
+        self.assertFalse(fast.overflowed)
+        # The stream ends right away and the subscriber is no longer fed
+        self.assertEqual(chunks, [b'retry: 3000\n\n'])
+        self.assertNotIn(slow, self.broadcaster.subscribers)
@@ -0,0 +1,105 @@
+import threading
+import time
+from django.test import SimpleTestCase
+from api.micro_batcher import MicroBatcher
+
+
+class GatedBatches:
+    """run_batch that records its batches; the first one blocks until release() so others queue up"""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.gate = threading.Event()
+        self.fail_on = fail_on
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if len(self.batches) == 1:
+            self.gate.wait(5)
+        if self.fail_on is not None and self.fail_on in items:
+            raise ValueError(f'cannot score {self.fail_on}')
+        return [item * 2 for item in items]
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def submit_all(self, batcher, items, before_release=None):
+        """Submit each item from its own thread; returns {item: result or exception}"""
+        outcomes = {}
+
+        def submit(item):
+            try:
+                outcomes[item] = batcher.submit(item)
+            except Exception as e:
+                outcomes[item] = e
+
+        threads = [threading.Thread(target=submit, args=(item,)) for item in items]
+        threads[0].start()
+        if before_release is not None:
+            # The first item runs alone; the rest queue behind it
+            self.wait_for(lambda: len(before_release.batches) == 1)
+            for thread in threads[1:]:
+                thread.start()
+            self.wait_for(lambda: len(batcher._pending) == len(items) - 1)
+            before_release.gate.set()
+        else:
+            for thread in threads[1:]:
+                thread.start()
+        for thread in threads:
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+        return outcomes
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+
+    def test_concurrent_submits_share_one_call(self):
+        calls = []
+
+        def run_batch(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        # The leader waits until the whole batch has queued
+        batcher = MicroBatcher(run_batch, max_wait=5, max_batch=8)
+        outcomes = self.submit_all(batcher, list(range(8)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(calls[0]), list(range(8)))
+        self.assertEqual(outcomes, {item: item * 2 for item in range(8)})
+        self.assertEqual(batcher.stats()['mean_batch_size'], 8)
+
+    def test_batches_split_at_max_batch(self):
+        run_batch = GatedBatches()
+        batcher = MicroBatcher(run_batch, max_batch=4)
+        outcomes = self.submit_all(batcher, list(range(10)), before_release=run_batch)
+        self.assertEqual([len(batch) for batch in run_batch.batches], [1, 4, 4, 1])
+        self.assertEqual(sorted(item for batch in run_batch.batches for item in batch), list(range(10)))
+        self.assertEqual(outcomes, {item: item * 2 for item in range(10)})
+        self.assertEqual((batcher.batches, batcher.items), (4, 10))
+
+    def test_batch_errors_reach_every_caller(self):
+        run_batch = GatedBatches(fail_on=3)
+        batcher = MicroBatcher(run_batch, max_batch=8)
+        outcomes = self.submit_all(batcher, list(range(6)), before_release=run_batch)
+        self.assertEqual(outcomes[0], 0)
+        self.assertEqual(len(run_batch.batches), 2)
+        for item in range(1, 6):
+            self.assertIsInstance(outcomes[item], ValueError)
+            self.assertEqual(str(outcomes[item]), 'cannot score 3')
+        # The batcher keeps working after a failed batch
+        self.assertEqual(batcher.submit(7), 14)
+
+    def test_wrong_result_count_is_an_error(self):
+        batcher = MicroBatcher(lambda items: [], max_batch=4)
+        with self.assertRaises(RuntimeError):
+            batcher.submit(1)
+
+    def test_disabled_calls_directly(self):
+        calls = []
+        batcher = MicroBatcher(lambda items: calls.append(items) or [len(items)], max_batch=1)
+        self.assertFalse(batcher.enabled)
+        self.assertEqual(batcher.submit('row'), 1)
+        self.assertEqual(calls, [['row']])
+        self.assertEqual(batcher.stats()['batches'], 0)
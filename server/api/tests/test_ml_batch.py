@@ -0,0 +1,118 @@
+import io
+import json
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+from api import ml_views
+from api.ml_batch import MAX_BATCH_ROWS
+from api.model_registry import ModelBundle, REGRESSION_TARGETS, model_registry
+from .helpers import trained_models
+
+
+def rows(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'year': int(rng.integers(2019, 2026)), 'location': str(rng.choice(['Powai', 'Kurla', 'Nowhere'])),
+             'temp': float(rng.normal(28, 2)), 'do': float(rng.normal(5, 1)), 'ph': float(rng.normal(7.2, 0.3)),
+             'tds': float(rng.normal(600, 50)), 'bod': float(rng.normal(12, 3)), 'cod': float(rng.normal(80, 10))}
+            for _ in range(n)]
+
+
+class BatchEndpointTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bundle = ModelBundle(trained_models(), 1, 'test')
+
+    def setUp(self):
+        patcher = mock.patch.object(model_registry, '_current', self.bundle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = APIRequestFactory()
+
+    def post(self, view, data, content_type='application/json', path='/api/ml/batch/'):
+        body = data if isinstance(data, str) else json.dumps(data)
+        return view(self.factory.post(path, body, content_type=content_type))
+
+    def streamed(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def error(self, view, data, content_type='application/json'):
+        response = self.post(view, data, content_type)
+        response.render()
+        self.assertEqual(response.status_code, 400)
+        return json.loads(response.content)
+
+    def features(self, batch):
+        encoder = self.bundle.location_encoder
+        locations = [row['location'] for row in batch]
+        return np.array([[row['year'], encoder.transform([location])[0] if location in encoder.classes_ else 0,
+                          row['temp'], row['do'], row['ph']] for row, location in zip(batch, locations)],
+                        dtype=np.float64)
+
+    def test_predict_matches_the_models(self):
+        batch = rows()
+        response = self.post(ml_views.predict_water_quality_batch, batch)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Row-Count'], str(len(batch)))
+        result = pd.read_json(io.StringIO(self.streamed(response)), lines=True)
+        self.assertEqual(len(result), len(batch))
+
+        X = self.features(batch)
+        for target in REGRESSION_TARGETS:
+            expected = self.bundle.regression_models[target].predict(self.bundle.regression_scalers[target].transform(X))
+            np.testing.assert_allclose(result[target], np.round(expected, 2), atol=0.011)
+
+    def test_predict_csv_in_and_out(self):
+        batch = pd.DataFrame(rows(10))
+        response = self.post(ml_views.predict_water_quality_batch, batch.to_csv(index=False), 'text/csv',
+                             path='/api/ml/batch/?output=csv')
+        self.assertEqual(response.status_code, 200)
+        result = pd.read_csv(io.StringIO(self.streamed(response)))
+        self.assertEqual(len(result), 10)
+        self.assertIn('WQI', result.columns)
+
+    def test_classify_matches_the_models(self):
+        batch = rows()
+        response = self.post(ml_views.classify_water_quality_batch, {'rows': batch})
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.content)
+        self.assertEqual(body['count'], len(batch))
+
+        X = np.column_stack([self.features(batch),
+                             [[row['tds'], row['bod'], row['cod']] for row in batch]])
+        expected = self.bundle.classifier_model.predict(self.bundle.classifier_scaler.transform(X))
+        self.assertEqual(body['labels'], expected.tolist())
+
+    def test_rejected_batches(self):
+        for view in (ml_views.predict_water_quality_batch, ml_views.classify_water_quality_batch):
+            self.assertEqual(self.error(view, {'rows': 'nope'})['error'], 'Expected a list of rows')
+            self.assertEqual(self.error(view, [])['error'], 'Batch is empty')
+
+            batch = rows(3)
+            del batch[0]['ph']
+            body = self.error(view, [batch[0]])
+            self.assertEqual(body['errors'], [{'index': None, 'error': 'Missing required field: ph'}])
+
+            batch = rows(4)
+            batch[1]['temp'] = 'warm'
+            batch[3]['location'] = ''
+            body = self.error(view, batch)
+            self.assertEqual(body['error'], 'Invalid input data format')
+            self.assertEqual([error['index'] for error in body['errors']], [1, 3])
+            self.assertIn('invalid temp', body['errors'][0]['error'])
+            self.assertIn('missing location', body['errors'][1]['error'])
+
+    def test_non_finite_values_are_rejected(self):
+        csv = 'year,location,temp,do,ph,tds,bod,cod\n2024,Powai,nan,5,7,600,12,80\n2024,Powai,28,inf,7,600,12,80\n'
+        for view in (ml_views.predict_water_quality_batch, ml_views.classify_water_quality_batch):
+            body = self.error(view, csv, 'text/csv')
+            self.assertEqual([error['index'] for error in body['errors']], [0, 1])
+
+    def test_batch_size_limit(self):
+        with mock.patch('api.ml_batch.MAX_BATCH_ROWS', 5):
+            body = self.error(ml_views.predict_water_quality_batch, rows(6))
+        self.assertIn('the limit is 5', body['error'])
+        self.assertGreater(MAX_BATCH_ROWS, 5)
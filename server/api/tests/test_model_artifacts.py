@@ -0,0 +1,87 @@
+import json
+import os
+import numpy as np
+from django.test import SimpleTestCase
+from api.model_artifacts import (
+    KEEP_VERSIONS, MANIFEST_FILENAME, VERSIONS_DIRNAME, ArtifactError, current_version, file_sha256,
+    list_versions, load_artifacts, read_manifest, set_current_version, write_artifacts
+)
+from .helpers import TempDirMixin
+
+
+def artifacts(seed=0):
+    rng = np.random.default_rng(seed)
+    return {'coefficients': rng.normal(size=(1000, 8)), 'metadata': {'locations': ['Powai', 'Kurla'], 'seed': seed}}
+
+
+class ModelArtifactTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = os.path.join(self.tmp, 'models')
+
+    def version_file(self, manifest, name):
+        return os.path.join(self.store, VERSIONS_DIRNAME, manifest['version'], manifest['files'][name]['filename'])
+
+    def test_round_trip_memory_mapped(self):
+        written = artifacts()
+        manifest = write_artifacts(self.store, written, feature_columns={'regression': ['Year', 'pH']},
+                                   metrics={'r2': 0.9})
+        self.assertEqual(current_version(self.store), manifest['version'])
+        self.assertEqual(read_manifest(self.store), manifest)
+        self.assertEqual(manifest['files']['coefficients']['sha256'],
+                         file_sha256(self.version_file(manifest, 'coefficients')))
+
+        loaded_manifest, loaded = load_artifacts(self.store)
+        self.assertEqual(loaded_manifest['feature_columns'], {'regression': ['Year', 'pH']})
+        self.assertEqual(loaded['metadata'], written['metadata'])
+        # Arrays are read-only maps of the version file, not copies
+        self.assertIsInstance(loaded['coefficients'], np.memmap)
+        self.assertFalse(loaded['coefficients'].flags.writeable)
+        self.assertTrue(np.array_equal(loaded['coefficients'], written['coefficients']))
+
+        _, copied = load_artifacts(self.store, mmap_mode=None)
+        self.assertNotIsInstance(copied['coefficients'], np.memmap)
+
+    def test_corrupted_artifact_is_rejected(self):
+        manifest = write_artifacts(self.store, artifacts())
+        path = self.version_file(manifest, 'coefficients')
+        with open(path, 'r+b') as f:
+            f.seek(os.path.getsize(path) // 2)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+        with self.assertRaises(ArtifactError) as raised:
+            load_artifacts(self.store)
+        self.assertIn('Checksum mismatch for coefficients.joblib', str(raised.exception))
+
+        os.remove(path)
+        with self.assertRaises(ArtifactError) as raised:
+            load_artifacts(self.store)
+        self.assertIn('missing coefficients.joblib', str(raised.exception))
+
+    def test_only_the_newest_versions_are_kept(self):
+        manifests = [write_artifacts(self.store, artifacts(seed)) for seed in range(KEEP_VERSIONS + 2)]
+        versions = [manifest['version'] for manifest in manifests]
+        self.assertEqual(list_versions(self.store), versions[-KEEP_VERSIONS:])
+        self.assertEqual(current_version(self.store), versions[-1])
+
+        # A pruned version can be neither loaded nor made current
+        with self.assertRaises(ArtifactError):
+            load_artifacts(self.store, versions[0])
+        with self.assertRaises(ArtifactError):
+            set_current_version(self.store, versions[0])
+
+        # A kept one can be rolled back to
+        set_current_version(self.store, versions[-KEEP_VERSIONS])
+        manifest, loaded = load_artifacts(self.store)
+        self.assertEqual(manifest['version'], versions[-KEEP_VERSIONS])
+        self.assertEqual(loaded['metadata']['seed'], len(versions) - KEEP_VERSIONS)
+
+    def test_unsupported_format(self):
+        manifest = write_artifacts(self.store, artifacts())
+        path = os.path.join(self.store, VERSIONS_DIRNAME, manifest['version'], MANIFEST_FILENAME)
+        with open(path, 'w') as f:
+            json.dump(dict(manifest, format_version=99), f)
+        with self.assertRaises(ArtifactError):
+            load_artifacts(self.store)
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from unittest import mock
+import joblib
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from api import model_registry as registry_module
+from api.model_registry import FLAT_FOREST_MAX_ROWS, MODEL_FILES, ModelBundle, ModelRegistry, load_model_bundle
+from .helpers import TempDirMixin, trained_models
+
+
+class CountingLoader:
+    """Loader building bundles from shared models; fails while self.error is set"""
+
+    def __init__(self, models):
+        self.models = models
+        self.calls = 0
+        self.error = None
+        self.delay = 0
+
+    def __call__(self, model_dir, version):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return ModelBundle(self.models, version, model_dir)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.models = trained_models()
+
+    def setUp(self):
+        self.loader = CountingLoader(self.models)
+        self.registry = ModelRegistry(loader=self.loader)
+
+    def test_loads_lazily_once(self):
+        self.assertEqual(self.loader.calls, 0)
+        self.assertEqual(self.registry.versions(), [])
+
+        # Slow enough that every thread asks before the first load finishes
+        self.loader.delay = 0.05
+        bundles = []
+        threads = [threading.Thread(target=lambda: bundles.append(self.registry.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loader.calls, 1)
+        self.assertTrue(all(bundle is bundles[0] for bundle in bundles))
+        self.assertEqual(bundles[0].version, 1)
+
+    def test_failed_first_load_is_retried(self):
+        self.loader.error = FileNotFoundError('mithi_classifier_model.pkl')
+        self.assertIsNone(self.registry.get())
+        self.assertIn('mithi_classifier_model.pkl', self.registry.last_error)
+
+        self.loader.error = None
+        self.assertEqual(self.registry.get().version, 1)
+        self.assertIsNone(self.registry.last_error)
+
+    def test_reload_swaps_and_keeps_previous_versions(self):
+        first = self.registry.get()
+        second = self.registry.reload()
+        self.assertIs(self.registry.get(), second)
+        self.assertEqual(second.version, 2)
+        # A request holding the old bundle keeps using it unchanged
+        self.assertEqual(first.version, 1)
+
+        third = self.registry.reload()
+        fourth = self.registry.reload()
+        self.assertEqual([bundle.version for bundle in self.registry.versions()], [4, 3, 2])
+        self.assertEqual(self.registry.versions()[:2], [fourth, third])
+
+    def test_failed_reload_keeps_the_current_bundle(self):
+        bundle = self.registry.get()
+        self.loader.error = ValueError('Checksum mismatch')
+        self.assertIsNone(self.registry.reload())
+        self.assertIs(self.registry.get(), bundle)
+        self.assertEqual(self.registry.last_error, 'Checksum mismatch')
+        self.assertEqual(self.registry.versions(), [bundle])
+
+        # The failed attempt does not use up a version number
+        self.loader.error = None
+        self.assertEqual(self.registry.reload().version, 2)
+
+    def test_warm_up(self):
+        with mock.patch.object(registry_module, 'get_inference_pool', return_value=None):
+            self.assertTrue(self.registry.warm_up())
+        self.assertEqual(self.loader.calls, 1)
+
+        pool = mock.Mock()
+        with mock.patch.object(registry_module, 'get_inference_pool', return_value=pool):
+            self.assertTrue(self.registry.warm_up())
+        pool.warm_up.assert_called_once()
+        self.assertIs(pool.warm_up.call_args[0][0], self.registry.get())
+
+        failing = ModelRegistry(loader=CountingLoader(self.models))
+        failing._loader.error = OSError('no models')
+        self.assertFalse(failing.warm_up())
+
+    def test_flat_forest_serves_small_batches_only(self):
+        bundle = self.registry.get()
+        rng = np.random.default_rng(0)
+        n = FLAT_FOREST_MAX_ROWS + 1
+        features = np.column_stack([rng.integers(2019, 2025, n), rng.integers(0, 5, n),
+                                    rng.normal(50, 10, (n, 6))]).astype(np.float64)
+        flat = mock.patch.object(bundle.classifier_forest, 'predict_proba', wraps=bundle.classifier_forest.predict_proba)
+        forest = mock.patch.object(bundle.classifier_model, 'predict_proba', wraps=bundle.classifier_model.predict_proba)
+        with flat as flat_proba, forest as forest_proba:
+            small = bundle.classify_proba(features[:FLAT_FOREST_MAX_ROWS])
+            self.assertEqual((flat_proba.call_count, forest_proba.call_count), (1, 0))
+            large = bundle.classify_proba(features)
+            self.assertEqual((flat_proba.call_count, forest_proba.call_count), (1, 1))
+        # Both paths give the same probabilities
+        self.assertTrue(np.array_equal(small, large[:FLAT_FOREST_MAX_ROWS]))
+
+
+class LooseModelFilesTests(TempDirMixin, SimpleTestCase):
+    def test_loads_pickles_without_an_artifact_store(self):
+        models = trained_models(n_estimators=5)
+        for key, filename in MODEL_FILES.items():
+            joblib.dump(models[key], os.path.join(self.tmp, filename))
+
+        with override_settings(MITHI_ML_MODEL_DIR=self.tmp):
+            bundle = ModelRegistry().get()
+        self.assertEqual(bundle.source, self.tmp)
+        self.assertEqual(bundle.locations, models['location_encoder'].classes_.tolist())
+        # Serving forms are derived when training did not export them
+        self.assertEqual(bundle.regression_fused.targets, ['TDS', 'BOD', 'COD'])
+
+        os.remove(os.path.join(self.tmp, MODEL_FILES['classifier_model']))
+        with self.assertRaises(FileNotFoundError):
+            load_model_bundle(self.tmp, 2)
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+from api.prediction_cache import PredictionCache
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def test_lru_eviction(self):
+        cache = PredictionCache(max_entries=2)
+        for key in 'abc':
+            cache.put(1, key, key.upper())
+        self.assertIsNone(cache.get(1, 'a'))
+        self.assertEqual(cache.get(1, 'c'), 'C')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_newer_version_clears(self):
+        cache = PredictionCache()
+        cache.put(1, 'key', 'old')
+        self.assertIsNone(cache.get(2, 'key'))
+        cache.put(2, 'key', 'new')
+        self.assertEqual(cache.get(2, 'key'), 'new')
+
+    def test_older_version_bypasses_without_clearing(self):
+        cache = PredictionCache()
+        cache.put(2, 'key', 'new')
+        # A request that still holds the previous bundle during a reload
+        self.assertIsNone(cache.get(1, 'key'))
+        cache.put(1, 'key', 'old')
+        self.assertEqual(cache.get(2, 'key'), 'new')
+        self.assertEqual(cache.stats()['model_version'], 2)
+
+    def test_normalize(self):
+        cache = PredictionCache(decimals=2)
+        self.assertEqual(cache.normalize('7.123'), 7.12)
+        for value in ('nan', 'inf', '-inf', float('nan')):
+            with self.assertRaises(ValueError):
+                cache.normalize(value)
@@ -0,0 +1,188 @@
+import json
+import os
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from api import views
+from api.readings_store import (
+    MAX_CLOCK_SKEW, MAX_READING_AGE, PUBLISH_LOG_FILENAME, ReadingStore, chunk_sequence, readings_from_records,
+    validate_readings
+)
+from .helpers import TempDirMixin
+
+NOW = pd.Timestamp('2026-03-01T12:00:00Z')
+
+
+def reading(timestamp, **values):
+    return {'station': 'Powai', 'timestamp': timestamp, 'temp': 28.5, 'ph': 7.1, **values}
+
+
+class ValidateReadingsTests(SimpleTestCase):
+    def validate(self, records):
+        return validate_readings(readings_from_records(records), now=NOW)
+
+    def test_valid_rows(self):
+        valid, errors = self.validate([reading('2026-03-01T11:00:00Z'), reading('2026-03-01T16:30:00+05:30')])
+        self.assertEqual(errors, [])
+        self.assertEqual(len(valid), 2)
+        self.assertEqual(str(valid['timestamp'].dt.tz), 'UTC')
+
+    def test_per_row_errors(self):
+        valid, errors = self.validate([
+            reading('2026-03-01T11:00:00Z'),
+            reading('not a date'),
+            reading('2026-03-01T11:00:00Z', station=''),
+            reading('2026-03-01T11:00:00Z', ph=15),
+            reading('2026-03-01T11:00:00Z', temp='warm'),
+            {'station': 'Powai', 'timestamp': '2026-03-01T11:00:00Z'},
+        ])
+        self.assertEqual(len(valid), 1)
+        by_index = {error['index']: error['error'] for error in errors}
+        self.assertEqual(set(by_index), {1, 2, 3, 4, 5})
+        self.assertIn('invalid timestamp', by_index[1])
+        self.assertIn('missing station', by_index[2])
+        self.assertIn('pH outside', by_index[3])
+        self.assertIn('Temp is not a number', by_index[4])
+        self.assertIn('no measurements', by_index[5])
+
+    def test_missing_required_field(self):
+        valid, errors = validate_readings(readings_from_records([{'station': 'Powai', 'temp': 20}]))
+        self.assertEqual(len(valid), 0)
+        self.assertEqual(errors, [{'index': None, 'error': 'Missing required field: timestamp'}])
+
+    def test_timestamps_outside_the_accepted_window(self):
+        within_skew = (NOW + MAX_CLOCK_SKEW - pd.Timedelta(seconds=1)).isoformat()
+        valid, errors = self.validate([
+            reading(within_skew),
+            reading((NOW + MAX_CLOCK_SKEW + pd.Timedelta(seconds=1)).isoformat()),
+            reading('2099-01-01T00:00:00Z'),
+            reading((NOW - MAX_READING_AGE - pd.Timedelta(days=1)).isoformat()),
+            reading('1970-01-01T00:00:00Z'),
+        ])
+        self.assertEqual(len(valid), 1)
+        self.assertEqual([error['index'] for error in errors], [1, 2, 3, 4])
+        self.assertTrue(all('future' in error['error'] for error in errors[:2]))
+        self.assertTrue(all('older than' in error['error'] for error in errors[2:]))
+
+
+class IngestValidationTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        overrides = override_settings(MITHI_READINGS_STORE_PATH=self.tmp)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.factory = APIRequestFactory()
+
+    def post(self, data, content_type='application/json'):
+        body = data if isinstance(data, str) else json.dumps(data)
+        response = views.ingest_readings(self.factory.post('/api/readings/ingest/', body, content_type=content_type))
+        response.render()
+        return response, json.loads(response.content)
+
+    def test_not_a_list(self):
+        response, body = self.post({'readings': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(body['success'])
+
+    def test_all_rows_rejected(self):
+        response, body = self.post([reading('2099-01-01T00:00:00Z'), reading('yesterday')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((body['accepted'], body['rejected']), (0, 2))
+        self.assertIn('future', body['errors'][0]['error'])
+        self.assertIn('invalid timestamp', body['errors'][1]['error'])
+
+    def test_csv_body_errors(self):
+        response, body = self.post('station,timestamp,pH\nPowai,2099-01-01T00:00:00Z,7\n,2020-01-01,7\n',
+                                   content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in body['errors']], [0, 1])
+
+
+class SinceCursorTests(TempDirMixin, SimpleTestCase):
+    def append(self, store, station, temp=25.0):
+        valid, errors = validate_readings(readings_from_records([reading(pd.Timestamp.now(tz='UTC').isoformat(),
+                                                                         station=station, temp=temp)]))
+        self.assertEqual(errors, [])
+        store.append(valid)
+
+    def stations(self, entries):
+        return sorted(entry['station'] for entry in entries)
+
+    def test_polling_returns_only_updated_stations(self):
+        store = ReadingStore(self.tmp)
+        self.append(store, 'Powai')
+        self.append(store, 'Kurla')
+        entries, cursor = store.latest_index.latest()
+        self.assertEqual(self.stations(entries), ['Kurla', 'Powai'])
+        self.assertEqual(cursor, store.last_sequence())
+
+        self.assertEqual(store.latest_index.latest(since=cursor), ([], cursor))
+
+        # Another worker's write is seen through the shared directory
+        ReadingStore(self.tmp).append(validate_readings(readings_from_records(
+            [reading(pd.Timestamp.now(tz='UTC').isoformat(), station='Mahim')]))[0])
+        entries, next_cursor = store.latest_index.latest(since=cursor)
+        self.assertEqual(self.stations(entries), ['Mahim'])
+        self.assertGreater(next_cursor, cursor)
+
+    def test_sequences_increase_when_the_clock_goes_back(self):
+        store = ReadingStore(self.tmp)
+        self.append(store, 'Powai')
+        first = store.last_sequence()
+        with mock.patch('api.readings_store.time.time_ns', return_value=first - 10 ** 9):
+            self.append(store, 'Kurla')
+        self.assertEqual(store.last_sequence(), first + 1)
+
+        entries, _ = store.latest_index.latest(since=first)
+        self.assertEqual(self.stations(entries), ['Kurla'])
+
+    def test_cursor_never_passes_an_unfinished_publish(self):
+        store = ReadingStore(self.tmp)
+        self.append(store, 'Powai')
+        _, cursor = store.latest_index.latest()
+
+        # A chunk published and logged before SEQUENCE is advanced (another writer mid-publish)
+        day = store.partitions()[-1]
+        name = f'chunk-{cursor + 5}-1-0.npz'
+        np.savez(os.path.join(store._partition_dir(day), name),
+                 timestamp=np.array([pd.Timestamp.now(tz='UTC').value]), station=np.array(['Bandra']),
+                 **{parameter: np.array([7.0], dtype=np.float32) for parameter in ('Temp', 'pH', 'DO', 'TDS', 'BOD', 'COD')})
+        self.assertEqual(chunk_sequence(name), cursor + 5)
+        with open(os.path.join(self.tmp, PUBLISH_LOG_FILENAME), 'a') as f:
+            f.write(f'{cursor + 5} {day}\n')
+
+        entries, next_cursor = store.latest_index.latest(since=cursor)
+        self.assertEqual(self.stations(entries), ['Bandra'])
+        self.assertEqual(next_cursor, cursor)
+        # Delivered again rather than skipped
+        self.assertEqual(self.stations(store.latest_index.latest(since=next_cursor)[0]), ['Bandra'])
+
+    def test_backfill_into_an_old_partition(self):
+        store = ReadingStore(self.tmp)
+        for days_ago in range(10):
+            timestamp = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=days_ago)
+            store.append(validate_readings(readings_from_records([reading(timestamp.isoformat())]))[0])
+        _, cursor = store.latest_index.latest()
+
+        # Another worker backfills a sensor's buffered history, a year old
+        backfill = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=365)
+        ReadingStore(self.tmp).append(validate_readings(readings_from_records(
+            [reading(backfill.isoformat(), station='Bandra', temp=21.0)]))[0])
+        entries, next_cursor = store.latest_index.latest(since=cursor)
+        self.assertEqual(self.stations(entries), ['Bandra'])
+        self.assertEqual(entries[0]['timestamp'], backfill.value)
+        self.assertGreater(next_cursor, cursor)
+        self.assertEqual(store.latest_index.latest(since=next_cursor), ([], next_cursor))
+
+    def test_partial_log_line_is_read_once_complete(self):
+        store = ReadingStore(self.tmp)
+        self.append(store, 'Powai')
+        offset = store.publish_log_end()
+        with open(os.path.join(self.tmp, PUBLISH_LOG_FILENAME), 'a') as f:
+            f.write('12345 2026-0')
+        self.assertEqual(store.published_since(offset), ([], offset))
+        with open(os.path.join(self.tmp, PUBLISH_LOG_FILENAME), 'a') as f:
+            f.write('3-01\n')
+        self.assertEqual(store.published_since(offset), ([(12345, '2026-03-01')], offset + len('12345 2026-03-01\n')))
@@ -0,0 +1,29 @@
+import numpy as np
+from django.test import SimpleTestCase
+from api.rules import RuleEngine, UNKNOWN_STATUS
+from generate_real_stats import get_parameter_status
+
+
+class RuleEngineTests(SimpleTestCase):
+    def test_band_edges(self):
+        engine = RuleEngine()
+        self.assertEqual([engine.status('pH', value)['message'] for value in (6.4, 6.5, 8.5, 8.6)],
+                         ['Acidic', 'Normal Range', 'Normal Range', 'Alkaline'])
+        self.assertEqual([engine.status('DO', value)['category'] for value in (3.9, 4, 6)], ['low', 'good', 'excellent'])
+        self.assertEqual(engine.status('TDS', float('nan')), UNKNOWN_STATUS)
+
+    def test_column_matches_single_values(self):
+        engine = RuleEngine()
+        values = np.linspace(0, 1200, 97)
+        self.assertEqual(engine.statuses('TDS', values), [engine.status('TDS', value) for value in values])
+
+
+class DashboardCardStyleTests(SimpleTestCase):
+    def test_cards_keep_their_styling(self):
+        self.assertEqual(get_parameter_status('Temp', 25),
+                         ('Optimal', 'from-orange-500 to-red-500', 'bg-orange-50', 'text-orange-600'))
+        self.assertEqual(get_parameter_status('DO', 7),
+                         ('Excellent', 'from-purple-500 to-pink-600', 'bg-purple-50', 'text-purple-600'))
+        self.assertEqual(get_parameter_status('TDS', 500),
+                         ('Good', 'from-blue-500 to-teal-600', 'bg-blue-50', 'text-blue-600'))
+        self.assertEqual(get_parameter_status('pH', 7.2)[1], 'from-green-500 to-emerald-600')
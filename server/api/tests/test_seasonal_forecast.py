@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from api.historical_data import generate_history
+from api.seasonal_forecast import RLS_MAX_BATCH, SeasonalModel, t_quantile
+
+TARGETS = ['ph', 'tds', 'bod', 'cod']
+
+
+class SeasonalModelTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.history = generate_history('2021-01-01', '2024-12-31', seed=5)
+
+    def fit(self, frame, origin=None):
+        return SeasonalModel.fit(frame['date'], frame[TARGETS], TARGETS, origin)
+
+    def assert_same_fit(self, updated, refit):
+        self.assertEqual(updated.n_samples, refit.n_samples)
+        np.testing.assert_allclose(updated.coef, refit.coef, rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(updated.sigma, refit.sigma, rtol=1e-6)
+        np.testing.assert_allclose(updated.xtx_inv, refit.xtx_inv, rtol=1e-5, atol=1e-10)
+
+    def test_recursive_updates_match_a_refit(self):
+        train, new = self.history.iloc[:1000], self.history.iloc[1000:1000 + RLS_MAX_BATCH]
+        model = self.fit(train)
+        updated = model
+        # Reading by reading (Sherman-Morrison) and in one batch give the refit's solution
+        for start in range(0, len(new), 16):
+            batch = new.iloc[start:start + 16]
+            updated = updated.updated(batch['date'], batch[TARGETS])
+        self.assert_same_fit(updated, self.fit(pd.concat([train, new]), origin=model.origin))
+        # The model itself is left untouched
+        self.assertEqual(model.n_samples, 1000)
+
+    def test_large_batches_are_re_solved(self):
+        train, new = self.history.iloc[:1000], self.history.iloc[1000:]
+        model = self.fit(train)
+        self.assertGreater(len(new), RLS_MAX_BATCH)
+        self.assert_same_fit(model.updated(new['date'], new[TARGETS]),
+                             self.fit(self.history, origin=model.origin))
+
+    def test_removed_undoes_updated(self):
+        train, new = self.history.iloc[:1000], self.history.iloc[1000:1010]
+        model = self.fit(train)
+        self.assert_same_fit(model.updated(new['date'], new[TARGETS]).removed(new['date'], new[TARGETS]), model)
+        # Large batches take the re-solve path
+        later = self.history.iloc[1000:]
+        self.assert_same_fit(self.fit(self.history).removed(later['date'], later[TARGETS]), model)
+
+    def test_stored_form(self):
+        model = self.fit(self.history)
+        restored = SeasonalModel.from_arrays(model.to_arrays())
+        dates = pd.date_range('2025-01-01', periods=30, freq='D')
+        for expected, actual in zip(model.predict(dates), restored.predict(dates)):
+            self.assertTrue(np.array_equal(expected, actual))
+
+    def test_interval_coverage_on_later_readings(self):
+        train, test = self.history.iloc[:1095], self.history.iloc[1095:]
+        model = self.fit(train)
+        mean, half_width = model.predict(test['date'], level=0.9)
+        self.assertEqual(mean.shape, (len(test), len(TARGETS)))
+        inside = np.abs(test[TARGETS].to_numpy() - mean) <= half_width
+        coverage = inside.mean(axis=0)
+        self.assertTrue(np.all((coverage > 0.8) & (coverage < 0.98)), coverage)
+        # Wider intervals at a higher level
+        self.assertTrue(np.all(model.predict(test['date'], level=0.99)[1] > half_width))
+
+    def test_no_drift_on_readings_the_fit_describes(self):
+        train, new = self.history.iloc[:1095], self.history.iloc[1095:]
+        updated = self.fit(train).updated(new['date'], new[TARGETS])
+        self.assertFalse(updated.drifted)
+        # A level shift the fit has never seen is reported
+        shifted = new[TARGETS] * 3
+        self.assertTrue(self.fit(train).updated(new['date'], shifted).drifted)
+
+    def test_too_few_readings(self):
+        with self.assertRaises(ValueError):
+            self.fit(self.history.iloc[:10])
+
+    def test_t_quantile(self):
+        self.assertAlmostEqual(t_quantile(0.95, 10), 1.8125, places=2)
+        self.assertAlmostEqual(t_quantile(0.95, 1000), 1.6464, places=3)
@@ -0,0 +1,224 @@
+import numpy as np
+from django.test import SimpleTestCase
+from api.ml_views import calculate_wqi, calculate_wqi_batch
+from api.wqi import DEFAULT_WQI_WEIGHTS, SubIndexTable, WQIEngine, calculate_wqi_array, default_wqi_engine
+
+
+def band_score(value, lower, upper):
+    """Sub-index the way the former scalar calculate_wqi chose it, band by band"""
+    for score, low, high in zip((100, 80, 60, 40), lower, upper):
+        if low <= value <= high:
+            return score
+    return 20
+
+
+def scalar_sub_indices(temperature, dissolved_oxygen, ph, tds, bod, cod):
+    inf = float('inf')
+    return {
+        'pH': band_score(ph, (6.5, 6.0, 5.5, 5.0), (8.5, 9.0, 9.5, 10.0)),
+        'DO': band_score(dissolved_oxygen, (6, 4, 2, 1), (inf,) * 4),
+        'TDS': band_score(tds, (-inf,) * 4, (500, 1000, 2000, 3000)),
+        'BOD': band_score(bod, (-inf,) * 4, (3, 6, 12, 20)),
+        'COD': band_score(cod, (-inf,) * 4, (20, 40, 80, 120)),
+        'Temp': band_score(temperature, (20, 15, 10, 5), (30, 35, 40, 45)),
+    }
+
+
+def legacy_calculate_wqi(temperature, dissolved_oxygen, ph, tds, bod, cod):
+    """The scalar calculate_wqi ml_views had before the vectorized engine, verbatim"""
+    # Parameter weights (importance factors)
+    weights = {
+        'pH': 0.12,
+        'DO': 0.17,
+        'TDS': 0.19,
+        'BOD': 0.22,
+        'COD': 0.19,
+        'Temp': 0.11
+    }
+
+    # Calculate sub-indices for each parameter
+    # pH (optimal range: 6.5-8.5)
+    if 6.5 <= ph <= 8.5:
+        ph_index = 100
+    elif 6.0 <= ph < 6.5 or 8.5 < ph <= 9.0:
+        ph_index = 80
+    elif 5.5 <= ph < 6.0 or 9.0 < ph <= 9.5:
+        ph_index = 60
+    elif 5.0 <= ph < 5.5 or 9.5 < ph <= 10.0:
+        ph_index = 40
+    else:
+        ph_index = 20
+
+    # Dissolved Oxygen (optimal: >6 mg/L)
+    if dissolved_oxygen >= 6:
+        do_index = 100
+    elif dissolved_oxygen >= 4:
+        do_index = 80
+    elif dissolved_oxygen >= 2:
+        do_index = 60
+    elif dissolved_oxygen >= 1:
+        do_index = 40
+    else:
+        do_index = 20
+
+    # TDS (optimal: <500 mg/L)
+    if tds <= 500:
+        tds_index = 100
+    elif tds <= 1000:
+        tds_index = 80
+    elif tds <= 2000:
+        tds_index = 60
+    elif tds <= 3000:
+        tds_index = 40
+    else:
+        tds_index = 20
+
+    # BOD (optimal: <3 mg/L)
+    if bod <= 3:
+        bod_index = 100
+    elif bod <= 6:
+        bod_index = 80
+    elif bod <= 12:
+        bod_index = 60
+    elif bod <= 20:
+        bod_index = 40
+    else:
+        bod_index = 20
+
+    # COD (optimal: <20 mg/L)
+    if cod <= 20:
+        cod_index = 100
+    elif cod <= 40:
+        cod_index = 80
+    elif cod <= 80:
+        cod_index = 60
+    elif cod <= 120:
+        cod_index = 40
+    else:
+        cod_index = 20
+
+    # Temperature (optimal: 20-30°C)
+    if 20 <= temperature <= 30:
+        temp_index = 100
+    elif 15 <= temperature < 20 or 30 < temperature <= 35:
+        temp_index = 80
+    elif 10 <= temperature < 15 or 35 < temperature <= 40:
+        temp_index = 60
+    elif 5 <= temperature < 10 or 40 < temperature <= 45:
+        temp_index = 40
+    else:
+        temp_index = 20
+
+    # Calculate weighted WQI
+    wqi = (
+        weights['pH'] * ph_index +
+        weights['DO'] * do_index +
+        weights['TDS'] * tds_index +
+        weights['BOD'] * bod_index +
+        weights['COD'] * cod_index +
+        weights['Temp'] * temp_index
+    )
+
+    return max(0, min(100, wqi))  # Ensure WQI is between 0 and 100
+
+
+# Every band boundary, a hair either side of it, and values outside all bands
+EDGES = {
+    'temperature': [-10, 4.999, 5, 10, 15, 19.999, 20, 30, 30.001, 35, 40, 45, 45.001, 100],
+    'dissolved_oxygen': [-1, 0, 0.999, 1, 2, 4, 5.999, 6, 20],
+    'ph': [0, 4.999, 5, 5.5, 6, 6.5, 8.5, 8.500001, 9, 9.5, 10, 10.001, 14],
+    'tds': [-5, 0, 500, 500.001, 1000, 2000, 3000, 3000.001, 1e9],
+    'bod': [0, 3, 3.001, 6, 12, 20, 20.001, 500],
+    'cod': [0, 20, 20.001, 40, 80, 120, 120.001, 1e6],
+}
+ARGUMENTS = list(EDGES)
+
+
+def random_readings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'temperature': rng.uniform(-5, 55, n),
+        'dissolved_oxygen': rng.uniform(-1, 12, n),
+        'ph': rng.uniform(3, 12, n),
+        'tds': rng.uniform(0, 4000, n),
+        'bod': rng.uniform(0, 30, n),
+        'cod': rng.uniform(0, 150, n),
+    }
+
+
+def edge_readings(seed=0):
+    """Every edge of every parameter, combined with random edges of the others"""
+    rng = np.random.default_rng(seed)
+    columns = {argument: [] for argument in ARGUMENTS}
+    for argument in ARGUMENTS:
+        for value in EDGES[argument]:
+            for _ in range(5):
+                for other in ARGUMENTS:
+                    columns[other].append(value if other == argument else rng.choice(EDGES[other]))
+    return {argument: np.array(values, dtype=np.float64) for argument, values in columns.items()}
+
+
+class WQIEngineTests(SimpleTestCase):
+    def assert_matches_scalar(self, readings):
+        wqi = calculate_wqi_array(**readings)
+        expected = [legacy_calculate_wqi(*row) for row in zip(*(readings[argument].tolist() for argument in ARGUMENTS))]
+        # Bit-identical, not just close
+        self.assertEqual(wqi.tolist(), expected)
+
+    def test_random_readings_match_the_scalar_formula(self):
+        self.assert_matches_scalar(random_readings(20000))
+
+    def test_band_boundaries_match_the_scalar_formula(self):
+        self.assert_matches_scalar(edge_readings())
+
+    def test_endpoint_helpers(self):
+        readings = edge_readings(1)
+        self.assertEqual(calculate_wqi_batch(**readings).tolist(), calculate_wqi_array(**readings).tolist())
+        for row in list(zip(*(readings[argument].tolist() for argument in ARGUMENTS)))[:200]:
+            self.assertEqual(calculate_wqi(*row), legacy_calculate_wqi(*row))
+
+    def test_nan_scores_as_outside_every_band(self):
+        readings = random_readings(50, seed=2)
+        for argument in ARGUMENTS:
+            with_nan = {name: values.copy() for name, values in readings.items()}
+            with_nan[argument][::3] = np.nan
+            # The scalar formula sent NaN to its final else branch
+            expected = [legacy_calculate_wqi(*row) for row in zip(*(with_nan[name].tolist() for name in ARGUMENTS))]
+            self.assertEqual(calculate_wqi_array(**with_nan).tolist(), expected)
+
+    def test_sub_indices(self):
+        readings = edge_readings(3)
+        sub_indices = default_wqi_engine.sub_indices(
+            Temp=readings['temperature'], DO=readings['dissolved_oxygen'], pH=readings['ph'],
+            TDS=readings['tds'], BOD=readings['bod'], COD=readings['cod'])
+        rows = zip(*(readings[argument].tolist() for argument in ARGUMENTS))
+        for i, row in enumerate(rows):
+            expected = scalar_sub_indices(*row)
+            self.assertEqual({parameter: int(values[i]) for parameter, values in sub_indices.items()}, expected)
+
+    def test_available_parameters_renormalize_the_weights(self):
+        readings = random_readings(500, seed=4)
+        values = {'pH': readings['ph'], 'TDS': readings['tds'], 'BOD': readings['bod'], 'COD': readings['cod']}
+        wqi = default_wqi_engine.calculate_available(values)
+        total = sum(DEFAULT_WQI_WEIGHTS[parameter] for parameter in values)
+        rows = zip(*(readings[argument].tolist() for argument in ARGUMENTS))
+        for value, row in zip(wqi.tolist(), rows):
+            indices = scalar_sub_indices(*row)
+            expected = sum(DEFAULT_WQI_WEIGHTS[parameter] * indices[parameter] for parameter in values) / total
+            self.assertAlmostEqual(value, expected, places=9)
+
+        # With every parameter present it is the full WQI
+        full = default_wqi_engine.calculate_available({
+            'Temp': readings['temperature'], 'DO': readings['dissolved_oxygen'], **values})
+        np.testing.assert_allclose(full, calculate_wqi_array(**readings), rtol=1e-12)
+
+        with self.assertRaises(ValueError):
+            default_wqi_engine.calculate_available({'Turbidity': readings['ph']})
+
+    def test_invalid_tables(self):
+        with self.assertRaises(ValueError):
+            SubIndexTable(lower=[6, 4], upper=None)
+        with self.assertRaises(ValueError):
+            SubIndexTable(lower=None, upper=[20, 10, 40, 80])
+        with self.assertRaises(ValueError):
+            WQIEngine(breakpoints={'pH': {'lower': [6.5, 6.0, 5.5, 5.0], 'upper': [8.5, 9.0, 9.5, 10.0]}})
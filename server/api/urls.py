@@ -4,6 +4,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 from . import ml_views
+from . import live_stream
 
 # Create router for ViewSets
 router = DefaultRouter()
@@ -25,13 +26,17 @@ urlpatterns = [
     
     # ML API endpoints
     path('ml/predict/', ml_views.predict_water_quality, name='ml_predict'),
+    path('ml/predict/batch/', ml_views.predict_water_quality_batch, name='ml_predict_batch'),
     path('ml/classify/', ml_views.classify_water_quality, name='ml_classify'),
+    path('ml/classify/batch/', ml_views.classify_water_quality_batch, name='ml_classify_batch'),
     path('ml/model-info/', ml_views.get_model_info, name='ml_model_info'),
     path('ml/reload/', ml_views.reload_models, name='ml_reload'),
     
     # Dashboard CSV data endpoints
     path('dashboard/stats/', views.get_dashboard_stats, name='dashboard_stats'),
     path('dashboard/latest-readings/', views.get_latest_readings, name='latest_readings'),
+    path('readings/ingest/', views.ingest_readings, name='ingest_readings'),
+    path('live/stream/', live_stream.stream_live_readings, name='live_stream'),
     path('advanced-features/', views.get_advanced_features_data, name='advanced_features'),
     path('3d-visualization/', views.get_3d_visualization_data, name='3d_visualization'),
 ]
@@ -586,98 +586,105 @@ class RiverViewSet(viewsets.ModelViewSet):
     queryset = River.objects.all()
     serializer_class = RiverSerializer
 
+from .dataset import get_river_dataset, get_dataset_path, source_value
+from .advanced_features import parse_grid_size, parse_year, generate_sensor_network, generate_heatmap, generate_pollution_sources
+from django.core.exceptions import RequestDataTooBig
+from .rules import get_rule_engine
+from .readings_store import get_reading_store, reading_payload, readings_from_csv, readings_from_records, validate_readings
+from .forecasting import forecast_registry
+
 # Dashboard CSV Data Functions
 @api_view(['GET'])
 def get_dashboard_stats(request):
     """Get real-time dashboard statistics from CSV file"""
     try:
-        import pandas as pd
-        import os
-        import numpy as np
         from datetime import datetime
         
-        # Path to CSV file
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'mithi_river_data.csv')
-        
-        if not os.path.exists(csv_path):
+        # Shared, already-parsed dataset (CSV is only re-read when it changes)
+        try:
+            dataset = get_river_dataset()
+        except FileNotFoundError:
             return Response({
                 'error': 'CSV file not found',
-                'path': csv_path
+                'path': get_dataset_path()
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Read CSV file
-        df = pd.read_csv(csv_path)
+        cube = dataset.cube
+        rules = get_rule_engine()
         
         # Get latest year data (most recent)
-        latest_year = df['Year'].max()
-        latest_data = df[df['Year'] == latest_year]
+        latest_year = dataset.latest_year
+        latest_data = dataset.latest_data
         
-        # Calculate current statistics
+        # Calculate current statistics from the precomputed aggregate cube
+        stats = cube.summary(latest_year)
+        temp, ph, do, tds, bod, cod = (stats[p] for p in ['Temp', 'pH', 'DO', 'TDS', 'BOD', 'COD'])
         current_stats = {
             'water_quality_index': {
-                'value': latest_data['WQI'].mode().iloc[0] if len(latest_data) > 0 else 'Poor',
-                'samples': len(latest_data),
-                'distribution': latest_data['WQI'].value_counts().to_dict()
+                'value': cube.wqi_mode(latest_year),
+                'samples': cube.samples(latest_year),
+                'distribution': cube.wqi_distribution(latest_year)
             },
             'temperature': {
-                'value': round(latest_data['Temp'].mean(), 1),
+                'value': round(temp['mean'], 1),
                 'unit': '°C',
-                'min': round(latest_data['Temp'].min(), 1),
-                'max': round(latest_data['Temp'].max(), 1),
-                'status': get_temp_status(latest_data['Temp'].mean())
+                'min': round(temp['min'], 1),
+                'max': round(temp['max'], 1),
+                'status': rules.status('Temp', temp['mean'])
             },
             'ph': {
-                'value': round(latest_data['pH'].mean(), 1),
+                'value': round(ph['mean'], 1),
                 'unit': '',
-                'min': round(latest_data['pH'].min(), 1),
-                'max': round(latest_data['pH'].max(), 1),
-                'status': get_ph_status(latest_data['pH'].mean())
+                'min': round(ph['min'], 1),
+                'max': round(ph['max'], 1),
+                'status': rules.status('pH', ph['mean'])
             },
             'dissolved_oxygen': {
-                'value': round(latest_data['DO'].mean(), 1),
+                'value': round(do['mean'], 1),
                 'unit': 'mg/L',
-                'min': round(latest_data['DO'].min(), 1),
-                'max': round(latest_data['DO'].max(), 1),
-                'status': get_do_status(latest_data['DO'].mean())
+                'min': round(do['min'], 1),
+                'max': round(do['max'], 1),
+                'status': rules.status('DO', do['mean'])
             },
             'tds': {
-                'value': int(latest_data['TDS'].mean()),
+                'value': int(tds['mean']),
                 'unit': 'ppm',
-                'min': int(latest_data['TDS'].min()),
-                'max': int(latest_data['TDS'].max()),
-                'status': get_tds_status(latest_data['TDS'].mean())
+                'min': int(tds['min']),
+                'max': int(tds['max']),
+                'status': rules.status('TDS', tds['mean'])
             },
             'bod': {
-                'value': round(latest_data['BOD'].mean(), 1),
+                'value': round(bod['mean'], 1),
                 'unit': 'mg/L',
-                'min': round(latest_data['BOD'].min(), 1),
-                'max': round(latest_data['BOD'].max(), 1),
-                'status': get_bod_status(latest_data['BOD'].mean())
+                'min': round(bod['min'], 1),
+                'max': round(bod['max'], 1),
+                'status': rules.status('BOD', bod['mean'])
             },
             'cod': {
-                'value': round(latest_data['COD'].mean(), 1),
+                'value': round(cod['mean'], 1),
                 'unit': 'mg/L',
-                'min': round(latest_data['COD'].min(), 1),
-                'max': round(latest_data['COD'].max(), 1),
-                'status': get_cod_status(latest_data['COD'].mean())
+                'min': round(cod['min'], 1),
+                'max': round(cod['max'], 1),
+                'status': rules.status('COD', cod['mean'])
             }
         }
         
         # Location-wise data
         location_stats = []
-        for location in df['Location'].unique():
-            loc_data = latest_data[latest_data['Location'] == location]
-            if len(loc_data) > 0:
+        for location in dataset.locations:
+            samples = cube.samples(latest_year, location)
+            if samples > 0:
+                loc_stats = cube.summary(latest_year, location)
                 location_stats.append({
                     'location': location,
-                    'samples': len(loc_data),
-                    'avg_temp': round(loc_data['Temp'].mean(), 1),
-                    'avg_ph': round(loc_data['pH'].mean(), 1),
-                    'avg_do': round(loc_data['DO'].mean(), 1),
-                    'avg_tds': int(loc_data['TDS'].mean()),
-                    'avg_bod': round(loc_data['BOD'].mean(), 1),
-                    'avg_cod': round(loc_data['COD'].mean(), 1),
-                    'wqi': loc_data['WQI'].mode().iloc[0] if len(loc_data) > 0 else 'Poor'
+                    'samples': samples,
+                    'avg_temp': round(loc_stats['Temp']['mean'], 1),
+                    'avg_ph': round(loc_stats['pH']['mean'], 1),
+                    'avg_do': round(loc_stats['DO']['mean'], 1),
+                    'avg_tds': int(loc_stats['TDS']['mean']),
+                    'avg_bod': round(loc_stats['BOD']['mean'], 1),
+                    'avg_cod': round(loc_stats['COD']['mean'], 1),
+                    'wqi': cube.wqi_mode(latest_year, location)
                 })
         
         # Trend data (simulated daily from recent data)
@@ -685,10 +692,10 @@ def get_dashboard_stats(request):
         
         # Dataset info
         dataset_info = {
-            'total_records': len(df),
-            'locations': df['Location'].nunique(),
-            'location_names': df['Location'].unique().tolist(),
-            'year_range': f"{df['Year'].min()} - {df['Year'].max()}",
+            'total_records': len(dataset),
+            'locations': len(dataset.locations),
+            'location_names': dataset.locations,
+            'year_range': f"{min(cube.years)} - {max(cube.years)}",
             'latest_year': int(latest_year),
             'parameters': ['Temperature', 'pH', 'DO', 'TDS', 'BOD', 'COD', 'WQI']
         }
@@ -709,20 +716,95 @@ def get_dashboard_stats(request):
             'success': False
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+def ingest_readings(request):
+    """
+    Bulk-ingest sensor readings (station, timestamp, Temp, pH, DO, TDS, BOD, COD).
+    Accepts a JSON list (or {"readings": [...]}), a text/csv body or a CSV file upload.
+    Valid rows are appended to the readings store and folded into the forecast
+    models already loaded in this process; invalid rows are reported by index.
+    """
+    try:
+        if request.content_type.startswith('text/csv'):
+            raw = readings_from_csv(request.body.decode('utf-8'))
+        elif 'file' in request.FILES:
+            raw = readings_from_csv(request.FILES['file'].read().decode('utf-8'))
+        else:
+            records = request.data.get('readings') if isinstance(request.data, dict) else request.data
+            if not isinstance(records, list):
+                return Response({
+                    'error': 'Expected a list of readings',
+                    'success': False
+                }, status=status.HTTP_400_BAD_REQUEST)
+            raw = readings_from_records(records)
+
+        valid, errors = validate_readings(raw)
+        accepted = get_reading_store().append(valid)
+        if accepted > 0:
+            try:
+                forecast_registry.observe(valid)
+            except Exception as e:
+                # The readings are stored either way; the next refit picks them up
+                print(f"Forecast update failed: {str(e)}")
+
+        return Response({
+            'success': accepted > 0,
+            'received': len(raw),
+            'accepted': accepted,
+            'rejected': len(raw) - accepted,
+            'errors': errors
+        }, status=status.HTTP_201_CREATED if accepted > 0 else status.HTTP_400_BAD_REQUEST)
+
+    except RequestDataTooBig:
+        return Response({
+            'error': f'Batch larger than {settings.DATA_UPLOAD_MAX_MEMORY_SIZE} bytes; split it into smaller batches',
+            'success': False
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except Exception as e:
+        return Response({
+            'error': str(e),
+            'success': False
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 def get_latest_readings(request):
-    """Get latest sensor readings from CSV"""
+    """
+    Last known reading of every station from the ingestion index (sampled from the CSV
+    until readings are ingested). Pass the returned `cursor` back as `?since=` to get
+    only the stations updated since the previous poll.
+    """
     try:
-        import pandas as pd
-        import os
         from datetime import datetime, timedelta
         
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'mithi_river_data.csv')
-        df = pd.read_csv(csv_path)
+        since = request.GET.get('since')
+        try:
+            since = int(since) if since not in (None, '') else None
+        except ValueError:
+            return Response({
+                'error': 'since must be a cursor returned by a previous call',
+                'success': False
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        entries, cursor = get_reading_store().latest_index.latest(since)
+        if cursor > 0:
+            readings = []
+            for i, entry in enumerate(entries):
+                readings.append({'id': i + 1, **reading_payload(entry)})
+            return Response({
+                'success': True,
+                'readings': readings,
+                'count': len(readings),
+                # Nanosecond cursor sent as a string: it does not fit a JavaScript number
+                'cursor': str(cursor),
+                'timestamp': datetime.now().isoformat(),
+                'data_source': 'Sensor readings'
+            })
+        
+        dataset = get_river_dataset()
         
-        # Get recent readings from latest year
-        latest_year = df['Year'].max()
-        latest_samples = df[df['Year'] == latest_year].sample(n=min(20, len(df[df['Year'] == latest_year])))
+        # No live readings yet: sample recent rows from the latest year
+        latest_data = dataset.latest_data
+        latest_samples = latest_data.sample(n=min(20, len(latest_data)))
         
         readings = []
         for i, (_, row) in enumerate(latest_samples.iterrows()):
@@ -733,12 +815,12 @@ def get_latest_readings(request):
                 'id': len(readings) + 1,
                 'location': row['Location'],
                 'timestamp': timestamp.isoformat(),
-                'temperature': round(row['Temp'], 1),
-                'ph': round(row['pH'], 1),
-                'dissolved_oxygen': round(row['DO'], 1),
+                'temperature': round(float(row['Temp']), 1),
+                'ph': round(float(row['pH']), 1),
+                'dissolved_oxygen': round(float(row['DO']), 1),
                 'tds': int(row['TDS']),
-                'bod': round(row['BOD'], 1),
-                'cod': round(row['COD'], 1),
+                'bod': round(float(row['BOD']), 1),
+                'cod': round(float(row['COD']), 1),
                 'wqi': row['WQI'],
                 'year': int(row['Year'])
             })
@@ -750,7 +832,8 @@ def get_latest_readings(request):
             'success': True,
             'readings': readings,
             'count': len(readings),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'data_source': 'Mithi River CSV Dataset'
         })
         
     except Exception as e:
@@ -759,57 +842,6 @@ def get_latest_readings(request):
             'success': False
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# Helper functions for status determination
-def get_temp_status(temp):
-    if 20 <= temp <= 30:
-        return {'category': 'optimal', 'color': 'green', 'message': 'Optimal'}
-    elif temp < 20:
-        return {'category': 'cool', 'color': 'blue', 'message': 'Cool'}
-    else:
-        return {'category': 'warm', 'color': 'orange', 'message': 'Warm'}
-
-def get_ph_status(ph):
-    if 6.5 <= ph <= 8.5:
-        return {'category': 'normal', 'color': 'green', 'message': 'Normal Range'}
-    elif ph < 6.5:
-        return {'category': 'acidic', 'color': 'red', 'message': 'Acidic'}
-    else:
-        return {'category': 'alkaline', 'color': 'orange', 'message': 'Alkaline'}
-
-def get_do_status(do):
-    if do >= 6:
-        return {'category': 'excellent', 'color': 'green', 'message': 'Excellent'}
-    elif do >= 4:
-        return {'category': 'good', 'color': 'blue', 'message': 'Good'}
-    else:
-        return {'category': 'low', 'color': 'red', 'message': 'Low'}
-
-def get_tds_status(tds):
-    if tds <= 300:
-        return {'category': 'excellent', 'color': 'green', 'message': 'Excellent'}
-    elif tds <= 600:
-        return {'category': 'good', 'color': 'blue', 'message': 'Good'}
-    elif tds <= 900:
-        return {'category': 'fair', 'color': 'orange', 'message': 'Fair'}
-    else:
-        return {'category': 'poor', 'color': 'red', 'message': 'Poor'}
-
-def get_bod_status(bod):
-    if bod <= 3:
-        return {'category': 'excellent', 'color': 'green', 'message': 'Excellent'}
-    elif bod <= 6:
-        return {'category': 'good', 'color': 'blue', 'message': 'Good'}
-    else:
-        return {'category': 'poor', 'color': 'red', 'message': 'High'}
-
-def get_cod_status(cod):
-    if cod <= 50:
-        return {'category': 'good', 'color': 'green', 'message': 'Good'}
-    elif cod <= 100:
-        return {'category': 'moderate', 'color': 'orange', 'message': 'Moderate'}
-    else:
-        return {'category': 'poor', 'color': 'red', 'message': 'High'}
-
 def generate_trend_data(latest_data):
     """Generate 7-day trend data from recent samples"""
     import numpy as np
@@ -833,12 +865,12 @@ def generate_trend_data(latest_data):
             trend_data.append({
                 'day': day,
                 'wqi': max(20, min(100, int(wqi_numeric + np.random.normal(0, 5)))),
-                'temperature': round(max(15, min(40, sample['Temp'] + temp_var)), 1),
-                'ph': round(max(5, min(9, sample['pH'] + ph_var)), 1),
-                'dissolved_oxygen': round(max(1, min(12, sample['DO'] + do_var)), 1),
+                'temperature': round(max(15, min(40, float(sample['Temp']) + temp_var)), 1),
+                'ph': round(max(5, min(9, float(sample['pH']) + ph_var)), 1),
+                'dissolved_oxygen': round(max(1, min(12, float(sample['DO']) + do_var)), 1),
                 'tds': max(50, min(5000, int(sample['TDS'] + np.random.normal(0, 100)))),
-                'bod': round(max(1, min(25, sample['BOD'] + np.random.normal(0, 1))), 1),
-                'cod': round(max(10, min(300, sample['COD'] + np.random.normal(0, 10))), 1)
+                'bod': round(max(1, min(25, float(sample['BOD']) + np.random.normal(0, 1))), 1),
+                'cod': round(max(10, min(300, float(sample['COD']) + np.random.normal(0, 10))), 1)
             })
     
     return trend_data
@@ -847,53 +879,32 @@ def generate_trend_data(latest_data):
 def get_advanced_features_data(request):
     """Get data for advanced features components"""
     try:
-        import pandas as pd
-        import os
         from datetime import datetime, timedelta
         import numpy as np
         
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'mithi_river_data.csv')
-        df = pd.read_csv(csv_path)
+        dataset = get_river_dataset()
+        cube = dataset.cube
         
         # Get latest year data
-        latest_year = df['Year'].max()
-        latest_data = df[df['Year'] == latest_year]
+        latest_data = dataset.latest_data
+        
+        try:
+            grid_size = parse_grid_size(request.GET.get('grid_size'))
+            heatmap_year = parse_year(request.GET.get('year'), dataset)
+        except ValueError as e:
+            return Response({
+                'error': str(e),
+                'success': False
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Sensor network, heatmap and pollution sources share one random generator
+        rng = np.random.default_rng()
         
         # Sensor Network Data
-        sensor_data = []
-        for i, location in enumerate(df['Location'].unique()):
-            loc_data = latest_data[latest_data['Location'] == location]
-            if len(loc_data) > 0:
-                sample = loc_data.sample(n=1).iloc[0]
-                sensor_data.append({
-                    'id': f'sensor_{i+1}',
-                    'name': f'{location} Sensor',
-                    'location': location,
-                    'status': 'active' if np.random.random() > 0.1 else 'warning',
-                    'battery': np.random.randint(70, 100),
-                    'signal': np.random.randint(80, 100),
-                    'last_reading': datetime.now().isoformat(),
-                    'temperature': round(sample['Temp'], 1),
-                    'ph': round(sample['pH'], 1),
-                    'dissolved_oxygen': round(sample['DO'], 1),
-                    'tds': int(sample['TDS']),
-                    'bod': round(sample['BOD'], 1),
-                    'cod': round(sample['COD'], 1)
-                })
+        sensor_data = generate_sensor_network(latest_data, dataset.locations, rng)
         
-        # Heatmap Data (simulated grid data)
-        heatmap_data = []
-        for i in range(20):  # 20x20 grid
-            for j in range(20):
-                # Use nearby location data with some interpolation
-                base_sample = latest_data.sample(n=1).iloc[0]
-                heatmap_data.append({
-                    'x': i,
-                    'y': j,
-                    'value': max(0, min(100, base_sample['TDS']/50 + np.random.normal(0, 10))),
-                    'temperature': round(base_sample['Temp'] + np.random.normal(0, 2), 1),
-                    'location': f'Grid_{i}_{j}'
-                })
+        # Heatmap Data (IDW surface interpolated from station means)
+        heatmap_data = generate_heatmap(dataset, grid_size, heatmap_year)
         
         # Environmental Impact Data
         impact_data = {
@@ -901,7 +912,7 @@ def get_advanced_features_data(request):
             'categories': [
                 {
                     'name': 'Water Quality',
-                    'score': int(latest_data['WQI'].apply(lambda x: 85 if x == 'Good' else 65 if x == 'Moderate' else 45).mean()),
+                    'score': int(cube.wqi_score(dataset.latest_year)),
                     'status': 'needs_attention'
                 },
                 {
@@ -928,37 +939,15 @@ def get_advanced_features_data(request):
             ]
         }
         
-        # Pollution Source Data
-        pollution_sources = []
-        source_types = ['Industrial', 'Sewage', 'Agricultural', 'Residential', 'Commercial']
-        for i, stype in enumerate(source_types):
-            for location in df['Location'].unique()[:3]:  # Top 3 locations
-                loc_data = latest_data[latest_data['Location'] == location]
-                if len(loc_data) > 0:
-                    sample = loc_data.sample(n=1).iloc[0]
-                    pollution_sources.append({
-                        'id': f'{stype.lower()}_{location.lower()}_{i}',
-                        'name': f'{location} {stype} Source',
-                        'type': stype,
-                        'location': location,
-                        'coordinates': {
-                            'lat': 19.0 + np.random.uniform(-0.1, 0.1),
-                            'lng': 72.85 + np.random.uniform(-0.1, 0.1)
-                        },
-                        'severity': 'high' if sample['BOD'] > 15 else 'medium' if sample['BOD'] > 10 else 'low',
-                        'pollutants': ['BOD', 'COD', 'TDS'],
-                        'impact_score': min(100, int((sample['BOD'] + sample['COD']/5 + sample['TDS']/50))),
-                        'status': 'active',
-                        'monthly_discharge': np.random.randint(1000, 50000),
-                        'compliance': 'violation' if sample['BOD'] > 15 else 'warning' if sample['BOD'] > 10 else 'compliant'
-                    })
+        # Pollution Source Data (top 3 locations)
+        pollution_sources = generate_pollution_sources(latest_data, dataset.locations[:3], rng)
         
         # Alert System Data
         alerts = []
         alert_types = ['pH Spike', 'Low DO', 'High TDS', 'Temperature Alert', 'BOD Violation']
         for i, alert_type in enumerate(alert_types):
             if np.random.random() > 0.3:  # 70% chance of alert
-                location = np.random.choice(df['Location'].unique())
+                location = str(np.random.choice(dataset.locations))
                 alerts.append({
                     'id': f'alert_{i}',
                     'type': alert_type,
@@ -974,20 +963,30 @@ def get_advanced_features_data(request):
         
         # Timeline Data (historical trends)
         timeline_data = []
+
+        def year_mean(year_stats, parameter, convert):
+            # A year without any reading of a parameter has no mean for it
+            mean = year_stats.get(parameter, {}).get('mean')
+            return None if mean is None else convert(mean)
+
+        def one_decimal(mean):
+            return round(mean, 1)
+
         for year in range(2020, 2025):
-            year_data = df[df['Year'] == year]
-            if len(year_data) > 0:
+            total_samples = cube.samples(year)
+            if total_samples > 0:
+                year_stats = cube.summary(year)
                 timeline_data.append({
                     'year': year,
-                    'avg_wqi': year_data['WQI'].apply(lambda x: 85 if x == 'Good' else 65 if x == 'Moderate' else 45).mean(),
-                    'avg_temperature': round(year_data['Temp'].mean(), 1),
-                    'avg_ph': round(year_data['pH'].mean(), 1),
-                    'avg_do': round(year_data['DO'].mean(), 1),
-                    'avg_tds': int(year_data['TDS'].mean()),
-                    'avg_bod': round(year_data['BOD'].mean(), 1),
-                    'avg_cod': round(year_data['COD'].mean(), 1),
-                    'total_samples': len(year_data),
-                    'good_quality_percentage': (year_data['WQI'] == 'Good').sum() / len(year_data) * 100
+                    'avg_wqi': cube.wqi_score(year),
+                    'avg_temperature': year_mean(year_stats, 'Temp', one_decimal),
+                    'avg_ph': year_mean(year_stats, 'pH', one_decimal),
+                    'avg_do': year_mean(year_stats, 'DO', one_decimal),
+                    'avg_tds': year_mean(year_stats, 'TDS', int),
+                    'avg_bod': year_mean(year_stats, 'BOD', one_decimal),
+                    'avg_cod': year_mean(year_stats, 'COD', one_decimal),
+                    'total_samples': total_samples,
+                    'good_quality_percentage': cube.wqi_distribution(year).get('Good', 0) / total_samples * 100
                 })
         
         # Ecosystem Health Data
@@ -1056,6 +1055,8 @@ def get_advanced_features_data(request):
             'timestamp': datetime.now().isoformat(),
             'sensor_network': sensor_data,
             'heatmap_data': heatmap_data,
+            'heatmap_grid_size': grid_size,
+            'heatmap_year': heatmap_year,
             'environmental_impact': impact_data,
             'pollution_sources': pollution_sources,
             'smart_alerts': alerts,
@@ -1075,16 +1076,11 @@ def get_advanced_features_data(request):
 def get_3d_visualization_data(request):
     """Get 3D visualization data from CSV"""
     try:
-        import pandas as pd
-        import os
         import numpy as np
         from datetime import datetime
         
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'mithi_river_data.csv')
-        df = pd.read_csv(csv_path)
-        
-        latest_year = df['Year'].max()
-        latest_data = df[df['Year'] == latest_year].sample(n=min(100, len(df[df['Year'] == latest_year])))
+        dataset = get_river_dataset()
+        latest_data = dataset.latest_data.sample(n=min(100, len(dataset.latest_data)))
         
         # Generate 3D points with real data
         visualization_data = []
@@ -1093,12 +1089,12 @@ def get_3d_visualization_data(request):
                 'x': np.random.uniform(-10, 10),
                 'y': np.random.uniform(-10, 10),
                 'z': np.random.uniform(0, 20),
-                'value': row['TDS'],
-                'temperature': row['Temp'],
-                'ph': row['pH'],
-                'do': row['DO'],
-                'bod': row['BOD'],
-                'cod': row['COD'],
+                'value': source_value(row['TDS']),
+                'temperature': source_value(row['Temp']),
+                'ph': source_value(row['pH']),
+                'do': source_value(row['DO']),
+                'bod': source_value(row['BOD']),
+                'cod': source_value(row['COD']),
                 'wqi': row['WQI'],
                 'location': row['Location'],
                 'color': '#ff0000' if row['WQI'] == 'Poor' else '#ffaa00' if row['WQI'] == 'Moderate' else '#00ff00'
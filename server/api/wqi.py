@@ -0,0 +1,148 @@
+"""
+Water Quality Index engine
+Computes the weighted WQI over whole NumPy columns from configurable breakpoint
+tables. Each parameter's sub-index comes from nested bands: band i covers
+lower[i] <= value <= upper[i], the innermost band containing the value wins, and
+values outside every band (or NaN) get the default score.
+
+This module has no Django dependency so the training scripts can use it too.
+"""
+
+import numpy as np
+
+# Bands are listed from the optimal one outwards; None means unbounded on that side
+DEFAULT_WQI_BREAKPOINTS = {
+    # pH (optimal range: 6.5-8.5)
+    'pH': {'lower': [6.5, 6.0, 5.5, 5.0], 'upper': [8.5, 9.0, 9.5, 10.0]},
+    # Dissolved Oxygen (optimal: >6 mg/L)
+    'DO': {'lower': [6, 4, 2, 1], 'upper': None},
+    # TDS (optimal: <500 mg/L)
+    'TDS': {'lower': None, 'upper': [500, 1000, 2000, 3000]},
+    # BOD (optimal: <3 mg/L)
+    'BOD': {'lower': None, 'upper': [3, 6, 12, 20]},
+    # COD (optimal: <20 mg/L)
+    'COD': {'lower': None, 'upper': [20, 40, 80, 120]},
+    # Temperature (optimal: 20-30°C)
+    'Temp': {'lower': [20, 15, 10, 5], 'upper': [30, 35, 40, 45]},
+}
+
+# Sub-index of each band (same order as the breakpoints) and outside all bands
+DEFAULT_BAND_SCORES = [100, 80, 60, 40]
+DEFAULT_OUTSIDE_SCORE = 20
+
+# Parameter weights (importance factors); the WQI sums them in this order
+DEFAULT_WQI_WEIGHTS = {
+    'pH': 0.12,
+    'DO': 0.17,
+    'TDS': 0.19,
+    'BOD': 0.22,
+    'COD': 0.19,
+    'Temp': 0.11
+}
+
+
+class SubIndexTable:
+    """Nested-band lookup for one parameter"""
+
+    def __init__(self, lower=None, upper=None, scores=DEFAULT_BAND_SCORES, default=DEFAULT_OUTSIDE_SCORE):
+        n_bands = len(scores)
+        lower = None if lower is None else np.asarray(lower, dtype=np.float64)
+        upper = None if upper is None else np.asarray(upper, dtype=np.float64)
+        for bounds, direction in ((lower, -1), (upper, 1)):
+            if bounds is None:
+                continue
+            if len(bounds) != n_bands:
+                raise ValueError('Every band needs a lower bound, an upper bound and a score')
+            if np.any(np.diff(bounds) * direction < 0):
+                raise ValueError('Bands must be nested, from the optimal band outwards')
+
+        self.n_bands = n_bands
+        self.lower = lower
+        self.upper = upper
+        # Band n_bands means "outside every band"
+        self.scores = np.append(np.asarray(scores, dtype=np.int64), default)
+
+    def bands(self, values):
+        """Index of the innermost band containing each value (n_bands when none does)"""
+        values = np.asarray(values, dtype=np.float64)
+        # Tables are a handful of bounds, so counting comparisons beats a binary search:
+        # the band is the larger of the bands ruled out by each side
+        band = np.zeros(values.shape, dtype=np.uint8)
+        if self.lower is not None:
+            inside = np.zeros(values.shape, dtype=np.uint8)
+            for bound in self.lower:
+                inside += bound <= values
+            band = self.n_bands - inside
+        if self.upper is not None:
+            outside = np.zeros(values.shape, dtype=np.uint8)
+            for bound in self.upper:
+                outside += bound < values
+            band = np.maximum(band, outside)
+        return np.where(np.isnan(values), self.n_bands, band).astype(np.intp)
+
+    def sub_index(self, values):
+        return self.scores[self.bands(values)]
+
+
+class WQIEngine:
+    """Weighted WQI over arrays of readings"""
+
+    def __init__(self, breakpoints=None, weights=None, scores=DEFAULT_BAND_SCORES, default=DEFAULT_OUTSIDE_SCORE):
+        breakpoints = breakpoints or DEFAULT_WQI_BREAKPOINTS
+        self.weights = dict(weights or DEFAULT_WQI_WEIGHTS)
+        self.tables = {
+            parameter: SubIndexTable(
+                table.get('lower'),
+                table.get('upper'),
+                table.get('scores', scores),
+                table.get('default', default)
+            )
+            for parameter, table in breakpoints.items()
+        }
+        missing = set(self.weights) - set(self.tables)
+        if missing:
+            raise ValueError(f"No breakpoints for weighted parameters: {', '.join(sorted(missing))}")
+
+        # weight * sub-index for every band, so each term is a single lookup
+        self._weighted_scores = {parameter: weight * self.tables[parameter].scores
+                                 for parameter, weight in self.weights.items()}
+
+    def sub_indices(self, **values):
+        """Sub-index array per parameter, keyed like the weights (pH, DO, TDS, BOD, COD, Temp)"""
+        return {parameter: self.tables[parameter].sub_index(values[parameter]) for parameter in self.weights}
+
+    def calculate(self, temperature, dissolved_oxygen, ph, tds, bod, cod):
+        """WQI array clipped to [0, 100]"""
+        values = {'pH': ph, 'DO': dissolved_oxygen, 'TDS': tds, 'BOD': bod, 'COD': cod, 'Temp': temperature}
+
+        # Accumulate term by term, in weight order, so results match scalar arithmetic exactly
+        wqi = None
+        for parameter in self.weights:
+            term = self._weighted_scores[parameter].take(self.tables[parameter].bands(values[parameter]))
+            wqi = term if wqi is None else wqi + term
+        return np.clip(wqi, 0, 100)
+
+    def calculate_available(self, values):
+        """
+        WQI from whichever weighted parameters are present in values (e.g. a forecast
+        without temperature or DO), with the weights of those parameters renormalized
+        """
+        parameters = [parameter for parameter in self.weights if parameter in values]
+        if not parameters:
+            raise ValueError('No WQI parameters given')
+        total_weight = sum(self.weights[parameter] for parameter in parameters)
+
+        wqi = None
+        for parameter in parameters:
+            term = self._weighted_scores[parameter].take(self.tables[parameter].bands(values[parameter]))
+            wqi = term if wqi is None else wqi + term
+        return np.clip(wqi / total_weight, 0, 100)
+
+
+# Engine with the default breakpoints, for scripts and modules without settings
+default_wqi_engine = WQIEngine()
+
+
+def calculate_wqi_array(temperature, dissolved_oxygen, ph, tds, bod, cod, engine=None):
+    """WQI for arrays of readings using the given (or default) engine"""
+    return (engine or default_wqi_engine).calculate(temperature, dissolved_oxygen, ph, tds, bod, cod)
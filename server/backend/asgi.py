@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Optionally load the ML models before the first request (MITHI_ML_PRELOAD=True)
+from api.model_registry import warm_up_if_configured
+warm_up_if_configured()
+# Load the forecasting models too, and start their periodic retraining if enabled
+from api.forecasting import start_forecasting_if_configured
+start_forecasting_if_configured()
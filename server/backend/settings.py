@@ -194,3 +194,30 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Mithi River dataset served by the dashboard endpoints
+MITHI_RIVER_DATA_PATH = os.getenv('MITHI_RIVER_DATA_PATH', str(BASE_DIR / 'mithi_river_data.csv'))
+# Columnar store built from the CSV by `manage.py import_river_csv`; used instead of the CSV when present
+MITHI_RIVER_STORE_PATH = os.getenv('MITHI_RIVER_STORE_PATH', str(BASE_DIR / 'mithi_river_store'))
+# Memory-map store columns so every worker process shares one copy of the dataset
+MITHI_RIVER_STORE_MMAP = os.getenv('MITHI_RIVER_STORE_MMAP', 'False') == 'True'
+# Append-only store for sensor readings posted to /api/readings/ingest/
+MITHI_READINGS_STORE_PATH = os.getenv('MITHI_READINGS_STORE_PATH', str(BASE_DIR / 'readings_store'))
+# JSON file with status bands / WQI breakpoints replacing the built-in rules (e.g. IS 10500 or CPCB limits)
+MITHI_WATER_QUALITY_RULES = os.getenv('MITHI_WATER_QUALITY_RULES') or None
+# Directory with the trained ML model files, and whether server processes load them at startup
+# (otherwise on first use). Nothing is trained by the server: run train_mithi_models.py and
+# `manage.py train_forecast_models` on deploy, or the ML and forecast endpoints answer 503
+MITHI_ML_MODEL_DIR = os.getenv('MITHI_ML_MODEL_DIR', str(BASE_DIR))
+MITHI_ML_PRELOAD = os.getenv('MITHI_ML_PRELOAD', 'False') == 'True'
+# LRU cache of single-row ML predictions (entries; 0 disables) and the decimals readings are rounded to for it
+MITHI_ML_CACHE_SIZE = int(os.getenv('MITHI_ML_CACHE_SIZE', '10000'))
+MITHI_ML_CACHE_DECIMALS = int(os.getenv('MITHI_ML_CACHE_DECIMALS', '4'))
+# Micro-batching of concurrent single-row ML requests: extra wait for more rows (0: batch whatever queued
+# while the previous batch ran) and largest batch (1 disables)
+MITHI_ML_BATCH_MAX_WAIT_MS = float(os.getenv('MITHI_ML_BATCH_MAX_WAIT_MS', '0'))
+MITHI_ML_BATCH_MAX_SIZE = int(os.getenv('MITHI_ML_BATCH_MAX_SIZE', '64'))
+# Worker processes for forest inference (classifier, anomaly scoring); 0 runs it in the request thread
+MITHI_ML_WORKERS = int(os.getenv('MITHI_ML_WORKERS', '0'))
+# Retrain the forecasting models in the background every N hours (0 disables); they are loaded with MITHI_ML_PRELOAD
+MITHI_FORECAST_RETRAIN_HOURS = float(os.getenv('MITHI_FORECAST_RETRAIN_HOURS', '0'))
@@ -6,6 +6,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import json
+from api.columnar_store import load_river_frame
+from api.rules import get_rule_engine
 
 def calculate_wqi_status(wqi_category):
     """Convert WQI category to status and color"""
@@ -16,50 +18,45 @@ def calculate_wqi_status(wqi_category):
     else:  # Poor
         return "Needs Improvement", "from-red-500 to-orange-600", "bg-red-50", "text-red-600"
 
-def get_ph_status(ph_value):
-    """Get pH status based on value"""
-    if 6.5 <= ph_value <= 8.5:
-        return "Normal Range", "from-green-500 to-emerald-600", "bg-green-50", "text-green-600"
-    elif ph_value < 6.5:
-        return "Acidic", "from-red-500 to-orange-600", "bg-red-50", "text-red-600"
-    else:
-        return "Alkaline", "from-yellow-500 to-orange-600", "bg-yellow-50", "text-yellow-600"
+# Dashboard card styling of each (parameter, status category) of the default rules
+CARD_STYLES = {
+    ('pH', 'normal'): ("from-green-500 to-emerald-600", "bg-green-50", "text-green-600"),
+    ('pH', 'acidic'): ("from-red-500 to-orange-600", "bg-red-50", "text-red-600"),
+    ('pH', 'alkaline'): ("from-yellow-500 to-orange-600", "bg-yellow-50", "text-yellow-600"),
+    ('Temp', 'optimal'): ("from-orange-500 to-red-500", "bg-orange-50", "text-orange-600"),
+    ('Temp', 'cool'): ("from-blue-500 to-cyan-600", "bg-blue-50", "text-blue-600"),
+    ('Temp', 'warm'): ("from-red-500 to-pink-600", "bg-red-50", "text-red-600"),
+    ('DO', 'excellent'): ("from-purple-500 to-pink-600", "bg-purple-50", "text-purple-600"),
+    ('DO', 'good'): ("from-blue-500 to-purple-600", "bg-blue-50", "text-blue-600"),
+    ('DO', 'low'): ("from-red-500 to-orange-600", "bg-red-50", "text-red-600"),
+    ('TDS', 'excellent'): ("from-green-500 to-emerald-600", "bg-green-50", "text-green-600"),
+    ('TDS', 'good'): ("from-blue-500 to-teal-600", "bg-blue-50", "text-blue-600"),
+    ('TDS', 'fair'): ("from-yellow-500 to-orange-600", "bg-yellow-50", "text-yellow-600"),
+    ('TDS', 'poor'): ("from-red-500 to-pink-600", "bg-red-50", "text-red-600"),
+}
 
-def get_temp_status(temp_value):
-    """Get temperature status based on value"""
-    if 20 <= temp_value <= 30:
-        return "Optimal", "from-orange-500 to-red-500", "bg-orange-50", "text-orange-600"
-    elif temp_value < 20:
-        return "Cool", "from-blue-500 to-cyan-600", "bg-blue-50", "text-blue-600"
-    else:
-        return "Warm", "from-red-500 to-pink-600", "bg-red-50", "text-red-600"
+# Styling by status color, for categories introduced by custom rules
+STATUS_STYLES = {
+    'green': ("from-green-500 to-emerald-600", "bg-green-50", "text-green-600"),
+    'blue': ("from-blue-500 to-cyan-600", "bg-blue-50", "text-blue-600"),
+    'yellow': ("from-yellow-500 to-orange-600", "bg-yellow-50", "text-yellow-600"),
+    'orange': ("from-yellow-500 to-orange-600", "bg-yellow-50", "text-yellow-600"),
+    'red': ("from-red-500 to-orange-600", "bg-red-50", "text-red-600"),
+    'gray': ("from-gray-500 to-slate-600", "bg-gray-50", "text-gray-600"),
+}
 
-def get_do_status(do_value):
-    """Get dissolved oxygen status"""
-    if do_value >= 6:
-        return "Excellent", "from-purple-500 to-pink-600", "bg-purple-50", "text-purple-600"
-    elif do_value >= 4:
-        return "Good", "from-blue-500 to-purple-600", "bg-blue-50", "text-blue-600"
-    else:
-        return "Low", "from-red-500 to-orange-600", "bg-red-50", "text-red-600"
-
-def get_tds_status(tds_value):
-    """Get TDS status"""
-    if tds_value <= 300:
-        return "Excellent", "from-green-500 to-emerald-600", "bg-green-50", "text-green-600"
-    elif tds_value <= 600:
-        return "Good", "from-blue-500 to-teal-600", "bg-blue-50", "text-blue-600"
-    elif tds_value <= 900:
-        return "Fair", "from-yellow-500 to-orange-600", "bg-yellow-50", "text-yellow-600"
-    else:
-        return "Poor", "from-red-500 to-pink-600", "bg-red-50", "text-red-600"
+def get_parameter_status(parameter, value):
+    """Status text and card colors for a parameter value, from the configured rule engine"""
+    result = get_rule_engine().status(parameter, value)
+    style = CARD_STYLES.get((parameter, result['category'])) or STATUS_STYLES.get(result['color'], STATUS_STYLES['gray'])
+    return (result['message'],) + style
 
 def generate_dashboard_stats():
     """Generate real dashboard statistics from the dataset"""
     
     # Load the dataset
     print("Loading Mithi River dataset...")
-    df = pd.read_csv('mithi_river_data.csv')
+    df = load_river_frame('mithi_river_data.csv')
     
     # Get latest data (most recent year)
     latest_year = df['Year'].max()
@@ -87,10 +84,10 @@ def generate_dashboard_stats():
     
     # Create dashboard stats
     wqi_status, wqi_color, wqi_bg, wqi_text = calculate_wqi_status(most_common_wqi)
-    ph_status, ph_color, ph_bg, ph_text = get_ph_status(avg_stats['pH'])
-    temp_status, temp_color, temp_bg, temp_text = get_temp_status(avg_stats['Temp'])
-    do_status, do_color, do_bg, do_text = get_do_status(avg_stats['DO'])
-    tds_status, tds_color, tds_bg, tds_text = get_tds_status(avg_stats['TDS'])
+    ph_status, ph_color, ph_bg, ph_text = get_parameter_status('pH', avg_stats['pH'])
+    temp_status, temp_color, temp_bg, temp_text = get_parameter_status('Temp', avg_stats['Temp'])
+    do_status, do_color, do_bg, do_text = get_parameter_status('DO', avg_stats['DO'])
+    tds_status, tds_color, tds_bg, tds_text = get_parameter_status('TDS', avg_stats['TDS'])
     
     # Calculate BOD for turbidity representation (using BOD as turbidity indicator)
     turbidity_status = "Clear" if avg_stats['BOD'] < 10 else "Moderate" if avg_stats['BOD'] < 15 else "High"
@@ -8,6 +8,7 @@ from django.views.decorators.http import require_http_methods
 import json
 import sys
 import os
+from api.forecasting import ForecastModelsUnavailable
 
 # Add the server directory to Python path to import ai_engine
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -25,9 +26,31 @@ def get_predictive_forecast(request):
     """Get AI-powered water quality forecasts"""
     try:
         days_ahead = int(request.GET.get('days', 7))
+        # Coverage probability of the prediction intervals
+        level = float(request.GET.get('level', 0.9))
+        # ?stations=Powai,Kurla adds per-station forecasts ('all' for every station with models)
+        stations = request.GET.get('stations')
+        station_forecasts = None
         
         if ai_engine:
-            forecasts = ai_engine.predictive_analytics.forecast_trends(days_ahead=days_ahead)
+            try:
+                forecasts = ai_engine.predictive_analytics.forecast_trends(days_ahead=days_ahead, level=level)
+                if stations:
+                    station_forecasts = ai_engine.predictive_analytics.forecast_station_trends(
+                        days_ahead=days_ahead,
+                        stations=None if stations == 'all' else [station.strip() for station in stations.split(',')],
+                        level=level
+                    )
+            except ValueError as e:
+                return JsonResponse({
+                    'success': False,
+                    'error': str(e)
+                }, status=400)
+            except ForecastModelsUnavailable as e:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Forecast models unavailable: {str(e)}'
+                }, status=503)
         else:
             # Fallback data if AI engine not available
             from datetime import datetime, timedelta
@@ -47,15 +70,18 @@ def get_predictive_forecast(request):
                     'confidence': round(0.9 - (i * 0.02), 2)
                 })
         
-        return JsonResponse({
+        response = {
             'success': True,
             'forecasts': forecasts,
             'model_info': {
-                'algorithm': 'Linear Regression with Seasonal Patterns',
+                'algorithm': 'Trend + Fourier Seasonal Regression with Prediction Intervals',
                 'accuracy': '94.2%',
                 'last_trained': '2024-10-08T10:30:00Z'
             }
-        })
+        }
+        if station_forecasts is not None:
+            response['station_forecasts'] = station_forecasts
+        return JsonResponse(response)
         
     except Exception as e:
         return JsonResponse({
@@ -1,6 +1,7 @@
 """
 Mithi River Water Quality ML Model Training Script
-Trains Linear Regression and Random Forest Classifier models
+Trains Linear Regression and Random Forest Classifier models and publishes them
+as a new version of the model artifact store (api.model_artifacts)
 """
 
 import pandas as pd
@@ -10,15 +11,19 @@ from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, classification_report, accuracy_score
-import joblib
 import os
+from api.columnar_store import load_river_frame, river_data_exists
+from api.wqi import calculate_wqi_array
+from api.model_artifacts import DEFAULT_ARTIFACTS_DIRNAME, write_artifacts
+from api.forest import FlatForest
+from api.fused_regression import FusedRegression
 
 def load_and_preprocess_data(file_path):
     """Load and preprocess the Mithi River data"""
     print("Loading Mithi River water quality data...")
     
-    # Load the CSV file
-    df = pd.read_csv(file_path)
+    # Load the data (columnar store if imported, otherwise the CSV)
+    df = load_river_frame(file_path)
     print(f"Dataset shape: {df.shape}")
     print(f"Columns: {df.columns.tolist()}")
     
@@ -35,13 +40,15 @@ def load_and_preprocess_data(file_path):
     # Handle missing values if any
     df = df.dropna()
     
+    # Numeric WQI (the formula the API reports) next to the labelled category
+    df['WQI_score'] = calculate_wqi_array(df['Temp'], df['DO'], df['pH'], df['TDS'], df['BOD'], df['COD'])
+    print("\nMean computed WQI per labelled category:")
+    print(df.groupby('WQI')['WQI_score'].mean().round(1))
+    
     # Encode categorical variables
     le_location = LabelEncoder()
     df['Location_encoded'] = le_location.fit_transform(df['Location'])
     
-    # Save the label encoder for later use
-    joblib.dump(le_location, 'location_encoder.pkl')
-    
     return df, le_location
 
 def train_regression_model(df):
@@ -59,6 +66,7 @@ def train_regression_model(df):
     # Create models for each target
     models = {}
     scalers = {}
+    metrics = {}
     
     for target in target_cols:
         print(f"\nTraining model for {target}...")
@@ -90,20 +98,13 @@ def train_regression_model(df):
         print(f"  MSE: {mse:.2f}")
         print(f"  R²: {r2:.4f}")
         
-        # Store model and scaler
+        # Store model, scaler and test metrics
         models[target] = model
         scalers[target] = scaler
-        
-        # Save individual models
-        joblib.dump(model, f'linear_regression_{target.lower()}.pkl')
-        joblib.dump(scaler, f'scaler_{target.lower()}.pkl')
-    
-    # Save combined models
-    joblib.dump(models, 'mithi_regression_models.pkl')
-    joblib.dump(scalers, 'mithi_regression_scalers.pkl')
+        metrics[target] = {'mse': float(mse), 'r2': float(r2)}
     
-    print(f"\nRegression models saved successfully!")
-    return models, scalers
+    print(f"\nRegression models trained successfully!")
+    return models, scalers, metrics
 
 def train_classifier_model(df):
     """Train Random Forest Classifier to predict WQI category"""
@@ -163,12 +164,13 @@ def train_classifier_model(df):
     print(f"\nFeature Importance:")
     print(feature_importance)
     
-    # Save model and scaler
-    joblib.dump(clf, 'mithi_classifier_model.pkl')
-    joblib.dump(scaler, 'mithi_classifier_scaler.pkl')
+    metrics = {
+        'accuracy': float(accuracy),
+        'feature_importance': dict(zip(feature_importance['feature'], feature_importance['importance'].astype(float)))
+    }
     
-    print(f"\nClassifier model saved successfully!")
-    return clf, scaler
+    print(f"\nClassifier model trained successfully!")
+    return clf, scaler, metrics
 
 def main():
     """Main function to train all models"""
@@ -178,9 +180,9 @@ def main():
     # File path to the CSV
     csv_file = "mithi_river_data.csv"
     
-    # Check if file exists
-    if not os.path.exists(csv_file):
-        print(f"Error: {csv_file} not found!")
+    # Check that the data exists (the columnar store alone is enough)
+    if not river_data_exists(csv_file):
+        print(f"Error: neither {csv_file} nor an imported columnar store was found!")
         print("Please make sure the Mithi River CSV file is in the current directory.")
         return
     
@@ -189,23 +191,12 @@ def main():
         df, le_location = load_and_preprocess_data(csv_file)
         
         # Train regression models
-        regression_models, regression_scalers = train_regression_model(df)
+        regression_models, regression_scalers, regression_metrics = train_regression_model(df)
         
         # Train classifier model
-        classifier_model, classifier_scaler = train_classifier_model(df)
+        classifier_model, classifier_scaler, classifier_metrics = train_classifier_model(df)
         
-        print("\n" + "="*60)
-        print("MODEL TRAINING COMPLETED SUCCESSFULLY!")
-        print("="*60)
-        print("\nGenerated files:")
-        print("1. mithi_regression_models.pkl - Linear regression models")
-        print("2. mithi_regression_scalers.pkl - Feature scalers for regression")
-        print("3. mithi_classifier_model.pkl - Random Forest classifier")
-        print("4. mithi_classifier_scaler.pkl - Feature scaler for classifier")
-        print("5. location_encoder.pkl - Location label encoder")
-        print("6. Individual model files for each target variable")
-        
-        # Save model metadata
+        # Model metadata
         model_info = {
             'dataset_shape': df.shape,
             'feature_columns_regression': ['Year', 'Location_encoded', 'Temp', 'DO', 'pH'],
@@ -213,11 +204,40 @@ def main():
             'feature_columns_classifier': ['Year', 'Location_encoded', 'Temp', 'DO', 'pH', 'TDS', 'BOD', 'COD'],
             'target_column_classifier': 'WQI',
             'locations': le_location.classes_.tolist(),
-            'wqi_categories': df['WQI'].unique().tolist()
+            'wqi_categories': df['WQI'].unique().tolist(),
+            'wqi_score_by_category': df.groupby('WQI')['WQI_score'].mean().round(1).to_dict()
         }
         
-        joblib.dump(model_info, 'model_metadata.pkl')
-        print("7. model_metadata.pkl - Model information and metadata")
+        # Publish every artifact as one new version of the store
+        manifest = write_artifacts(
+            DEFAULT_ARTIFACTS_DIRNAME,
+            {
+                'regression_models': regression_models,
+                'regression_scalers': regression_scalers,
+                # Scalers folded into one coefficient matrix, for the serving path
+                'regression_fused': FusedRegression.from_sklearn(
+                    regression_models, regression_scalers, model_info['target_columns_regression']
+                ).to_arrays(),
+                'classifier_model': classifier_model,
+                'classifier_scaler': classifier_scaler,
+                # Flat node arrays plus the input scaling, for the serving evaluator
+                'classifier_forest': FlatForest.from_sklearn(classifier_model, classifier_scaler).to_arrays(),
+                'location_encoder': le_location,
+                'model_metadata': model_info
+            },
+            feature_columns={
+                'regression': model_info['feature_columns_regression'],
+                'classifier': model_info['feature_columns_classifier']
+            },
+            metrics={'regression': regression_metrics, 'classifier': classifier_metrics}
+        )
+        
+        print("\n" + "="*60)
+        print("MODEL TRAINING COMPLETED SUCCESSFULLY!")
+        print("="*60)
+        print(f"\nPublished model version {manifest['version']} to {DEFAULT_ARTIFACTS_DIRNAME}/:")
+        for name, entry in manifest['files'].items():
+            print(f"  {entry['filename']} ({entry['size']} bytes, sha256 {entry['sha256'][:12]})")
         
     except Exception as e:
         print(f"Error during model training: {str(e)}")